@@ -1,16 +1,24 @@
 import os
 import logging
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from app.utils.filters import format_date, nl2br, accounting, accounting_number
 from app.routes import email_bp
 from app.blueprints.accounts import accounts_bp
 from app.blueprints.expediting import bp as expediting_bp
+from app.blueprints.replica import replica_bp
+from app.blueprints.search import search_bp
+from app.blueprints.price_history import price_history_bp
+from app.blueprints.health import health_bp
+from app.blueprints.metrics import metrics_bp
+from app.blueprints.profiles import profiles_bp
+from app.blueprints.memory import memory_bp
+from app.services import replica, search, price_history, supabase_http, shared_cache, change_feed
+from app.utils import async_views, call_trace, deadline, jinja_cache, memwatch, metrics, profiler
 from dotenv import load_dotenv
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# SQLAlchemy lives in app.extensions (re-exported here for existing imports)
+from app.extensions import db
 
 def create_app():
     # Load environment variables from .env
@@ -22,6 +30,8 @@ def create_app():
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///po_system.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # the replica sync thread and both gunicorn workers share the file
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 15}}
 
     # Supabase config
     app.config["SUPABASE_URL"] = os.getenv("SUPABASE_URL")
@@ -30,6 +40,12 @@ def create_app():
     # Init extensions
     db.init_app(app)
     CORS(app)
+    async_views.init_app(app)  # async def views also under the gevent worker
+    deadline.init_app(app)  # per-request time budget for outbound calls
+    call_trace.init_app(app)  # Server-Timing + one log line per request's data calls
+    metrics.init_app(app)  # /metrics latency histograms
+    profiler.init_app(app)  # opt-in slow-request stack sampling (/admin/profiles)
+    memwatch.init_app(app)  # per-route peak allocation, RSS watchdog (/admin/memory)
 
     # 🔽 Enable stdout logging (critical for Docker)
     logging.basicConfig(level=logging.DEBUG, format="%(levelname)s: %(message)s")
@@ -46,11 +62,28 @@ def create_app():
     app.register_blueprint(email_bp)
     app.register_blueprint(accounts_bp)
     app.register_blueprint(expediting_bp)
+    app.register_blueprint(replica_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(price_history_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profiles_bp)
+    app.register_blueprint(memory_bp)
+
+    # Local read replica (sync thread + freshness badge in base.html)
+    replica.init_app(app)
+    app.context_processor(lambda: {"replica_status": replica.status()})
+    search.init_app(app)  # FTS index over the replica, updated per sync batch
+    price_history.init_app(app)  # last-paid prices for the PO form
+    supabase_http.init_app(app)  # micro-cache reset after writes, stale badge
+    shared_cache.init_app(app)  # one cache file for all workers (reference data, aggregates)
+    change_feed.init_app(app)  # evicts cached data when Supabase rows change (replica off)
 
     # other setup...
     app.jinja_env.filters["format_date"] = format_date
     app.jinja_env.filters["nl2br"] = nl2br
     app.jinja_env.filters["accounting"] = accounting
     app.jinja_env.filters["accounting_number"] = accounting_number
+    jinja_cache.init_app(app)  # bytecode cache + precompile every template (after the filters)
     
     return app
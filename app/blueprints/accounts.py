@@ -1,74 +1,93 @@
 # app/blueprints/accounts.py
-from flask import Blueprint, render_template, request, jsonify, url_for, redirect
+from flask import Blueprint, request, jsonify, url_for, redirect, flash
 from app.supabase_client import (
-    fetch_accounts_overview,
+    iter_accounts_overview,
     update_po_accounts_fields,
     fetch_projects,
     fetch_suppliers,
 )
+from app.utils.exports import export_response
+from app.utils.streaming import RowStream, stream_page
 
 accounts_bp = Blueprint("accounts", __name__, url_prefix="/accounts")
 
 
-@accounts_bp.route("/", methods=["GET"])
-def index():
+def _as_str(x):
+    return "" if x is None else str(x).strip()
+
+
+def _truthy(x):
+    return str(x).lower() in {"1", "true", "t", "yes", "y"}
+
+
+def _is_completed(row):
     """
-    Accounts page with filters via query params:
-      - completed: 'all' | 'only' | 'exclude'  (defaults 'all')
-      - project: projectnumber string          (defaults '')
-      - supplier: supplier_name string         (defaults '')
+    Prefer 'acc_complete' if present; otherwise infer from status.
     """
-    # read filters from URL
+    if "acc_complete" in row and row.get("acc_complete") is not None:
+        return _truthy(row.get("acc_complete"))
+    status = _as_str(row.get("status")).lower()
+    # treat these statuses as 'completed' for the accounts view
+    return status in {"issued", "complete", "completed", "closed", "paid"}
+
+
+def _read_filters():
+    """(completed, project, supplier) from the query string."""
     completed = (request.args.get("completed", "all") or "all").strip().lower()
     selected_project = (request.args.get("project", "") or "").strip()
     selected_supplier = (request.args.get("supplier", "") or "").strip()
+    return completed, selected_project, selected_supplier
 
-    po_list = fetch_accounts_overview() or []
-
-    # build dropdown options from the rows you actually have
-    project_options = sorted({str(r.get("projectnumber")).strip()
-                              for r in po_list if r.get("projectnumber")})
-    supplier_options = sorted({str(r.get("supplier_name")).strip()
-                               for r in po_list if r.get("supplier_name")})
-
-    def as_str(x):
-        return "" if x is None else str(x).strip()
-
-    def truthy(x):
-        return str(x).lower() in {"1", "true", "t", "yes", "y"}
-
-    def is_completed(row):
-        """
-        Prefer 'acc_complete' if present; otherwise infer from status.
-        """
-        if "acc_complete" in row and row.get("acc_complete") is not None:
-            return truthy(row.get("acc_complete"))
-        status = as_str(row.get("status")).lower()
-        # treat these statuses as 'completed' for the accounts view
-        return status in {"issued", "complete", "completed", "closed", "paid"}
 
+def _row_filter(completed, selected_project, selected_supplier):
+    """Build the row predicate shared by the page and the export."""
     def passes_completed(row):
         if completed == "only":
-            return is_completed(row)
+            return _is_completed(row)
         if completed == "exclude":
-            return not is_completed(row)
+            return not _is_completed(row)
         return True  # 'all'
 
     def passes_project(row):
         if not selected_project:
             return True
-        return as_str(row.get("projectnumber")) == selected_project
+        return _as_str(row.get("projectnumber")) == selected_project
 
     def passes_supplier(row):
         if not selected_supplier:
             return True
-        return as_str(row.get("supplier_name")) == selected_supplier
+        return _as_str(row.get("supplier_name")) == selected_supplier
 
-    filtered = [r for r in po_list if passes_completed(r) and passes_project(r) and passes_supplier(r)]
+    return lambda r: passes_completed(r) and passes_project(r) and passes_supplier(r)
 
-    return render_template(
+
+@accounts_bp.route("/", methods=["GET"])
+def index():
+    """
+    Accounts page with filters via query params:
+      - completed: 'all' | 'only' | 'exclude'  (defaults 'all')
+      - project: projectnumber string          (defaults '')
+      - supplier: supplier_name string         (defaults '')
+    """
+    # read filters from URL
+    completed, selected_project, selected_supplier = _read_filters()
+
+    # dropdown options come from the (cached) reference lists, so the header
+    # can go out before the rows are read
+    try:
+        project_options = sorted({str(r.get("projectnumber")).strip()
+                                  for r in (fetch_projects() or []) if r and r.get("projectnumber")})
+        supplier_options = sorted({str(s).strip() for s in (fetch_suppliers() or []) if s})
+    except Exception as e:
+        flash(f"Failed to load filter options: {e}", "danger")
+        project_options, supplier_options = [], []
+
+    keep = _row_filter(completed, selected_project, selected_supplier)
+    rows = RowStream((r for r in iter_accounts_overview() if keep(r)), "accounts overview")
+
+    return stream_page(
         "accounts.html",
-        po_list=filtered,
+        po_list=rows,
         # pass filter state + options to template
         completed=completed,
         selected_project=selected_project,
@@ -78,6 +97,30 @@ def index():
     )
 
 
+EXPORT_COLUMNS = [
+    ("PO Number",         lambda r: f"{int(r['po_number']):06d}" if str(r.get("po_number") or "").isdigit() else _as_str(r.get("po_number")), "text"),
+    ("Project Number",    "projectnumber", "text"),
+    ("Supplier",          "supplier_name", "text"),
+    ("Status",            "status", "text"),
+    ("Total Value",       "total_value", "money"),
+    ("Complete",          lambda r: "Yes" if _truthy(r.get("acc_complete")) else "No", "text"),
+    ("Invoice Reference", "invoice_reference", "text"),
+]
+
+
+@accounts_bp.route("/export.<fmt>", methods=["GET"])
+def export(fmt):
+    """
+    Streamed CSV/XLSX of the accounts table with the same filters as the page.
+    """
+    keep = _row_filter(*_read_filters())
+    rows = (r for r in iter_accounts_overview() if keep(r))
+    try:
+        return export_response(fmt, "accounts", EXPORT_COLUMNS, rows, sheet_name="Accounts")
+    except ValueError:
+        return jsonify({"ok": False, "error": f"Unsupported format: {fmt}"}), 404
+
+
 
 @accounts_bp.route("/update", methods=["POST"])
 def update():
@@ -3,10 +3,9 @@
 from __future__ import annotations
 
 import math
-import requests
+import httpx
 from flask import (
     Blueprint,
-    render_template,
     request,
     flash,
     current_app,
@@ -14,16 +13,36 @@ from flask import (
 )
 
 from app.supabase_client import (
-    fetch_active_pos_from_view,
+    iter_active_pos_from_view,
     _get_supabase_auth,
     get_headers,
 )
+from app import supabase_async
+from app.services import supabase_http as _http
+from app.utils.streaming import stream_page
 
 bp = Blueprint("expediting", __name__)
 
 PO_PAGE_SIZE = 50  # rows per page
 
 
+def _page_of(rows, page: int, size: int):
+    """
+    (rows on `page`, total row count) from one pass over `rows`, holding at
+    most two pages. A page past the end gives the last page's rows.
+    """
+    wanted, last, total = [], [], 0
+    first = (page - 1) * size
+    for row in rows:
+        if total % size == 0:
+            last = []
+        last.append(row)
+        if first <= total < first + size:
+            wanted.append(row)
+        total += 1
+    return (wanted or last), total
+
+
 @bp.route("/expediting", methods=["GET"])
 def expediting():
     """
@@ -55,18 +74,17 @@ def expediting():
     selected_project = (request.args.get("project", "") or "").strip()
     selected_supplier = (request.args.get("supplier", "") or "").strip()
 
-    # ---- Fetch from Supabase view ----
+    # ---- Fetch from Supabase view (paged; only this page's rows are kept) ----
     try:
-        all_pos = fetch_active_pos_from_view(
+        po_list, total_pos = _page_of(iter_active_pos_from_view(
             projectnumber=selected_project or None,
             supplier_name=selected_supplier or None,
             status=selected_status or None,
             date_from=date_from,
             date_to=date_to,
             order_by=order_by,
-        ) or []
+        ), page, PO_PAGE_SIZE)
 
-        total_pos = len(all_pos)
         total_pages = max(1, math.ceil(total_pos / PO_PAGE_SIZE))
 
         if page > total_pages:
@@ -74,7 +92,6 @@ def expediting():
 
         start_idx0 = (page - 1) * PO_PAGE_SIZE
         end_idx0 = start_idx0 + PO_PAGE_SIZE
-        po_list = all_pos[start_idx0:end_idx0]
 
         start_index = start_idx0 + 1 if total_pos > 0 else 0
         end_index = min(end_idx0, total_pos)
@@ -105,7 +122,7 @@ def expediting():
     page_end = min(total_pages, page_start + window - 1)
     page_start = max(1, page_end - window + 1)
 
-    return render_template(
+    return stream_page(
         "expediting.html",
         po_list=po_list,
         selected_status=selected_status,
@@ -125,49 +142,23 @@ def expediting():
     )
 
 
-def _fetch_line_items_for_po(po_id: str) -> list[dict]:
-    """
-    Fetch active line items for a single purchase order.
-    """
-    base, _ = _get_supabase_auth()
-    headers = get_headers(False)
-    url = f"{base}/rest/v1/po_line_items"
-
-    params = {
-        "select": (
-            "id,po_id,description,quantity,qty_received,"
-            "exped_expected_date,exped_completed_date"
-        ),
-        "po_id": f"eq.{po_id}",
-        "active": "is.true",
-        "order": "id.asc",  # stable; adjust if you later add a line_no field
-    }
-
-    resp = requests.get(url, headers=headers, params=params, timeout=15)
-    if resp.status_code >= 400:
-        try:
-            err = resp.json()
-        except Exception:
-            err = {"body": resp.text}
-        current_app.logger.error(
-            "Supabase po_line_items error %s for po_id %s: %s",
-            resp.status_code,
-            po_id,
-            err,
-        )
-    resp.raise_for_status()
-    return resp.json() or []
+EXPEDITING_LINE_ITEM_COLUMNS = (
+    "id,po_id,description,quantity,qty_received,"
+    "exped_expected_date,exped_completed_date"
+)
 
 
 @bp.get("/expediting/<po_id>/line-items")
-def expediting_line_items(po_id: str):
+async def expediting_line_items(po_id: str):
     """
     JSON API: return line items for a single PO for the expediting page.
+    Async view (supabase_async): waits on Supabase without a blocking call.
     """
     try:
-        items = _fetch_line_items_for_po(po_id)
+        async with supabase_async.session():
+            items = await supabase_async.fetch_line_items_for_po(po_id, select=EXPEDITING_LINE_ITEM_COLUMNS)
         return jsonify(items)
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         current_app.logger.error("Failed to fetch line items for %s: %s", po_id, exc)
         return jsonify({"error": "Failed to load line items"}), 500
 
@@ -194,7 +185,7 @@ def expediting_update_line_item(item_id: str):
     headers = get_headers()  # includes JSON Content-Type
     params = {"id": f"eq.{item_id}"}
 
-    resp = requests.patch(url, headers=headers, params=params, json=payload, timeout=15)
+    resp = _http.patch(url, headers=headers, params=params, json=payload, timeout=15)
     if not resp.ok:
         try:
             err = resp.json()
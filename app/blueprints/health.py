@@ -0,0 +1,27 @@
+# app/blueprints/health.py
+from flask import Blueprint, jsonify
+
+from app.services import change_feed, shared_cache, supabase_http
+
+health_bp = Blueprint("health", __name__, url_prefix="/health")
+
+
+@health_bp.get("/supabase")
+def supabase_status():
+    """
+    JSON state of this worker's Supabase read path: circuit breaker
+    (closed / open / half_open), stale responses served, coalesced reads.
+    """
+    return jsonify(supabase_http.status())
+
+
+@health_bp.get("/cache")
+def cache_status():
+    """JSON hit/miss counters for this worker and entry count of the shared cache file."""
+    return jsonify(shared_cache.stats())
+
+
+@health_bp.get("/change-feed")
+def change_feed_status():
+    """JSON high-water marks and last poll per followed table."""
+    return jsonify({"enabled": change_feed.enabled(), "tables": change_feed.status()})
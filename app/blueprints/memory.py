@@ -0,0 +1,32 @@
+# app/blueprints/memory.py
+from flask import Blueprint, abort, jsonify, request
+
+from app.utils import memwatch
+
+memory_bp = Blueprint("memory", __name__, url_prefix="/admin/memory")
+
+
+@memory_bp.get("")
+def memory_status():
+    """
+    The answering worker's RSS, per-endpoint peak allocations and top
+    allocation sites (?limit=, default 20), plus saved watchdog reports.
+    """
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify({**memwatch.snapshot(limit), "reports": memwatch.reports()})
+
+
+@memory_bp.post("/tracemalloc")
+def start_tracemalloc():
+    """Trace allocations in every worker: ?frames=<n> (default 1) per site."""
+    frames = request.args.get("frames", default=1, type=int)
+    if frames <= 0:
+        abort(400)
+    memwatch.start_tracing(frames)
+    return jsonify({"ok": True, "frames": frames})
+
+
+@memory_bp.delete("/tracemalloc")
+def stop_tracemalloc():
+    memwatch.stop_tracing()
+    return jsonify({"ok": True})
@@ -0,0 +1,15 @@
+# app/blueprints/metrics.py
+from flask import Blueprint, Response
+
+from app.utils import metrics as _metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def metrics():
+    """Prometheus text format, summed over all gunicorn workers."""
+    if not _metrics.enabled():
+        return Response("prometheus_client is not installed\n", status=503, mimetype="text/plain")
+    body, content_type = _metrics.render_latest()
+    return Response(body, content_type=content_type)
@@ -0,0 +1,19 @@
+# app/blueprints/price_history.py
+from flask import Blueprint, request, jsonify
+
+from app.services import replica, price_history
+
+price_history_bp = Blueprint("price_history", __name__)
+
+
+@price_history_bp.route("/price-history.json", methods=["GET"])
+def lookup():
+    """
+    Last-paid unit prices for a line description, used by po_form.html as the
+    buyer types. ?description=...&supplier_id=... (supplier optional).
+    """
+    description = (request.args.get("description", "") or "").strip()
+    supplier_id = (request.args.get("supplier_id", "") or "").strip() or None
+    if not replica.enabled():
+        return jsonify({"error": "Price history unavailable (replica disabled)"}), 503
+    return jsonify(price_history.lookup(description, supplier_id=supplier_id))
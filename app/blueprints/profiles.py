@@ -0,0 +1,49 @@
+# app/blueprints/profiles.py
+from flask import Blueprint, abort, jsonify, request, send_file
+
+from app.utils import profiler
+
+profiles_bp = Blueprint("profiles", __name__, url_prefix="/admin/profiles")
+
+
+@profiles_bp.get("")
+def list_profiles():
+    """Slow-request captures, newest first, plus whether profiling is on."""
+    return jsonify({"threshold_ms": profiler.threshold_ms(), "captures": profiler.captures()})
+
+
+@profiles_bp.get("/<name>.folded")
+def download_folded(name):
+    """Folded stacks for flamegraph.pl / speedscope / inferno."""
+    path = profiler.capture_path(name, ".folded")
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=f"{name}.folded")
+
+
+@profiles_bp.get("/<name>.json")
+def download_meta(name):
+    """Request details and the Supabase call trace for one capture."""
+    path = profiler.capture_path(name, ".json")
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype="application/json")
+
+
+@profiles_bp.post("/enable")
+def enable():
+    """
+    Turn capture on for all workers: ?ms=<threshold> (default 2000) and
+    optional &minutes=<n> after which it switches itself off.
+    """
+    ms = request.args.get("ms", default=2000, type=int)
+    minutes = request.args.get("minutes", type=float)
+    if ms <= 0:
+        abort(400)
+    return jsonify({"ok": True, "flag": profiler.enable(ms, minutes)})
+
+
+@profiles_bp.post("/disable")
+def disable():
+    profiler.disable()
+    return jsonify({"ok": True, "threshold_ms": profiler.threshold_ms()})
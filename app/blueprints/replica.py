@@ -0,0 +1,25 @@
+# app/blueprints/replica.py
+from flask import Blueprint, jsonify, request
+
+from app.services import replica
+
+replica_bp = Blueprint("replica", __name__, url_prefix="/replica")
+
+
+@replica_bp.get("/status")
+def status():
+    """
+    JSON freshness of the local replica: which source reads are using and
+    how old the copy is, per table.
+    """
+    return jsonify(replica.status())
+
+
+@replica_bp.post("/sync")
+def sync_now():
+    """
+    Run one sync pass in this request (admin / after bulk edits elsewhere).
+    Body is ignored; add ?full=1 to reload every table and sweep deletes.
+    """
+    summary = replica.sync_all(force_full=request.args.get("full") == "1")
+    return jsonify({"ok": True, "summary": summary, "status": replica.status()})
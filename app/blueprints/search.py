@@ -0,0 +1,40 @@
+# app/blueprints/search.py
+from flask import Blueprint, render_template, request, jsonify
+
+from app.services import replica, search as po_search
+
+search_bp = Blueprint("search", __name__)
+
+
+def _query_args():
+    q = (request.args.get("q", "") or "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", po_search.MAX_RESULTS)), 200))
+    except ValueError:
+        limit = po_search.MAX_RESULTS
+    return q, limit
+
+
+@search_bp.route("/search", methods=["GET"])
+def search_page():
+    """
+    Search POs by line-item description, supplier, project or supplier ref.
+    Served entirely from the local FTS index (no Supabase round trip).
+    """
+    q, limit = _query_args()
+    result = po_search.search(q, limit=limit) if q else None
+    return render_template(
+        "search.html",
+        q=q,
+        result=result,
+        index_available=replica.enabled(),
+    )
+
+
+@search_bp.route("/search.json", methods=["GET"])
+def search_json():
+    """Same as /search, as JSON (for search-as-you-type)."""
+    q, limit = _query_args()
+    if not replica.enabled():
+        return jsonify({"error": "Search index unavailable (replica disabled)"}), 503
+    return jsonify(po_search.search(q, limit=limit))
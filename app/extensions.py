@@ -0,0 +1,6 @@
+# app/extensions.py
+# Extension singletons live here so modules imported by create_app()
+# (supabase_client, services, models) can use them without a circular import.
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
@@ -7,6 +7,10 @@ import requests
 import msal
 from typing import List, Optional
 
+from app.utils import call_trace, deadline as _deadline
+
+_TRACE = {"response": call_trace.hook}
+
 
 GRAPH_SCOPE = ["https://graph.microsoft.com/.default"]
 GRAPH_BASE = "https://graph.microsoft.com/v1.0"
@@ -70,7 +74,7 @@ def create_draft_with_attachment(
         "ccRecipients": format_recipients(cc_recipients),
         "importance": "Normal",
     }
-    resp = requests.post(create_url, headers=_graph_headers(token), data=json.dumps(message_payload))
+    resp = requests.post(create_url, headers=_graph_headers(token), data=json.dumps(message_payload), timeout=_deadline.clamp(30), hooks=_TRACE)
     if resp.status_code >= 300:
         raise RuntimeError(f"Create draft failed: {resp.status_code} {resp.text}")
     message = resp.json()
@@ -88,12 +92,12 @@ def create_draft_with_attachment(
         "contentType": "application/pdf",
         "contentBytes": pdf_b64,
     }
-    aresp = requests.post(attach_url, headers=_graph_headers(token), data=json.dumps(attachment_payload))
+    aresp = requests.post(attach_url, headers=_graph_headers(token), data=json.dumps(attachment_payload), timeout=_deadline.clamp(30), hooks=_TRACE)
     if aresp.status_code >= 300:
         raise RuntimeError(f"Attach failed: {aresp.status_code} {aresp.text}")
 
     # Return the final message (draft) object
     get_url = f"{GRAPH_BASE}/users/{mailbox_upn}/messages/{message_id}"
-    final = requests.get(get_url, headers=_graph_headers(token))
+    final = requests.get(get_url, headers=_graph_headers(token), timeout=_deadline.clamp(30), hooks=_TRACE)
     final.raise_for_status()
     return final.json()
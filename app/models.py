@@ -0,0 +1,79 @@
+# app/models.py
+# Local SQLite tables (SQLALCHEMY_DATABASE_URI). Supabase stays the source of truth;
+# everything here is a rebuildable copy.
+from app.extensions import db
+
+
+class ReplicaRow(db.Model):
+    """
+    One replicated Supabase row. The full PostgREST JSON lives in `data`;
+    a few columns are lifted out so lookups don't need json_extract.
+    """
+    __tablename__ = "replica_rows"
+
+    rel = db.Column(db.String(64), primary_key=True)
+    id = db.Column(db.String(64), primary_key=True)
+    po_id = db.Column(db.String(64), index=True)       # po_metadata / po_line_items
+    updated_at = db.Column(db.String(40))
+    data = db.Column(db.JSON, nullable=False)
+
+
+class ReplicaState(db.Model):
+    """
+    Per-table sync bookkeeping. The row with rel="__writes__" records (in
+    synced_at) the last time this app wrote to Supabase, so reads go live
+    until the next sync has caught up with it.
+    """
+    __tablename__ = "replica_state"
+
+    rel = db.Column(db.String(64), primary_key=True)
+    watermark_ts = db.Column(db.String(40))
+    watermark_id = db.Column(db.String(64))
+    mode = db.Column(db.String(16), default="incremental")   # incremental | full | view
+    row_count = db.Column(db.Integer, default=0)
+    sync_started_at = db.Column(db.Float)   # data is current as of this time
+    synced_at = db.Column(db.Float)         # last successful sync finished
+    swept_at = db.Column(db.Float)          # last full refresh / deletion sweep
+    generation = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+
+
+class PriceHistory(db.Model):
+    """
+    Unit prices paid, one row per active line item on a latest, non-draft PO
+    revision. Derived from replica_rows by app/services/price_history.py.
+    """
+    __tablename__ = "price_history"
+    __table_args__ = (
+        db.Index("ix_price_history_lookup", "supplier_id", "norm_desc", "paid_at"),
+        db.Index("ix_price_history_desc", "norm_desc", "paid_at"),
+    )
+
+    line_item_id = db.Column(db.String(64), primary_key=True)
+    po_id = db.Column(db.String(64), index=True, nullable=False)
+    supplier_id = db.Column(db.String(64))
+    norm_desc = db.Column(db.String(512), nullable=False)
+    description = db.Column(db.Text)
+    unit_price = db.Column(db.Float)
+    quantity = db.Column(db.Float)
+    unit = db.Column(db.String(32))
+    po_number = db.Column(db.Integer)
+    revision = db.Column(db.String(16))
+    status = db.Column(db.String(32))
+    paid_at = db.Column(db.String(40))      # purchase_orders.updated_at of that revision
+
+
+class ChangeFeedMark(db.Model):
+    """
+    High-water mark per Supabase table for app/services/change_feed.py:
+    the (updated_at, key) of the newest row already announced.
+    """
+    __tablename__ = "change_feed_marks"
+
+    rel = db.Column(db.String(64), primary_key=True)
+    mark_ts = db.Column(db.String(40))
+    mark_key = db.Column(db.JSON)           # key column values, in FEED_TABLES order
+    polled_at = db.Column(db.Float)
+    changed_at = db.Column(db.Float)        # last poll that found changes
+    unsupported = db.Column(db.Boolean, default=False)   # no updated_at column
+    last_error = db.Column(db.Text)
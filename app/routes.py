@@ -7,17 +7,21 @@ from app.supabase_client import (
     fetch_projects, 
     insert_po_bundle, 
     insert_line_items, 
+    save_line_items,
     fetch_delivery_contacts,
+    fetch_project_register_items,
     fetch_pos_latest_from_po_table,
-    fetch_active_pos_from_view,
     fetch_project_po_summary,
     fetch_last_issued_dates_any,
     fetch_accounts_overview_latest,
+    iter_active_pos_from_view,
     _get_supabase_auth, 
+    _rpc_missing,
     get_headers,
-    deactivate_po_data,
+    create_po_revision,
     )
 from app.utils.forms import parse_po_form
+from app.services import schema_registry
 from .utils.revision import get_next_revision, compute_updated_revision
 from app.utils.status_utils import (
     allowed_next_statuses, 
@@ -26,10 +30,15 @@ from app.utils.status_utils import (
     validate_po_status
     )
 from app.utils.pdf_archive import save_pdf_archive
-from weasyprint import HTML, CSS
+from app.utils.pdf_render import render_pdf
+from app.utils.exports import export_response
+from app.utils.streaming import RowStream, stream_page
+from app.utils.fanout import gather
+from app.services import supabase_http as _http
+from app.utils.filters import format_date
 from datetime import datetime, date
 from flask import current_app, render_template, request, session, flash
-from .utils.certs_table import load_certs_table
+from .utils.certs_table import certs_table_html
 from werkzeug.utils import secure_filename
 import base64, uuid, requests
 from pathlib import Path
@@ -186,22 +195,22 @@ def po_list():
             if s
         })
 
-        # Fetch the list with filters applied server-side
-        pos = fetch_active_pos_from_view(
+        # Rows are paged from the view while the page streams out
+        pos = RowStream(iter_active_pos_from_view(
             projectnumber=selected_project or None,
             supplier_name=selected_supplier or None,
             status=selected_status or None,
             date_from=date_from,
             date_to=date_to,
             order_by=order_by,
-        ) or []
+        ), "PO list")
 
     except Exception as e:
         flash(f"Failed to load POs: {e}", "danger")
         pos = []
         project_options, supplier_options = [], []
 
-    return render_template(
+    return stream_page(
         "po_list.html",
         pos=pos,
         date_from=date_from,
@@ -215,6 +224,44 @@ def po_list():
         supplier_options=supplier_options,
     )
 
+def _po_number_str(pn) -> str:
+    # same six-digit formatting as po_list.html
+    s = "" if pn is None else str(pn).strip()
+    return f"{int(s):06d}" if s.isdigit() else s
+
+PO_LIST_EXPORT_COLUMNS = [
+    ("PO Number", lambda r: _po_number_str(r.get("po_number")), "text"),
+    ("Project",   lambda r: r.get("projectnumber") or r.get("project_id"), "text"),
+    ("Supplier",  "supplier_name", "text"),
+    ("Status",    lambda r: (r.get("status") or "").capitalize(), "text"),
+    ("Revision",  "current_revision", "text"),
+    ("Date",      "last_release", "date"),
+]
+
+@main.route("/po-list/export.<fmt>")
+def po_list_export(fmt):
+    """
+    Streamed CSV/XLSX of the PO list, honouring the same query params as /po-list.
+    Rows are paged from active_po_list while the download is in progress.
+    """
+    sort = request.args.get("sort", "po_number")
+    dir_ = "asc" if (request.args.get("dir", "desc") or "desc").lower() == "asc" else "desc"
+    if sort not in {"po_number", "updated_at"}:
+        sort = "po_number"
+
+    rows = iter_active_pos_from_view(
+        projectnumber=(request.args.get("project", "") or "").strip() or None,
+        supplier_name=(request.args.get("supplier", "") or "").strip() or None,
+        status=(request.args.get("status", "") or "").strip().lower() or None,
+        date_from=request.args.get("from"),
+        date_to=request.args.get("to"),
+        order_by=f"{sort}.{dir_}",
+    )
+    try:
+        return export_response(fmt, "po_list", PO_LIST_EXPORT_COLUMNS, rows, sheet_name="PO List")
+    except ValueError:
+        return render_template("404.html"), 404
+
 @main.route("/po/<po_id>")
 def po_preview(po_id):
     from .supabase_client import fetch_po_detail
@@ -362,29 +409,17 @@ def create_po():
 
     # -------- GET: render create form --------
 
-    suppliers = suppliers_as_objects()
-    suppliers_map = {s["id"]: s["name"] for s in suppliers}
+    # independent fetches in parallel; the page costs the slowest one
+    loaded = gather({
+        "suppliers": suppliers_as_objects,
+        "items": fetch_project_register_items,   # *directly* from project_register_items
+        "delivery_contacts": fetch_delivery_contacts,
+        "delivery_addresses": fetch_delivery_addresses,
+    }, defaults={"items": []})
 
-    # Pull *directly* from project_register_items
-    base, _ = _get_supabase_auth()
-    hdr = get_headers(False)
-    items = []
-    try:
-        r = requests.get(
-            f"{base}/rest/v1/project_register_items",
-            headers=hdr,
-            params={
-                "select": "projectnumber,item_seq,line_desc",
-                "order": "projectnumber.desc,item_seq.asc",
-                "limit": 100000,
-            },
-            timeout=30,
-        )
-        r.raise_for_status()
-        items = r.json() or []
-    except Exception as e:
-        current_app.logger.warning("Failed to load project_register_items: %s", e)
-        items = []
+    suppliers = loaded["suppliers"]
+    suppliers_map = {s["id"]: s["name"] for s in suppliers}
+    items = loaded["items"]
 
     # Build dropdown "<PN>-<SEQ> - <line_desc>"
     project_items = []
@@ -401,8 +436,8 @@ def create_po():
             "option_label": f"{pn}-{seq_str} - {desc}".rstrip(" -"),
         })
 
-    delivery_addresses = fetch_delivery_addresses()
-    delivery_contacts = fetch_delivery_contacts()
+    delivery_addresses = loaded["delivery_addresses"]
+    delivery_contacts = loaded["delivery_contacts"]
 
     idempotency_key = str(uuid.uuid4())
     session['last_form_token'] = idempotency_key
@@ -457,19 +492,7 @@ def edit_po(po_id):
     # ---- PATCH helpers (kept for the post-release optional-no-bump path) ----
     def _patch_po(po_id: str, fields: dict):
         base, _ = _get_supabase_auth()
-        g = requests.get(
-            f"{base}/rest/v1/purchase_orders?id=eq.{po_id}&select=*",
-            headers=get_headers(False),
-            timeout=20
-        )
-        g.raise_for_status()
-        rows = g.json() or []
-        if not rows:
-            return {}
-
-        allowed = set(rows[0].keys()) - {"id", "created", "modified", "active"}
-        clean = {k: v for k, v in (fields or {}).items()
-                 if k in allowed and k != "idempotency_key"}
+        clean = schema_registry.clean_payload("purchase_orders", fields, exclude={"active"})
 
         if "item_seq" in clean and clean["item_seq"] is not None:
             clean["item_seq"] = _to_int(clean["item_seq"])
@@ -477,7 +500,7 @@ def edit_po(po_id):
         if not clean:
             return {}
 
-        r = requests.patch(
+        r = _http.patch(
             f"{base}/rest/v1/purchase_orders?id=eq.{po_id}&select=id",
             headers={**get_headers(), "Prefer": "return=representation"},
             json=clean,
@@ -488,23 +511,11 @@ def edit_po(po_id):
 
     def _patch_po_metadata(po_id: str, md_fields: dict):
         base, _ = _get_supabase_auth()
-        g = requests.get(
-            f"{base}/rest/v1/po_metadata?po_id=eq.{po_id}&active=is.true&select=*",
-            headers=get_headers(False),
-            timeout=20
-        )
-        g.raise_for_status()
-        rows = g.json() or []
-        if not rows:
-            return {}
-
-        allowed = set(rows[0].keys()) - {"id", "po_id", "created", "modified", "active"}
-        clean = {k: v for k, v in (md_fields or {}).items()
-                 if k in allowed and v is not None and k != "idempotency_key"}
+        clean = schema_registry.clean_payload("po_metadata", md_fields, exclude={"po_id", "active"}, drop_none=True)
         if not clean:
             return {}
 
-        r = requests.patch(
+        r = _http.patch(
             f"{base}/rest/v1/po_metadata?po_id=eq.{po_id}&active=is.true",
             headers={**get_headers(), "Prefer": "return=minimal"},
             json=clean,
@@ -515,35 +526,6 @@ def edit_po(po_id):
             r.raise_for_status()
         return {}
 
-    def _replace_line_items(po_id: str, items: list):
-        base, _ = _get_supabase_auth()
-        rdel = requests.delete(
-            f"{base}/rest/v1/po_line_items?po_id=eq.{po_id}",
-            headers={**get_headers(), "Prefer": "return=minimal"},
-            timeout=30
-        )
-        if rdel.status_code not in (200, 204):
-            current_app.logger.error("DELETE po_line_items failed (%s): %s", rdel.status_code, rdel.text)
-            rdel.raise_for_status()
-
-        if items:
-            payload = []
-            for it in items:
-                row = dict(it)
-                for k in ("id", "created", "modified", "active"):
-                    row.pop(k, None)
-                row["po_id"] = po_id
-                payload.append(row)
-
-            rins = requests.post(
-                f"{base}/rest/v1/po_line_items",
-                headers={**get_headers(), "Prefer": "return=representation"},
-                json=payload,
-                timeout=30
-            )
-            rins.raise_for_status()
-        return True
-
     def _is_numeric_ge_1(rev) -> bool:
         try:
             return int(str(rev).strip()) >= 1
@@ -654,10 +636,7 @@ def edit_po(po_id):
                 next_rev = get_next_revision(str(current_rev).strip())
                 target_rev = _coerce_rev_on_leaving_draft(next_rev, current_status, new_status)
 
-                # Deactivate old snapshot
-                deactivate_po_data(po_id)
-
-                # New INSERT snapshot
+                # New snapshot (old one is deactivated in the same transaction)
                 metadata["project_id"]              = metadata.get("project_id") or po.get("project_id")
                 metadata["supplier_id"]             = po["supplier_id"]           # keep same supplier in new rev
                 metadata["po_number"]               = po["po_number"]             # keep same number
@@ -674,10 +653,7 @@ def edit_po(po_id):
                     if po.get("last_release"):
                         metadata["last_release"] = po["last_release"]
 
-                new_po_id = insert_po_bundle(metadata)
-                for item in line_items:
-                    item["po_id"] = new_po_id
-                insert_line_items(line_items)
+                new_po_id = create_po_revision(po_id, metadata, line_items)
 
                 flash(f"PO revision created (rev {target_rev}).", "success")
                 return redirect(url_for("main.po_preview", po_id=new_po_id))
@@ -706,7 +682,7 @@ def edit_po(po_id):
 
                 _patch_po(po_id, po_fields)
                 _patch_po_metadata(po_id, md_fields)
-                _replace_line_items(po_id, line_items)
+                save_line_items(po_id, line_items)
 
                 flash("Changes saved (no revision bump).", "success")
                 return redirect(url_for("main.po_preview", po_id=po_id))
@@ -716,8 +692,6 @@ def edit_po(po_id):
                          if bump_flag else compute_updated_revision(current_rev, current_status, new_status)
             target_rev = _coerce_rev_on_leaving_draft(target_rev, current_status, new_status)
 
-            deactivate_po_data(po_id)
-
             metadata["project_id"]              = metadata.get("project_id") or po.get("project_id")
             metadata["supplier_id"]             = po["supplier_id"]
             metadata["po_number"]               = po["po_number"]
@@ -734,10 +708,7 @@ def edit_po(po_id):
                 if po.get("last_release"):
                     metadata["last_release"] = po["last_release"]
 
-            new_po_id = insert_po_bundle(metadata)
-            for item in line_items:
-                item["po_id"] = new_po_id
-            insert_line_items(line_items)
+            new_po_id = create_po_revision(po_id, metadata, line_items)
 
             flash(f"PO revision created successfully (rev {target_rev}).", "success")
             return redirect(url_for("main.po_preview", po_id=new_po_id))
@@ -749,12 +720,21 @@ def edit_po(po_id):
             return redirect(url_for("main.edit_po", po_id=po_id))
 
     # ---------------- GET: render edit form ----------------
-    po = fetch_po_detail(po_id)
+    # independent fetches in parallel; the page costs the slowest one
+    loaded = gather({
+        "po": lambda: fetch_po_detail(po_id),
+        "suppliers": suppliers_as_objects,
+        "items": fetch_project_register_items,
+        "delivery_contacts": fetch_delivery_contacts,
+        "delivery_addresses": fetch_delivery_addresses,
+    }, defaults={"items": []})
+
+    po = loaded["po"]
     if not po:
         return render_template("404.html"), 404
 
     po_metadata = _active_po_metadata(po)
-    suppliers = suppliers_as_objects()
+    suppliers = loaded["suppliers"]
     suppliers_map = {s["id"]: s["name"] for s in suppliers}
 
     delivery_contact = po.get("delivery_contact")
@@ -778,26 +758,7 @@ def edit_po(po_id):
     delivery_contact_id = delivery_contact.get("id") if isinstance(delivery_contact, dict) else None
 
     # --- Project / Item options (same as create) + fallback for current selection ---
-    base, _ = _get_supabase_auth()
-    hdr = get_headers(False)
-
-    items = []
-    try:
-        r = requests.get(
-            f"{base}/rest/v1/project_register_items",
-            headers=hdr,
-            params={
-                "select": "projectnumber,item_seq,line_desc",
-                "order": "projectnumber.desc,item_seq.asc",
-                "limit": 100000,
-            },
-            timeout=30,
-        )
-        r.raise_for_status()
-        items = r.json() or []
-    except Exception as e:
-        current_app.logger.warning("edit_po: failed to load project_register_items: %s", e)
-        items = []
+    items = loaded["items"]
 
     project_items = []
     for row in items:
@@ -874,27 +835,18 @@ def edit_po(po_id):
         project_items=project_items,
         suppliers=suppliers,
         suppliers_map=suppliers_map,
-        delivery_contacts=fetch_delivery_contacts(),
-        delivery_addresses=fetch_delivery_addresses(),
+        delivery_contacts=loaded["delivery_contacts"],
+        delivery_addresses=loaded["delivery_addresses"],
         idempotency_key=idempotency_key,
     )
 
 
-@main.route("/po/<po_id>/pdf")
-def po_pdf(po_id):
-    from .supabase_client import fetch_po_detail
-
-    current_app.logger.info(f"📄 Route hit: PO PDF for {po_id}")
-
-    try:
-        po = fetch_po_detail(po_id)
-        sort_po_line_items(po)
-        if not po:
-            return render_template("404.html"), 404
-    except Exception as e:
-        flash(f"Failed to load PO: {e}", "danger")
-        return redirect(url_for("main.po_list"))
-
+def po_pdf_html(po: dict, include_certs_table: bool = True) -> str:
+    """
+    HTML for po_pdf.html: line totals, VAT, the embedded logo and the certs
+    table (pre-rendered once per certs_table.json version). Shared by the PDF
+    routes and bench/pdf.py.
+    """
     # Compute totals
     net_total = 0
     for item in po.get("line_items", []):
@@ -910,27 +862,40 @@ def po_pdf(po_id):
     with open(logo_path, "rb") as img_file:
         logo_base64 = base64.b64encode(img_file.read()).decode("utf-8")
 
-    certs_table = load_certs_table()
-
-    # Render HTML
-    now = datetime.now()
-    html = render_template(
+    return render_template(
         "po_pdf.html",
         po=po,
         net_total=net_total,
         vat_total=vat_total,
         grand_total=grand_total,
-        now=now,
+        now=datetime.now(),
         logo_base64=logo_base64,
         pdf=True,
-        certs_table=certs_table,
-        include_certs_table=True
+        include_certs_table=include_certs_table,
+        certs_table_html=certs_table_html() if include_certs_table else "",
     )
 
+
+@main.route("/po/<po_id>/pdf")
+def po_pdf(po_id):
+    from .supabase_client import fetch_po_detail
+
+    current_app.logger.info(f"📄 Route hit: PO PDF for {po_id}")
+
+    try:
+        po = fetch_po_detail(po_id)
+        sort_po_line_items(po)
+        if not po:
+            return render_template("404.html"), 404
+    except Exception as e:
+        flash(f"Failed to load PO: {e}", "danger")
+        return redirect(url_for("main.po_list"))
+
+    # Render HTML
+    html = po_pdf_html(po)
+
     # Generate PDF (bytes in memory)
-    pdf_bytes = HTML(string=html, base_url=request.root_url).write_pdf(
-        stylesheets=[CSS(filename="app/static/css/pdf_style.css")]
-    )
+    pdf_bytes = render_pdf(html, base_url=request.root_url)
 
     # ==== NEW: Save an archive copy to network/share ====
     # Build filename: <ponumber>-<revision>.pdf
@@ -1011,39 +976,8 @@ def po_view_pdf(po_id):
 
     # --- If no archive, generate a fresh PDF (same as po_pdf, but no email) ---
     if pdf_bytes is None:
-        net_total = 0
-        for item in po.get("line_items", []):
-            qty = item.get("quantity") or 0
-            price = item.get("unit_price") or 0.0
-            item["total"] = qty * price
-            net_total += item["total"]
-        vat_total = net_total * 0.2
-        grand_total = net_total + vat_total
-
-        # Embed logo as base64
-        logo_path = Path("app/static/img/PSS_Standard_RGB.png")
-        with open(logo_path, "rb") as img_file:
-            logo_base64 = base64.b64encode(img_file.read()).decode("utf-8")
-
-        certs_table = load_certs_table()
-
-        now = datetime.now()
-        html = render_template(
-            "po_pdf.html",
-            po=po,
-            net_total=net_total,
-            vat_total=vat_total,
-            grand_total=grand_total,
-            now=now,
-            logo_base64=logo_base64,
-            pdf=True,
-            certs_table=certs_table,
-            include_certs_table=True,
-        )
-
-        pdf_bytes = HTML(string=html, base_url=request.root_url).write_pdf(
-            stylesheets=[CSS(filename="app/static/css/pdf_style.css")]
-        )
+        html = po_pdf_html(po)
+        pdf_bytes = render_pdf(html, base_url=request.root_url)
 
         # Save an archive copy (we already know filename/location)
         try:
@@ -1142,7 +1076,7 @@ def _sb_headers() -> dict:
 
 def _get_po(po_id: str) -> dict:
     url = f"{_sb_base()}/rest/v1/purchase_orders?id=eq.{po_id}&select=*"
-    r = requests.get(url, headers=_sb_headers(), timeout=20)
+    r = _http.get(url, headers=_sb_headers(), timeout=20, fresh=True)
     r.raise_for_status()
     rows = r.json()
     if not rows:
@@ -1151,18 +1085,35 @@ def _get_po(po_id: str) -> dict:
 
 def _insert_po(row: dict) -> dict:
     url = f"{_sb_base()}/rest/v1/purchase_orders"
-    r = requests.post(url, headers=_sb_headers(), json=row, timeout=30)
+    r = _http.post(url, headers=_sb_headers(), json=row, timeout=30)
     r.raise_for_status()
     return r.json()[0]
 
 def _clone_line_items(from_po_id: str, to_po_id: str) -> int:
-    """Copy all line items from one PO to another. Adjust field names if needed."""
+    """
+    Copy all line items from one PO to another inside the database
+    (rpc/clone_po_line_items, sql/po_revision_functions.sql); only the row
+    count comes back. Falls back to copying through Flask if the function
+    isn't installed.
+    """
     base = _sb_base()
     hdr = _sb_headers()
 
+    rpc = _http.post(
+        f"{base}/rest/v1/rpc/clone_po_line_items",
+        headers=hdr,
+        json={"p_from_po_id": from_po_id, "p_to_po_id": to_po_id},
+        timeout=30,
+    )
+    if not _rpc_missing(rpc):
+        rpc.raise_for_status()
+        return int(rpc.json() or 0)
+
+    current_app.logger.warning("rpc/clone_po_line_items not installed; cloning line items via the API")
+
     # pull existing items
     get_url = f"{base}/rest/v1/po_line_items?po_id=eq.{from_po_id}&select=*"
-    gi = requests.get(get_url, headers=hdr, timeout=30)
+    gi = _http.get(get_url, headers=hdr, timeout=30, fresh=True)
     gi.raise_for_status()
     items = gi.json()
 
@@ -1177,7 +1128,7 @@ def _clone_line_items(from_po_id: str, to_po_id: str) -> int:
         payload.append(clean)
 
     post_url = f"{base}/rest/v1/po_line_items"
-    pi = requests.post(post_url, headers=hdr, json=payload, timeout=30)
+    pi = _http.post(post_url, headers=hdr, json=payload, timeout=30)
     pi.raise_for_status()
     return len(payload)
 
@@ -1219,10 +1170,10 @@ def advance_revision(po_id):
         return redirect(url_for("main.edit_po", po_id=po_id))
 
 
-@main.route("/spend-report")
-def spend_report():
-
-
+def _build_spend_report() -> dict:
+    """
+    Rolling 12-month spend pivot (project x month), shared by the page and its export.
+    """
     # ---- Rolling 12 months (chronological; current month last) ----
     tz = ZoneInfo("Europe/London")
     now_local = datetime.now(tz).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -1236,9 +1187,6 @@ def spend_report():
             yy -= 1
         months.append(f"{yy:04d}-{mm:02d}-01")
     months = sorted(months)  # ensures current month is last
-    first_month_start = months[0]
-    next_month_year, next_month = (y + 1, 1) if m == 12 else (y, m + 1)
-    next_month_start = f"{next_month_year:04d}-{next_month:02d}-01"
 
     # ---- Build month boundaries for linking (from / to) ----
     def _next_month_key(mkey: str) -> str:
@@ -1292,19 +1240,46 @@ def spend_report():
             col_totals[m] += spends.get(m, 0.0)
 
     # ---- Natural sort by project number ----
-    def _natural_key(s: str):
-        return [int(t) if t.isdigit() else t.lower() for t in re.split(r"(\d+)", s or "")]
     project_order = sorted(data.keys(), key=_natural_key)
 
-    return render_template(
-        "spend_report.html",
-        months=months,
-        data=data,
-        project_order=project_order,
-        row_totals=row_totals,
-        col_totals=col_totals,
-        grand_total=grand_total,
-        month_from=month_from,   # <-- added
-        month_to=month_to        # <-- added
-    )
+    return {
+        "months": months,
+        "data": data,
+        "project_order": project_order,
+        "row_totals": row_totals,
+        "col_totals": col_totals,
+        "grand_total": grand_total,
+        "month_from": month_from,
+        "month_to": month_to,
+    }
+
+
+@main.route("/spend-report")
+def spend_report():
+    return render_template("spend_report.html", **_build_spend_report())
+
+
+@main.route("/spend-report/export.<fmt>")
+def spend_report_export(fmt):
+    """
+    CSV/XLSX of the spend pivot: one row per project, one column per month, plus totals.
+    """
+    report = _build_spend_report()
+    months = report["months"]
+
+    columns = [("Project", "project", "text")]
+    columns += [(format_date(m, "%b %Y"), m, "money") for m in months]
+    columns += [("Total", "total", "money")]
+
+    def rows():
+        for project in report["project_order"]:
+            spends = report["data"][project]
+            yield {"project": project, **{m: spends.get(m, 0.0) for m in months},
+                   "total": report["row_totals"][project]}
+        yield {"project": "Total", **report["col_totals"], "total": report["grand_total"]}
+
+    try:
+        return export_response(fmt, "spend_report", columns, rows(), sheet_name="Spend Report")
+    except ValueError:
+        return render_template("404.html"), 404
 
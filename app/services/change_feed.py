@@ -0,0 +1,269 @@
+# app/services/change_feed.py
+"""
+Change feed for Supabase tables that other tools also write to.
+
+A background thread polls each table in FEED_TABLES for rows whose
+(updated_at, key) is past the stored high-water mark (ChangeFeedMark), asking
+only for the key columns. Each batch is announced to listeners as
+fn(rel, rows); by default that bumps the shared-cache namespaces derived from
+the table (dashboard aggregates included) and drops micro-cached reads, so
+cached data can use long TTLs and still follow edits made outside this app.
+
+- The first poll of a table only records the current newest row (or the
+  epoch, if it is empty).
+- Deletes don't touch updated_at and aren't seen here; TTLs cover them.
+- The local replica (REPLICA_ENABLED) already announces the same changes
+  while it syncs, so by default the feed only runs when the replica is off.
+  CHANGE_FEED_ENABLED=1/0 forces it on/off; CHANGE_FEED_INTERVAL_SECONDS
+  (default 15) sets the poll interval.
+- One worker polls at a time (file lock in instance/).
+
+Sources are pluggable: poll_once(source=SqliteSource("standin.db")) runs the
+same logic against a local SQLite stand-in with the same tables, e.g. in a
+test or a dry run.
+"""
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import ChangeFeedMark
+
+FEED_TABLES: Dict[str, tuple] = {
+    "purchase_orders":        ("id",),
+    "po_metadata":            ("id",),
+    "po_line_items":          ("id",),
+    "suppliers":              ("id",),
+    "delivery_contacts":      ("id",),
+    "project_register_items": ("projectnumber", "item_seq"),
+}
+TS_COLUMN = "updated_at"
+EPOCH = "1970-01-01T00:00:00+00:00"   # mark for a table that was empty when first polled
+PAGE_SIZE = 1000
+
+_listeners: List[Callable] = []
+_thread: Optional[threading.Thread] = None
+
+
+def on_change(fn: Callable) -> Callable:
+    """Register fn(rel, rows); rows carry the key columns and updated_at."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+    return fn
+
+
+def _emit(rel: str, rows: List[dict]) -> None:
+    for fn in _listeners:
+        try:
+            fn(rel, rows)
+        except Exception as e:
+            logging.exception(f"change_feed listener failed for {rel}: {e}")
+
+
+# ------------------------------
+# Sources
+# ------------------------------
+
+class UnsupportedTable(Exception):
+    """The table has no updated_at column to follow."""
+
+
+class PostgrestSource:
+    """Supabase via PostgREST (keyset paging on updated_at, then key)."""
+
+    def _get(self, rel: str, params):
+        from app.services import supabase_http
+        from app.supabase_client import _get_supabase_auth, get_headers
+        base, _ = _get_supabase_auth()
+        resp = supabase_http.get(f"{base}/rest/v1/{rel}", headers=get_headers(False),
+                                 params=params, timeout=30, fresh=True)
+        if resp.status_code == 400 and TS_COLUMN in resp.text:
+            raise UnsupportedTable(rel)
+        resp.raise_for_status()
+        return resp.json() or []
+
+    def latest(self, rel: str, keys: Sequence[str]) -> Optional[dict]:
+        order = ",".join([f"{TS_COLUMN}.desc.nullslast"] + [f"{k}.desc" for k in keys])
+        rows = self._get(rel, [("select", ",".join((*keys, TS_COLUMN))), ("order", order), ("limit", "1")])
+        return rows[0] if rows and rows[0].get(TS_COLUMN) else None
+
+    def changes(self, rel: str, keys: Sequence[str], mark_ts: str, mark_key: Optional[Sequence],
+                limit: int) -> List[dict]:
+        # (ts, k1, k2...) > (mark_ts, m1, m2...), spelled out for PostgREST
+        terms = [f'{TS_COLUMN}.gt."{mark_ts}"']
+        for i, k in enumerate(keys if mark_key else ()):
+            conds = [f'{TS_COLUMN}.eq."{mark_ts}"']
+            conds += [f'{keys[j]}.eq."{mark_key[j]}"' for j in range(i)]
+            conds.append(f'{k}.gt."{mark_key[i]}"')
+            terms.append(f"and({','.join(conds)})")
+        order = ",".join([f"{TS_COLUMN}.asc"] + [f"{k}.asc" for k in keys])
+        return self._get(rel, [
+            ("select", ",".join((*keys, TS_COLUMN))),
+            ("or", f"({','.join(terms)})"),
+            ("order", order),
+            ("limit", str(limit)),
+        ])
+
+
+class SqliteSource:
+    """Local stand-in: a SQLite file with tables named like the Supabase ones."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _rows(self, sql: str, args=()) -> List[dict]:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(r) for r in conn.execute(sql, args)]
+        except sqlite3.OperationalError as e:
+            if TS_COLUMN in str(e):
+                raise UnsupportedTable(str(e))
+            raise
+        finally:
+            conn.close()
+
+    def latest(self, rel: str, keys: Sequence[str]) -> Optional[dict]:
+        cols = ", ".join((*keys, TS_COLUMN))
+        order = ", ".join([f"{TS_COLUMN} DESC"] + [f"{k} DESC" for k in keys])
+        rows = self._rows(f"SELECT {cols} FROM {rel} WHERE {TS_COLUMN} IS NOT NULL ORDER BY {order} LIMIT 1")
+        return rows[0] if rows else None
+
+    def changes(self, rel: str, keys: Sequence[str], mark_ts: str, mark_key: Optional[Sequence],
+                limit: int) -> List[dict]:
+        cols = ", ".join((*keys, TS_COLUMN))
+        tup = ", ".join((TS_COLUMN, *keys))
+        if mark_key:
+            where, args = f"({tup}) > ({', '.join('?' * (len(keys) + 1))})", (mark_ts, *mark_key)
+        else:
+            where, args = f"{TS_COLUMN} > ?", (mark_ts,)
+        return self._rows(f"SELECT {cols} FROM {rel} WHERE {where} ORDER BY {tup} LIMIT ?", (*args, limit))
+
+
+# ------------------------------
+# Polling
+# ------------------------------
+
+def _poll_table(rel: str, source, now: float) -> int:
+    keys = FEED_TABLES[rel]
+    mark = db.session.get(ChangeFeedMark, rel) or ChangeFeedMark(rel=rel)
+    if mark.unsupported:
+        return 0
+    mark.polled_at = now
+    changed = 0
+    try:
+        if not mark.mark_ts:
+            newest = source.latest(rel, keys)
+            if newest:
+                mark.mark_ts, mark.mark_key = newest[TS_COLUMN], [newest[k] for k in keys]
+            else:
+                mark.mark_ts, mark.mark_key = EPOCH, None
+        else:
+            while True:
+                rows = source.changes(rel, keys, mark.mark_ts, mark.mark_key, PAGE_SIZE)
+                if not rows:
+                    break
+                _emit(rel, rows)
+                changed += len(rows)
+                last = rows[-1]
+                mark.mark_ts, mark.mark_key = last[TS_COLUMN], [last[k] for k in keys]
+                if len(rows) < PAGE_SIZE:
+                    break
+        if changed:
+            mark.changed_at = now
+        mark.last_error = None
+    except UnsupportedTable:
+        logging.info(f"change_feed: {rel} has no {TS_COLUMN}; not followed")
+        mark.unsupported = True
+    except Exception as e:
+        mark.last_error = str(e)[:1000]
+        logging.warning(f"change_feed: polling {rel} failed: {e}")
+    db.session.merge(mark)
+    db.session.commit()
+    return changed
+
+
+def poll_once(source=None) -> Dict[str, object]:
+    """
+    One pass over FEED_TABLES; returns {rel: rows announced}, or
+    {"skipped": True} if another worker is polling.
+    """
+    source = source or PostgrestSource()
+    lock_path = Path(current_app.instance_path) / "change_feed.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return {"skipped": True}
+        now = time.time()
+        return {rel: _poll_table(rel, source, now) for rel in FEED_TABLES}
+
+
+def enabled() -> bool:
+    flag = os.environ.get("CHANGE_FEED_ENABLED", "auto").lower()
+    if flag == "auto":
+        from app.services import replica
+        return not replica.enabled()
+    return flag in {"1", "true", "yes"}
+
+
+def status() -> List[dict]:
+    return [
+        {
+            "rel": m.rel,
+            "mark_ts": m.mark_ts,
+            "polled_at": m.polled_at,
+            "changed_at": m.changed_at,
+            "unsupported": bool(m.unsupported),
+            "last_error": m.last_error,
+        }
+        for m in db.session.query(ChangeFeedMark).order_by(ChangeFeedMark.rel)
+    ]
+
+
+def _evict(rel: str, rows: List[dict]) -> None:
+    from app.services import shared_cache, supabase_http
+    shared_cache.invalidate_table(rel)
+    supabase_http.forget()
+    logging.info(f"change_feed: {len(rows)} changed row(s) in {rel}; caches invalidated")
+
+
+def start_thread(app) -> None:
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    try:
+        interval = float(os.environ.get("CHANGE_FEED_INTERVAL_SECONDS", "15"))
+    except ValueError:
+        interval = 15.0
+
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    poll_once()
+            except Exception as e:
+                logging.exception(f"change_feed poll failed: {e}")
+            time.sleep(interval)
+
+    _thread = threading.Thread(target=_loop, name="change-feed", daemon=True)
+    _thread.start()
+
+
+def init_app(app) -> None:
+    """Create the marks table, register the cache evictor, start polling if enabled."""
+    with app.app_context():
+        db.create_all()
+    on_change(_evict)
+    if enabled() and not app.testing:
+        start_thread(app)
@@ -0,0 +1,203 @@
+# app/services/price_history.py
+"""
+"What did we last pay?" index for the PO form.
+
+price_history (app/models.py) holds one row per active line item on the
+latest revision of every non-draft, non-cancelled PO, keyed for lookup by
+(supplier_id, normalised description). It is derived from replica_rows and
+kept current through replica.on_change(), like the search index.
+
+lookup() is two indexed range scans on local SQLite, so the form can call it
+per keystroke without touching po_line_items in Supabase.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, delete, func, select, text
+
+from app.extensions import db
+from app.models import PriceHistory
+from app.services import replica
+
+CHUNK = 500
+PAID_STATUSES = ("approved", "issued", "complete")
+MIN_QUERY_LEN = 3
+
+_LINES_SQL = """
+SELECT li.id                                      AS line_item_id,
+       po.id                                      AS po_id,
+       json_extract(po.data, '$.supplier_id')     AS supplier_id,
+       json_extract(li.data, '$.description')     AS description,
+       json_extract(li.data, '$.unit_price')      AS unit_price,
+       json_extract(li.data, '$.quantity')        AS quantity,
+       json_extract(li.data, '$.unit')            AS unit,
+       json_extract(po.data, '$.po_number')       AS po_number,
+       json_extract(po.data, '$.current_revision') AS revision,
+       json_extract(po.data, '$.status')          AS status,
+       po.updated_at                              AS paid_at
+FROM replica_rows po
+JOIN replica_rows m ON m.rel = 'po_metadata' AND m.po_id = po.id
+                   AND json_extract(m.data, '$.active') IN (1, 'true')
+JOIN replica_rows li ON li.rel = 'po_line_items' AND li.po_id = po.id
+                    AND json_extract(li.data, '$.active') IN (1, 'true')
+WHERE po.rel = 'purchase_orders' AND po.id IN :ids
+  AND lower(json_extract(po.data, '$.status')) IN :statuses
+"""
+
+_NORM_RE = re.compile(r"[^0-9a-z./]+")
+
+
+def normalize_description(desc) -> str:
+    """Lowercase, punctuation/whitespace collapsed: 'M20 x 100  Bolt,' -> 'm20 x 100 bolt'."""
+    return _NORM_RE.sub(" ", str(desc or "").lower()).strip(" ./")[:512]
+
+
+def _to_float(v) -> Optional[float]:
+    try:
+        return float(str(v).replace(",", "")) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(v) -> Optional[int]:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# ------------------------------
+# Index maintenance
+# ------------------------------
+
+def init_app(app) -> None:
+    """Create price_history, build it if empty, and follow replica changes."""
+    replica.on_change(_on_replica_change)
+    with app.app_context():
+        PriceHistory.__table__.create(db.engine, checkfirst=True)
+        if db.session.scalar(select(func.count()).select_from(PriceHistory)) == 0:
+            rebuild()
+
+
+def reindex_pos(po_ids: Iterable[str]) -> None:
+    """Replace the price rows for these PO ids (caller commits)."""
+    ids = sorted({str(p) for p in po_ids if p})
+    stmt = text(_LINES_SQL).bindparams(
+        bindparam("ids", expanding=True), bindparam("statuses", expanding=True)
+    )
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        db.session.execute(delete(PriceHistory).where(PriceHistory.po_id.in_(chunk)))
+        rows = []
+        for r in db.session.execute(stmt, {"ids": chunk, "statuses": list(PAID_STATUSES)}).mappings():
+            norm = normalize_description(r["description"])
+            if not norm:
+                continue
+            rows.append({
+                "line_item_id": r["line_item_id"],
+                "po_id": r["po_id"],
+                "supplier_id": None if r["supplier_id"] is None else str(r["supplier_id"]),
+                "norm_desc": norm,
+                "description": r["description"],
+                "unit_price": _to_float(r["unit_price"]),
+                "quantity": _to_float(r["quantity"]),
+                "unit": r["unit"],
+                "po_number": _to_int(r["po_number"]),
+                "revision": None if r["revision"] is None else str(r["revision"]),
+                "status": r["status"],
+                "paid_at": r["paid_at"],
+            })
+        if rows:
+            db.session.execute(PriceHistory.__table__.insert(), rows)
+
+
+def rebuild() -> int:
+    """Re-derive the whole index from the replica. Returns rows indexed."""
+    t0 = time.perf_counter()
+    db.session.execute(delete(PriceHistory))
+    ids = list(db.session.execute(
+        text("SELECT id FROM replica_rows WHERE rel = 'purchase_orders'")
+    ).scalars())
+    reindex_pos(ids)
+    db.session.commit()
+    count = db.session.scalar(select(func.count()).select_from(PriceHistory))
+    logging.info(f"Price history rebuilt: {count} lines in {time.perf_counter() - t0:.2f}s")
+    return count
+
+
+def _on_replica_change(rel: str, rows: List[dict], deleted: bool = False) -> None:
+    po_ids = replica.affected_po_ids(rel, rows)
+    if po_ids:
+        reindex_pos(po_ids)
+
+
+# ------------------------------
+# Lookup
+# ------------------------------
+
+_COLUMNS = """
+    p.description, p.unit_price, p.quantity, p.unit, p.po_id, p.po_number,
+    p.revision, p.status, p.paid_at, p.supplier_id,
+    json_extract(s.data, '$.name') AS supplier_name
+"""
+
+_EXACT_SQL = f"""
+SELECT {_COLUMNS}
+FROM price_history p
+LEFT JOIN replica_rows s ON s.rel = 'suppliers' AND s.id = p.supplier_id
+WHERE p.norm_desc = :norm {{supplier}}
+ORDER BY p.paid_at DESC
+LIMIT :limit
+"""
+
+# Other descriptions starting with what's been typed: latest price of each.
+_PREFIX_SQL = f"""
+SELECT {_COLUMNS}, MAX(p.paid_at) AS latest
+FROM price_history p
+LEFT JOIN replica_rows s ON s.rel = 'suppliers' AND s.id = p.supplier_id
+WHERE p.norm_desc > :norm AND p.norm_desc < :norm_hi {{supplier}}
+GROUP BY p.norm_desc, p.supplier_id
+ORDER BY latest DESC
+LIMIT :limit
+"""
+
+
+def _as_dict(r) -> dict:
+    return {
+        "description": r["description"],
+        "unit_price": r["unit_price"],
+        "quantity": r["quantity"],
+        "unit": r["unit"],
+        "po_id": r["po_id"],
+        "po_number": r["po_number"],
+        "revision": r["revision"],
+        "status": r["status"],
+        "paid_at": r["paid_at"],
+        "supplier_id": r["supplier_id"],
+        "supplier_name": r["supplier_name"],
+    }
+
+
+def lookup(description: str, supplier_id: Optional[str] = None, limit: int = 5) -> Dict:
+    """
+    Recent prices for `description` (normalised) from `supplier_id` (or any
+    supplier when None). Returns {"description", "last_paid": [...newest
+    first], "similar": [...latest per matching description], "took_ms"}.
+    """
+    t0 = time.perf_counter()
+    norm = normalize_description(description)
+    out = {"description": norm, "last_paid": [], "similar": []}
+    if len(norm) >= MIN_QUERY_LEN:
+        where = "AND p.supplier_id = :supplier_id" if supplier_id else ""
+        params = {"norm": norm, "norm_hi": norm + "\uffff", "limit": int(limit),
+                  "supplier_id": str(supplier_id) if supplier_id else None}
+        out["last_paid"] = [_as_dict(r) for r in db.session.execute(
+            text(_EXACT_SQL.format(supplier=where)), params).mappings()]
+        out["similar"] = [_as_dict(r) for r in db.session.execute(
+            text(_PREFIX_SQL.format(supplier=where)), params).mappings()]
+    out["took_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return out
@@ -0,0 +1,658 @@
+# app/services/replica.py
+"""
+Local SQLite read replica of the Supabase tables the pages read most.
+
+- sync_all() pulls rows incrementally by an (updated_at, id) watermark and
+  upserts them into replica_rows (see app/models.py). Tables without a usable
+  updated_at column drop to "full" mode and are reloaded on a slower timer.
+  Deletes are invisible to a watermark, so incremental tables also get an
+  id sweep on the same timer.
+- The views the list pages read (VIEWS: active_po_list, accounts_overview)
+  are copied row for row rather than rebuilt here, so the local rows are
+  whatever the view's SQL says. A view is reloaded whole when one of its
+  base tables changed in the same sync or the app wrote since its last
+  reload, and otherwise on the full-refresh timer.
+- The read helpers below (active_pos, accounts_overview, po_detail, ...) mirror
+  the supabase_client fetchers they stand in for. supabase_client only calls
+  them when serving() says the copy is fresh; a helper returning None means
+  "not in the replica, go live".
+
+Controlled by env:
+  - REPLICA_ENABLED                  ("1" runs the background sync; default on)
+  - REPLICA_READS                    ("1" serves reads locally; default on)
+  - REPLICA_SYNC_INTERVAL_SECONDS    (default 30)
+  - REPLICA_MAX_STALENESS_SECONDS    (no successful sync for this long -> live; default 300)
+  - REPLICA_FULL_REFRESH_SECONDS     (full-mode reloads + deletion sweeps; default 600)
+Any request can force live reads with ?live=1.
+"""
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+from app.models import ReplicaRow, ReplicaState
+
+# rel -> key columns (a single "id" key allows keyset paging on the watermark)
+TABLES: Dict[str, tuple] = {
+    "purchase_orders":        ("id",),
+    "po_metadata":            ("id",),
+    "po_line_items":          ("id",),
+    "suppliers":              ("id",),
+    "delivery_contacts":      ("id",),
+    "project_register_items": ("projectnumber", "item_seq"),
+    # views last: sync_all() reloads them after their base tables
+    "active_po_list":         ("id",),
+    "accounts_overview":      ("id",),
+}
+# view -> base tables whose changes can alter its rows
+VIEWS: Dict[str, tuple] = {
+    "active_po_list":    ("purchase_orders", "po_metadata", "suppliers"),
+    "accounts_overview": ("purchase_orders", "po_metadata", "suppliers", "po_line_items"),
+}
+WATERMARK_COLUMN = "updated_at"
+WRITES_KEY = "__writes__"
+PAGE_SIZE = 1000
+UPSERT_BATCH = 500
+
+# Small tables decoded once per sync generation and kept in-process;
+# po_line_items is always read per PO.
+_CACHED_RELS = {"purchase_orders", "po_metadata", "suppliers", "delivery_contacts", "project_register_items",
+                "active_po_list", "accounts_overview"}
+_cache: Dict[str, tuple] = {}          # rel -> (generation, rows)
+_cache_lock = threading.Lock()
+_wake = threading.Event()
+_thread: Optional[threading.Thread] = None
+_listeners: List[Callable] = []
+
+
+def _env_flag(name: str, default: str = "1") -> bool:
+    return os.environ.get(name, default).lower() in {"1", "true", "yes"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def enabled() -> bool:
+    return _env_flag("REPLICA_ENABLED")
+
+
+def reads_enabled() -> bool:
+    return enabled() and _env_flag("REPLICA_READS")
+
+
+# ------------------------------
+# Change listeners
+# ------------------------------
+
+def on_change(fn: Callable) -> Callable:
+    """
+    Register fn(rel, rows, deleted=False), called inside the sync transaction
+    after rows are upserted (or deleted; then rows only carry id / po_id).
+    Derived local indexes (search, price history) hang off this.
+    """
+    if fn not in _listeners:
+        _listeners.append(fn)
+    return fn
+
+
+def _emit(rel: str, rows: List[dict], deleted: bool = False) -> None:
+    for fn in _listeners:
+        fn(rel, rows, deleted=deleted)
+
+
+def affected_po_ids(rel: str, rows: List[dict]) -> set:
+    """PO ids whose derived data a change to `rows` of `rel` invalidates (for listeners)."""
+    if rel == "purchase_orders":
+        return {str(r.get("id")) for r in rows if r.get("id")}
+    if rel in ("po_metadata", "po_line_items"):
+        return {str(r.get("po_id")) for r in rows if r.get("po_id")}
+    if rel == "suppliers":
+        supplier_ids = [str(r.get("id")) for r in rows if r.get("id")]
+        out = set()
+        for i in range(0, len(supplier_ids), UPSERT_BATCH):
+            out.update(db.session.scalars(
+                select(ReplicaRow.id).where(
+                    ReplicaRow.rel == "purchase_orders",
+                    func.json_extract(ReplicaRow.data, "$.supplier_id").in_(supplier_ids[i:i + UPSERT_BATCH]),
+                )
+            ))
+        return out
+    return set()
+
+
+# ------------------------------
+# Setup / background sync
+# ------------------------------
+
+def init_app(app) -> None:
+    """Create the replica tables, switch SQLite to WAL, and start the sync thread."""
+    with app.app_context():
+        db.create_all()
+        if db.engine.dialect.name == "sqlite":
+            with db.engine.begin() as conn:
+                conn.execute(text("PRAGMA journal_mode=WAL"))
+
+    app.after_request(_note_write_after_request)
+    if enabled() and not app.testing:
+        start_sync_thread(app)
+
+
+def start_sync_thread(app) -> None:
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    interval = _env_int("REPLICA_SYNC_INTERVAL_SECONDS", 30)
+
+    def _loop():
+        while True:
+            try:
+                with app.app_context():
+                    sync_all()
+            except Exception as e:
+                logging.exception(f"Replica sync failed: {e}")
+            _wake.wait(interval)
+            _wake.clear()
+
+    _thread = threading.Thread(target=_loop, name="replica-sync", daemon=True)
+    _thread.start()
+
+
+def request_sync() -> None:
+    """Wake the background thread early (e.g. right after a write)."""
+    _wake.set()
+
+
+def sync_all(force_full: bool = False) -> Dict[str, Any]:
+    """
+    Sync every table once. Guarded by a file lock so the gunicorn workers
+    don't sync the same file at the same time; returns {"skipped": True} if
+    another process holds it. Returns {rel: changed_row_count | "error: ..."}.
+    """
+    lock_path = Path(current_app.instance_path) / "replica.lock"
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return {"skipped": True}
+        out: Dict[str, Any] = {}
+        for rel in TABLES:
+            # a base table that changed (or failed to sync) makes its views reload
+            out[rel] = _sync_table(rel, force_full, base_changed=any(out.get(b) for b in VIEWS.get(rel, ())))
+        return out
+
+
+def _sync_table(rel: str, force_full: bool, base_changed: bool = False):
+    full_every = _env_int("REPLICA_FULL_REFRESH_SECONDS", 600)
+    state = db.session.get(ReplicaState, rel) or ReplicaState(rel=rel, mode="incremental", generation=0)
+    started = time.time()
+    sweep_due = force_full or not state.swept_at or (started - state.swept_at) >= full_every
+
+    try:
+        if rel in VIEWS:
+            changed = _sync_view(rel, state, started, reload=sweep_due or base_changed)
+        else:
+            changed = _sync_rows(rel, state, started, sweep_due)
+
+        if changed:
+            state.generation = (state.generation or 0) + 1
+        state.synced_at = time.time()
+        state.row_count = db.session.scalar(
+            select(func.count()).select_from(ReplicaRow).where(ReplicaRow.rel == rel)
+        )
+        state.last_error = None
+        db.session.merge(state)
+        db.session.commit()
+        return changed
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Replica sync of {rel} failed: {e}")
+        _record_error(rel, str(e))
+        return f"error: {e}"
+
+
+def _sync_rows(rel: str, state: ReplicaState, started: float, sweep_due: bool) -> int:
+    changed = 0
+    if state.mode != "full":
+        changed = _sync_incremental(rel, state)
+        if state.mode == "full" and changed:
+            # just switched after a complete first load; no need to reload now
+            state.swept_at, sweep_due = started, False
+    if state.mode == "full":
+        if sweep_due:
+            changed += _sync_full(rel)
+            state.swept_at = started
+        # full-mode data is as of its last reload
+        state.sync_started_at = state.swept_at
+    else:
+        if sweep_due:
+            changed += _sweep_deleted(rel)
+            state.swept_at = started
+        state.sync_started_at = started
+    return changed
+
+
+def _sync_view(rel: str, state: ReplicaState, started: float, reload: bool) -> int:
+    """Reload a view whole if asked to, or if the app wrote since its last reload."""
+    state.mode = "view"
+    writes = db.session.get(ReplicaState, WRITES_KEY)
+    if writes is not None and (writes.synced_at or 0) >= (state.swept_at or 0):
+        reload = True
+    changed = 0
+    if reload:
+        changed = _sync_full(rel)
+        state.swept_at = started
+    # bases unchanged since the reload: the copy is as current as they are
+    state.sync_started_at = started
+    return changed
+
+
+def _record_error(rel: str, message: str) -> None:
+    try:
+        state = db.session.get(ReplicaState, rel) or ReplicaState(rel=rel, mode="incremental", generation=0)
+        state.last_error = message[:1000]
+        db.session.merge(state)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+# ------------------------------
+# Pulling from Supabase
+# ------------------------------
+
+def _rest_get(rel: str, params) -> requests.Response:
+    from app.supabase_client import _get_supabase_auth, get_headers
+    base, _ = _get_supabase_auth()
+    return requests.get(f"{base}/rest/v1/{rel}", headers=get_headers(False), params=params, timeout=60)
+
+
+def _row_key(rel: str, row: dict) -> str:
+    return "|".join("" if row.get(k) is None else str(row.get(k)) for k in TABLES[rel])
+
+
+def _sync_incremental(rel: str, state: ReplicaState) -> int:
+    """
+    Keyset-page rows newer than the watermark:
+      order=updated_at.asc,id.asc & or=(updated_at.gt.TS,and(updated_at.eq.TS,id.gt.ID))
+    The first load (no watermark) pages by offset so rows with a NULL
+    updated_at are included once. Drops the table to full mode if the
+    watermark column doesn't exist or the key isn't a single id.
+    """
+    if TABLES[rel] != ("id",):
+        state.mode = "full"
+        return 0
+
+    order = f"{WATERMARK_COLUMN}.asc,id.asc"
+    initial = not state.watermark_ts
+    changed = 0
+    offset = 0
+    while True:
+        params = [("select", "*"), ("order", order), ("limit", str(PAGE_SIZE))]
+        if initial:
+            params.append(("offset", str(offset)))
+        else:
+            ts, rid = state.watermark_ts, state.watermark_id or ""
+            params.append(("or", f'({WATERMARK_COLUMN}.gt."{ts}",and({WATERMARK_COLUMN}.eq."{ts}",id.gt.{rid}))'))
+
+        resp = _rest_get(rel, params)
+        if resp.status_code == 400 and not changed and WATERMARK_COLUMN in resp.text:
+            logging.info(f"Replica: {rel} has no {WATERMARK_COLUMN}; using full refresh")
+            state.mode = "full"
+            return 0
+        resp.raise_for_status()
+        rows = resp.json() or []
+        if not rows:
+            break
+
+        _upsert(rel, rows)
+        changed += len(rows)
+        for r in rows:
+            ts = r.get(WATERMARK_COLUMN)
+            if ts and (not state.watermark_ts or (ts, str(r["id"])) > (state.watermark_ts, state.watermark_id or "")):
+                state.watermark_ts, state.watermark_id = ts, str(r["id"])
+        if len(rows) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+
+    if initial and changed and not state.watermark_ts:
+        # column exists but is never filled in: nothing to page on
+        logging.info(f"Replica: {rel}.{WATERMARK_COLUMN} is empty; using full refresh")
+        state.mode = "full"
+    return changed
+
+
+def _iter_all(rel: str, select_cols: str = "*") -> Iterable[dict]:
+    order = ",".join(f"{k}.asc" for k in TABLES[rel])
+    offset = 0
+    while True:
+        resp = _rest_get(rel, [("select", select_cols), ("order", order),
+                               ("limit", str(PAGE_SIZE)), ("offset", str(offset))])
+        resp.raise_for_status()
+        rows = resp.json() or []
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+def _sync_full(rel: str) -> int:
+    """Reload the whole table; the swap happens in one transaction."""
+    old = [{"id": i, "po_id": p} for i, p in db.session.execute(
+        select(ReplicaRow.id, ReplicaRow.po_id).where(ReplicaRow.rel == rel))]
+    db.session.execute(delete(ReplicaRow).where(ReplicaRow.rel == rel))
+    _emit(rel, old, deleted=True)
+    batch, count = [], 0
+    for row in _iter_all(rel):
+        batch.append(row)
+        if len(batch) >= UPSERT_BATCH:
+            count += _upsert(rel, batch, commit=False)
+            batch = []
+    count += _upsert(rel, batch, commit=False)
+    return count
+
+
+def _sweep_deleted(rel: str) -> int:
+    """Drop local rows whose ids no longer exist upstream."""
+    live_ids = {str(r.get("id")) for r in _iter_all(rel, select_cols="id")}
+    local_ids = set(db.session.scalars(select(ReplicaRow.id).where(ReplicaRow.rel == rel)))
+    gone = list(local_ids - live_ids)
+    for i in range(0, len(gone), UPSERT_BATCH):
+        chunk = gone[i:i + UPSERT_BATCH]
+        removed = [{"id": rid, "po_id": po_id} for rid, po_id in db.session.execute(
+            select(ReplicaRow.id, ReplicaRow.po_id).where(ReplicaRow.rel == rel, ReplicaRow.id.in_(chunk)))]
+        db.session.execute(delete(ReplicaRow).where(ReplicaRow.rel == rel, ReplicaRow.id.in_(chunk)))
+        _emit(rel, removed, deleted=True)
+    return len(gone)
+
+
+def _upsert(rel: str, rows: List[dict], commit: bool = True) -> int:
+    for i in range(0, len(rows), UPSERT_BATCH):
+        chunk = rows[i:i + UPSERT_BATCH]
+        values = [{
+            "rel": rel,
+            "id": _row_key(rel, r),
+            "po_id": None if r.get("po_id") is None else str(r.get("po_id")),
+            "updated_at": r.get(WATERMARK_COLUMN),
+            "data": r,
+        } for r in chunk]
+        stmt = sqlite_insert(ReplicaRow).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["rel", "id"],
+            set_={"po_id": stmt.excluded.po_id, "updated_at": stmt.excluded.updated_at, "data": stmt.excluded.data},
+        )
+        db.session.execute(stmt)
+        _emit(rel, chunk)
+    if commit:
+        db.session.commit()
+    return len(rows)
+
+
+# ------------------------------
+# Write tracking
+# ------------------------------
+
+def note_write() -> None:
+    """
+    Record that this app just wrote to Supabase. Stored in SQLite so both
+    gunicorn workers see it; reads go live until a sync starts after it.
+    """
+    if not enabled():
+        return
+    try:
+        state = db.session.get(ReplicaState, WRITES_KEY) or ReplicaState(rel=WRITES_KEY, mode="-", generation=0)
+        state.synced_at = time.time()
+        db.session.merge(state)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Replica note_write failed: {e}")
+    request_sync()
+
+
+def absorb_rows(rel: str, rows: List[dict]) -> None:
+    """
+    Upsert rows the app just wrote (PostgREST return=representation) so the
+    local copy doesn't wait for the next sync, or miss writes that don't move
+    updated_at (e.g. deactivations).
+    """
+    if not enabled() or rel not in TABLES or not rows:
+        return
+    try:
+        _upsert(rel, rows, commit=False)
+        state = db.session.get(ReplicaState, rel)
+        if state is not None:
+            state.generation = (state.generation or 0) + 1
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Replica absorb_rows({rel}) failed: {e}")
+
+
+def _note_write_after_request(response):
+    if request.blueprint == "replica":
+        return response
+    if request.method in {"POST", "PUT", "PATCH", "DELETE"} and response.status_code < 400:
+        note_write()
+    return response
+
+
+# ------------------------------
+# Freshness
+# ------------------------------
+
+def status() -> Dict[str, Any]:
+    """
+    Freshness summary, memoised per request on flask.g:
+      {"source": "local"|"live", "reason": str, "synced_at": float|None,
+       "age_seconds": int|None, "tables": {rel: {...}}}
+    """
+    if has_request_context() and "replica_status" in g:
+        return g.replica_status
+
+    out: Dict[str, Any] = {"source": "live", "reason": "", "synced_at": None, "age_seconds": None, "tables": {}}
+    if not reads_enabled():
+        out["reason"] = "disabled"
+    elif has_request_context() and request.args.get("live") == "1":
+        out["reason"] = "live requested"
+    else:
+        try:
+            states = {s.rel: s for s in db.session.scalars(select(ReplicaState))}
+        except Exception as e:
+            states = {}
+            out["reason"] = f"unavailable: {e}"
+
+        tables = {rel: states.get(rel) for rel in TABLES}
+        out["tables"] = {
+            rel: {
+                "mode": s.mode, "rows": s.row_count, "synced_at": s.synced_at,
+                "as_of": s.sync_started_at, "error": s.last_error,
+            } if s else None
+            for rel, s in tables.items()
+        }
+        if states and all(s and s.synced_at for s in tables.values()):
+            synced_at = min(s.synced_at for s in tables.values())
+            as_of = min((s.sync_started_at or 0 for s in tables.values() if s.mode != "full"), default=synced_at)
+            writes = states.get(WRITES_KEY)
+            out["synced_at"] = synced_at
+            out["age_seconds"] = int(time.time() - synced_at)
+            if out["age_seconds"] > _env_int("REPLICA_MAX_STALENESS_SECONDS", 300):
+                out["reason"] = "stale"
+            elif writes and (writes.synced_at or 0) >= as_of:
+                out["reason"] = "catching up with a recent save"
+            else:
+                out["source"] = "local"
+        elif not out["reason"]:
+            out["reason"] = "initial sync pending"
+
+    if has_request_context():
+        g.replica_status = out
+    return out
+
+
+def serving() -> bool:
+    return status()["source"] == "local"
+
+
+# ------------------------------
+# Local reads
+# ------------------------------
+
+def _rows(rel: str) -> List[dict]:
+    generation = db.session.scalar(select(ReplicaState.generation).where(ReplicaState.rel == rel)) or 0
+    with _cache_lock:
+        hit = _cache.get(rel)
+        if hit and hit[0] == generation:
+            return hit[1]
+    rows = list(db.session.scalars(select(ReplicaRow.data).where(ReplicaRow.rel == rel)))
+    if rel in _CACHED_RELS:
+        with _cache_lock:
+            _cache[rel] = (generation, rows)
+    return rows
+
+
+def _rows_for_po(rel: str, po_id) -> List[dict]:
+    return list(db.session.scalars(
+        select(ReplicaRow.data).where(ReplicaRow.rel == rel, ReplicaRow.po_id == str(po_id))
+    ))
+
+
+def _truthy(v) -> bool:
+    return v is True or str(v).lower() in {"1", "true", "t"}
+
+
+def _sort_rows(rows: List[dict], order_by: Optional[str]) -> List[dict]:
+    """PostgREST-style order ("a.desc,b.asc"); NULLS LAST for asc, FIRST for desc like Postgres."""
+    out = list(rows)
+    for part in reversed([p for p in (order_by or "").split(",") if p]):
+        col, _, direction = part.partition(".")
+        desc = direction.startswith("desc")
+        out.sort(key=lambda r: (r.get(col) is None, r.get(col) if r.get(col) is not None else 0), reverse=desc)
+    return out
+
+
+def _suppliers_by_id() -> Dict[str, dict]:
+    return {str(s.get("id")): s for s in _rows("suppliers")}
+
+
+def active_pos(projectnumber=None, supplier_name=None, status=None, date_from=None, date_to=None,
+               order_by="updated_at.desc") -> List[dict]:
+    """Local stand-in for fetch_active_pos_from_view(): the synced active_po_list rows, filtered the same way."""
+    rows = [dict(r) for r in _rows("active_po_list")]  # callers may annotate rows; keep the cache clean
+    if projectnumber:
+        needle = str(projectnumber).lower()
+        rows = [r for r in rows if needle in str(r.get("project_id") or "").lower()]
+    if supplier_name:
+        rows = [r for r in rows if r.get("supplier_name") == supplier_name]
+    if status:
+        rows = [r for r in rows if r.get("status") == status]
+    if date_from:
+        lo = f"{date_from}T00:00:00"
+        rows = [r for r in rows if str(r.get("updated_at") or "")[:19] >= lo]
+    if date_to:
+        hi = f"{date_to}T00:00:00"
+        rows = [r for r in rows if r.get("updated_at") and str(r.get("updated_at"))[:19] < hi]
+    return _sort_rows(rows, order_by)
+
+
+def project_po_summary() -> List[dict]:
+    """Local stand-in for fetch_project_po_summary() (same counts over the synced active_po_list)."""
+    agg = defaultdict(lambda: {"project": "", "project_id": "", "draft": 0, "active": 0})
+    for r in _rows("active_po_list"):
+        projectnumber = (r.get("project_id") or "—").strip()
+        if not agg[projectnumber]["project"]:
+            agg[projectnumber]["project"] = projectnumber
+            agg[projectnumber]["project_id"] = projectnumber
+        if (r.get("status") or "").lower() == "draft":
+            agg[projectnumber]["draft"] += 1
+        else:
+            agg[projectnumber]["active"] += 1
+    return sorted(agg.values(), key=lambda x: x["project_id"])
+
+
+def accounts_overview(statuses=None) -> List[dict]:
+    """Local stand-in for fetch_accounts_overview(): the synced accounts_overview rows."""
+    rows = [dict(r) for r in _rows("accounts_overview") if not statuses or r.get("status") in statuses]
+    return _sort_rows(rows, "po_number.asc")
+
+
+def last_issued_dates_any(po_numbers) -> Dict[str, str]:
+    """Local stand-in for fetch_last_issued_dates_any()."""
+    wanted = {str(p) for p in po_numbers}
+    latest: Dict[str, str] = {}
+    for r in _rows("purchase_orders"):
+        pn = str(r.get("po_number"))
+        if pn not in wanted or r.get("status") != "issued" or not r.get("updated_at"):
+            continue
+        if pn not in latest or r["updated_at"] > latest[pn]:
+            latest[pn] = r["updated_at"]
+    return latest
+
+
+def po_detail(po_id) -> Optional[dict]:
+    """
+    Local stand-in for fetch_po_detail(). Returns None when anything the page
+    needs isn't in the replica yet, so the caller falls back to live.
+    """
+    po = next((dict(r) for r in _rows("purchase_orders") if str(r.get("id")) == str(po_id)), None)
+    if po is None:
+        return None
+
+    suppliers = _suppliers_by_id()
+    po["suppliers"] = suppliers.get(str(po.get("supplier_id")))
+    # one-to-one embed: PostgREST returns the active row as an object (or null)
+    po["po_metadata"] = next((m for m in _rows_for_po("po_metadata", po_id) if _truthy(m.get("active"))), None)
+    po["projectnumber"] = po.get("project_id")
+    po["line_items"] = [li for li in _rows_for_po("po_line_items", po_id) if _truthy(li.get("active"))]
+
+    if po.get("delivery_contact_id"):
+        dc = next((c for c in _rows("delivery_contacts") if str(c.get("id")) == str(po["delivery_contact_id"])), None)
+        if dc is None:
+            return None
+        po["delivery_contact"] = dc
+
+    if po.get("manual_delivery_address") is None:
+        address_id = po.get("delivery_address_id")
+        if not address_id and po.get("delivery_contact"):
+            address_id = po["delivery_contact"].get("address_id")
+        if address_id:
+            po["delivery_address"] = suppliers.get(str(address_id))
+    return po
+
+
+def supplier_names() -> List[str]:
+    """Local stand-in for fetch_suppliers() (sorted names)."""
+    return sorted({str(s.get("name")).strip() for s in _rows("suppliers") if s.get("name")})
+
+
+def delivery_addresses() -> List[dict]:
+    """Local stand-in for fetch_delivery_addresses()."""
+    rows = [s for s in _rows("suppliers") if s.get("type") in ("delivery", "both")]
+    return _sort_rows(rows, "name.asc")
+
+
+def delivery_contacts() -> List[dict]:
+    """Local stand-in for fetch_delivery_contacts()."""
+    return _sort_rows(_rows("delivery_contacts"), "name.asc")
+
+
+def project_register_items() -> List[dict]:
+    """Local stand-in for fetch_project_register_items()."""
+    rows = [{k: r.get(k) for k in ("projectnumber", "item_seq", "line_desc")} for r in _rows("project_register_items")]
+    return _sort_rows(rows, "projectnumber.desc,item_seq.asc")
@@ -0,0 +1,103 @@
+# app/services/schema_registry.py
+"""
+Column sets for the tables the app writes, read from PostgREST's OpenAPI
+document (GET /rest/v1/) instead of fetching a row to see which keys exist.
+
+The document is fetched once per process and refreshed every
+SCHEMA_REFRESH_SECONDS (default 3600). If it can't be loaded, the static
+FALLBACK_COLUMNS below are used, so writes keep working with the columns the
+app is known to send.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional
+
+import requests
+
+from app.utils import deadline as _deadline
+
+FALLBACK_COLUMNS: Dict[str, FrozenSet[str]] = {
+    "purchase_orders": frozenset({
+        "id", "project_id", "item_seq", "supplier_id", "status", "current_revision",
+        "delivery_contact_id", "po_number", "last_release",
+    }),
+    "po_metadata": frozenset({
+        "id", "po_id", "delivery_terms", "delivery_date", "supplier_contact_name",
+        "supplier_reference_number", "test_certificates_required", "active",
+    }),
+    "po_line_items": frozenset({
+        "id", "po_id", "description", "quantity", "unit", "unit_price", "currency", "active",
+        "qty_received", "exped_expected_date", "exped_completed_date",
+    }),
+}
+
+# never written from a form payload
+READ_ONLY = frozenset({"id", "created", "modified", "created_at", "updated_at"})
+
+_lock = threading.Lock()
+_columns: Dict[str, FrozenSet[str]] = {}
+_loaded_at: float = 0.0
+
+
+def _refresh_seconds() -> int:
+    try:
+        return int(os.environ.get("SCHEMA_REFRESH_SECONDS", "3600"))
+    except ValueError:
+        return 3600
+
+
+def _load() -> Dict[str, FrozenSet[str]]:
+    from app.supabase_client import _get_supabase_auth, get_headers
+    base, _ = _get_supabase_auth()
+    resp = requests.get(
+        f"{base}/rest/v1/",
+        headers={**get_headers(False), "Accept": "application/openapi+json"},
+        timeout=_deadline.clamp(15),
+    )
+    resp.raise_for_status()
+    definitions = (resp.json() or {}).get("definitions") or {}
+    return {
+        rel: frozenset((spec or {}).get("properties") or {})
+        for rel, spec in definitions.items()
+    }
+
+
+def columns(rel: str) -> FrozenSet[str]:
+    """All columns of `rel` (OpenAPI, cached; FALLBACK_COLUMNS if unavailable)."""
+    global _columns, _loaded_at
+    now = time.time()
+    if not _columns or now - _loaded_at >= _refresh_seconds():
+        with _lock:
+            if not _columns or now - _loaded_at >= _refresh_seconds():
+                try:
+                    _columns = _load()
+                except Exception as e:
+                    logging.warning(f"PostgREST schema load failed, using fallback columns: {e}")
+                # retry after a failure no sooner than the normal interval
+                _loaded_at = now
+    return _columns.get(rel) or FALLBACK_COLUMNS.get(rel, frozenset())
+
+
+def writable(rel: str, exclude: Iterable[str] = ()) -> FrozenSet[str]:
+    return columns(rel) - READ_ONLY - frozenset(exclude)
+
+
+def clean_payload(rel: str, payload: Optional[dict], exclude: Iterable[str] = (),
+                  drop_none: bool = False) -> dict:
+    """Keep only keys that are writable columns of `rel` (optionally dropping None values)."""
+    allowed = writable(rel, exclude)
+    return {
+        k: v for k, v in (payload or {}).items()
+        if k in allowed and not (drop_none and v is None)
+    }
+
+
+def invalidate() -> None:
+    """Force a reload on next use (e.g. after a migration)."""
+    global _loaded_at
+    with _lock:
+        _loaded_at = 0.0
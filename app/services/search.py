@@ -0,0 +1,195 @@
+# app/services/search.py
+"""
+Full-text search over POs, backed by an SQLite FTS5 table next to the replica.
+
+po_search has one row per active line item plus one "header" row per latest
+PO revision. Every row carries the PO's number, project, supplier and
+supplier reference, so "M20 Acme" matches a line on an Acme PO.
+
+The index is derived from replica_rows (see app/services/replica.py) and
+kept current through replica.on_change(): each sync batch re-indexes only
+the POs it touched. Nothing here calls Supabase.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Dict, Iterable, List
+
+from markupsafe import escape
+from sqlalchemy import bindparam, text
+
+from app.extensions import db
+from app.services import replica
+
+CHUNK = 500
+MAX_RESULTS = 50
+
+_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS po_search USING fts5("
+    "po_id UNINDEXED, revision UNINDEXED, "
+    "po_number, project, supplier, supplier_ref, description, "
+    "tokenize = 'unicode61', prefix = '2 3')"
+)
+
+# Latest revisions = purchase_orders with an active po_metadata row (same rule as the replica).
+_HEADER_SQL = """
+INSERT INTO po_search (po_id, revision, po_number, project, supplier, supplier_ref, description)
+SELECT po.id,
+       json_extract(po.data, '$.current_revision'),
+       printf('%06d', json_extract(po.data, '$.po_number')),
+       json_extract(po.data, '$.project_id'),
+       json_extract(s.data, '$.name'),
+       json_extract(m.data, '$.supplier_reference_number'),
+       ''
+FROM replica_rows po
+JOIN replica_rows m ON m.rel = 'po_metadata' AND m.po_id = po.id
+                   AND json_extract(m.data, '$.active') IN (1, 'true')
+LEFT JOIN replica_rows s ON s.rel = 'suppliers' AND s.id = json_extract(po.data, '$.supplier_id')
+WHERE po.rel = 'purchase_orders' AND po.id IN :ids
+"""
+
+_LINES_SQL = """
+INSERT INTO po_search (po_id, revision, po_number, project, supplier, supplier_ref, description)
+SELECT po.id,
+       json_extract(po.data, '$.current_revision'),
+       printf('%06d', json_extract(po.data, '$.po_number')),
+       json_extract(po.data, '$.project_id'),
+       json_extract(s.data, '$.name'),
+       json_extract(m.data, '$.supplier_reference_number'),
+       json_extract(li.data, '$.description')
+FROM replica_rows po
+JOIN replica_rows m ON m.rel = 'po_metadata' AND m.po_id = po.id
+                   AND json_extract(m.data, '$.active') IN (1, 'true')
+JOIN replica_rows li ON li.rel = 'po_line_items' AND li.po_id = po.id
+                    AND json_extract(li.data, '$.active') IN (1, 'true')
+LEFT JOIN replica_rows s ON s.rel = 'suppliers' AND s.id = json_extract(po.data, '$.supplier_id')
+WHERE po.rel = 'purchase_orders' AND po.id IN :ids
+"""
+
+# Best row per PO (bm25: lower is better; description/supplier weighted above
+# codes). SQLite's bare-column MIN() gives the rowid of that best row, so the
+# snippet is only built for the rows actually returned.
+_SEARCH_SQL = """
+WITH hits AS MATERIALIZED (
+    SELECT rowid AS rid, po_id, bm25(po_search, 0, 0, 4.0, 2.0, 3.0, 2.0, 5.0) AS score
+    FROM po_search
+    WHERE po_search MATCH :q
+),
+best AS (
+    SELECT rid, MIN(score) AS score, COUNT(*) AS matches
+    FROM hits
+    GROUP BY po_id
+    ORDER BY score
+    LIMIT :limit
+)
+SELECT po_id, revision, po_number, project, supplier, supplier_ref, description,
+       snippet(po_search, 6, char(2), char(3), ' … ', 12) AS snip, best.score, best.matches
+FROM best JOIN po_search ON po_search.rowid = best.rid
+WHERE po_search MATCH :q
+ORDER BY best.score
+"""
+
+
+def init_app(app) -> None:
+    """Create the FTS table, build it if empty, and follow replica changes."""
+    replica.on_change(_on_replica_change)  # before the first sync can land
+    with app.app_context():
+        db.session.execute(text(_DDL))
+        db.session.commit()
+        empty = db.session.execute(text("SELECT COUNT(*) FROM po_search")).scalar() == 0
+        if empty:
+            rebuild()
+
+
+def _chunks(ids: List[str]) -> Iterable[List[str]]:
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def reindex_pos(po_ids: Iterable[str]) -> None:
+    """Replace the index rows for these PO ids (caller commits)."""
+    ids = sorted({str(p) for p in po_ids if p})
+    delete = text("DELETE FROM po_search WHERE po_id IN :ids").bindparams(bindparam("ids", expanding=True))
+    header = text(_HEADER_SQL).bindparams(bindparam("ids", expanding=True))
+    lines = text(_LINES_SQL).bindparams(bindparam("ids", expanding=True))
+    for chunk in _chunks(ids):
+        db.session.execute(delete, {"ids": chunk})
+        db.session.execute(header, {"ids": chunk})
+        db.session.execute(lines, {"ids": chunk})
+
+
+def rebuild() -> int:
+    """Re-index every PO in the replica. Returns the number of POs indexed."""
+    t0 = time.perf_counter()
+    db.session.execute(text("DELETE FROM po_search"))
+    ids = list(db.session.execute(
+        text("SELECT id FROM replica_rows WHERE rel = 'purchase_orders'")
+    ).scalars())
+    reindex_pos(ids)
+    db.session.commit()
+    logging.info(f"Search index rebuilt for {len(ids)} POs in {time.perf_counter() - t0:.2f}s")
+    return len(ids)
+
+
+def _on_replica_change(rel: str, rows: List[dict], deleted: bool = False) -> None:
+    po_ids = replica.affected_po_ids(rel, rows)
+    if po_ids:
+        reindex_pos(po_ids)
+
+
+# ------------------------------
+# Querying
+# ------------------------------
+
+_TOKEN_RE = re.compile(r"[\w\-/.]+", re.UNICODE)
+
+
+def build_match(q: str) -> str:
+    """
+    User text -> FTS5 MATCH expression: every term must match, the last as a
+    prefix (search-as-you-type). Terms are quoted so FTS syntax chars in input
+    ('-', ':', '*', quotes) can't break the query.
+    """
+    terms = [t for t in _TOKEN_RE.findall(q or "") if t.strip("-/.")]
+    if not terms:
+        return ""
+    quoted = ['"' + t.replace('"', "") + '"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snip) -> str:
+    return str(escape(snip or "")).replace("\x02", "<mark>").replace("\x03", "</mark>")
+
+
+def search(q: str, limit: int = MAX_RESULTS) -> Dict:
+    """
+    Returns {"query", "results": [...], "took_ms", "indexed"} ("indexed" = PO
+    count, only filled in when there are no results); each result has
+    po_id, po_number, revision, project, supplier, supplier_ref, snippet_html
+    (escaped, hits wrapped in <mark>) and matches (rows hit on that PO).
+    """
+    t0 = time.perf_counter()
+    match = build_match(q)
+    results: List[dict] = []
+    if match:
+        rows = db.session.execute(text(_SEARCH_SQL), {"q": match, "limit": int(limit)}).mappings()
+        for r in rows:
+            results.append({
+                "po_id": r["po_id"],
+                "po_number": r["po_number"],
+                "revision": r["revision"],
+                "project": r["project"],
+                "supplier": r["supplier"],
+                "supplier_ref": r["supplier_ref"],
+                "snippet_html": _highlight(r["snip"]) if r["description"] else "",
+                "matches": r["matches"],
+            })
+    took_ms = round((time.perf_counter() - t0) * 1000, 2)
+    # only worth the scan when nothing matched (tells "no hits" from "empty index")
+    indexed = None if results else db.session.execute(
+        text("SELECT COUNT(*) FROM po_search WHERE description = ''")
+    ).scalar()
+    return {"query": q, "results": results, "took_ms": took_ms, "indexed": indexed}
@@ -0,0 +1,276 @@
+# app/services/shared_cache.py
+"""
+Cache shared by every gunicorn worker on the box (one SQLite file, WAL mode),
+so reference data, report aggregates and rendered fragments are computed once
+per box instead of once per worker, and survive a worker restart.
+
+    value = shared_cache.get_or_compute("suppliers", "names", compute, ttl=600)
+
+    @shared_cache.cached("suppliers", ttl=600)
+    def fetch_suppliers(...): ...
+
+- Keys live in namespaces (usually a table name). bump(namespace) moves the
+  namespace to a new version, so every key in it is invalidated at once.
+- get_or_compute() is atomic across workers: one caller computes while the
+  others wait (up to lock_timeout) for its value.
+- Values are pickled; the file is local to the app and never shared outside it.
+
+SHARED_CACHE_PATH (default <instance>/shared_cache.db) sets the file;
+SHARED_CACHE_ENABLED=0 turns the cache off (everything is computed).
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.utils import metrics as _metrics
+
+_MISSING = object()
+_POLL_SECONDS = 0.05
+
+# blueprints whose POSTs write PO data (not admin/ops endpoints such as
+# /replica/sync or /admin/profiles)
+_WRITE_BLUEPRINTS = {"main", "accounts", "expediting"}
+
+_path: Optional[str] = None
+_local = threading.local()
+_stats = {"hits": 0, "misses": 0, "computed": 0, "waited": 0}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key        TEXT PRIMARY KEY,
+    value      BLOB NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_versions (
+    namespace TEXT PRIMARY KEY,
+    version   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_locks (
+    key        TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def enabled() -> bool:
+    return _path is not None
+
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != _path:
+        conn = sqlite3.connect(_path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn, _local.path = conn, _path
+    return conn
+
+
+def _version(namespace: str) -> int:
+    row = _conn().execute("SELECT version FROM cache_versions WHERE namespace = ?", (namespace,)).fetchone()
+    return row[0] if row else 0
+
+
+def _full_key(namespace: str, key: str) -> str:
+    return f"{namespace}:v{_version(namespace)}:{key}"
+
+
+def _read(full_key: str) -> Any:
+    row = _conn().execute(
+        "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (full_key, time.time())
+    ).fetchone()
+    return pickle.loads(row[0]) if row else _MISSING
+
+
+def _write(full_key: str, value: Any, ttl: float) -> None:
+    conn = _conn()
+    now = time.time()
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+        (full_key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl),
+    )
+    if random.random() < 0.02:  # now and then, drop expired rows (old versions included)
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM cache_locks WHERE expires_at <= ?", (now,))
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+
+def get(namespace: str, key: str, default: Any = None) -> Any:
+    if not enabled():
+        return default
+    try:
+        value = _read(_full_key(namespace, key))
+    except sqlite3.Error as e:
+        logging.warning(f"shared_cache get {namespace}/{key} failed: {e}")
+        return default
+    return default if value is _MISSING else value
+
+
+def set(namespace: str, key: str, value: Any, ttl: float) -> None:
+    if not enabled():
+        return
+    try:
+        _write(_full_key(namespace, key), value, ttl)
+    except sqlite3.Error as e:
+        logging.warning(f"shared_cache set {namespace}/{key} failed: {e}")
+
+
+def delete(namespace: str, key: str) -> None:
+    if not enabled():
+        return
+    try:
+        _conn().execute("DELETE FROM cache_entries WHERE key = ?", (_full_key(namespace, key),))
+    except sqlite3.Error as e:
+        logging.warning(f"shared_cache delete {namespace}/{key} failed: {e}")
+
+
+def bump(*namespaces: str) -> None:
+    """Invalidate every key in these namespaces (all workers)."""
+    if not enabled():
+        return
+    try:
+        conn = _conn()
+        for ns in namespaces:
+            conn.execute(
+                "INSERT INTO cache_versions (namespace, version) VALUES (?, 1) "
+                "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+                (ns,),
+            )
+    except sqlite3.Error as e:
+        logging.warning(f"shared_cache bump {namespaces} failed: {e}")
+
+
+def get_or_compute(namespace: str, key: str, compute: Callable[[], Any], ttl: float,
+                   lock_timeout: float = 30) -> Any:
+    """
+    Cached value, or compute() it once across all workers. If the computing
+    worker fails or takes longer than lock_timeout, waiters compute it
+    themselves rather than fail.
+    """
+    if not enabled():
+        return compute()
+    try:
+        full_key = _full_key(namespace, key)
+        value = _read(full_key)
+        if value is not _MISSING:
+            _stats["hits"] += 1
+            _metrics.cache_event("shared", "hit")
+            return value
+        _stats["misses"] += 1
+        _metrics.cache_event("shared", "miss")
+
+        conn = _conn()
+        now = time.time()
+        conn.execute("DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?", (full_key, now))
+        leader = conn.execute(
+            "INSERT OR IGNORE INTO cache_locks (key, expires_at) VALUES (?, ?)", (full_key, now + lock_timeout)
+        ).rowcount == 1
+    except sqlite3.Error as e:
+        logging.warning(f"shared_cache {namespace}/{key} unavailable: {e}")
+        return compute()
+
+    if not leader:
+        _stats["waited"] += 1
+        give_up = time.monotonic() + lock_timeout
+        while time.monotonic() < give_up:
+            time.sleep(_POLL_SECONDS)
+            try:
+                value = _read(full_key)
+                if value is not _MISSING:
+                    return value
+                if not conn.execute("SELECT 1 FROM cache_locks WHERE key = ?", (full_key,)).fetchone():
+                    break  # leader gave up without a value
+            except sqlite3.Error:
+                break
+        return compute()
+
+    try:
+        value = compute()
+        _stats["computed"] += 1
+        _write(full_key, value, ttl)
+        return value
+    finally:
+        try:
+            conn.execute("DELETE FROM cache_locks WHERE key = ?", (full_key,))
+        except sqlite3.Error:
+            pass
+
+
+def cached(namespace: str, ttl: float, bypass: Optional[Callable[[], bool]] = None):
+    """
+    Decorator: cache a fetcher's result per (function, args) in `namespace`.
+    `bypass()` returning True calls the function directly (e.g. while the
+    local replica is serving, which is already fast and fresh).
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled() or (bypass is not None and bypass()):
+                return fn(*args, **kwargs)
+            key = f"{fn.__module__}.{fn.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+            return get_or_compute(namespace, key, lambda: fn(*args, **kwargs), ttl)
+        return inner
+    return wrap
+
+
+# a change to a table invalidates these namespaces (default: its own name)
+_DEPENDENTS = {
+    "po_metadata": ("po_metadata", "purchase_orders"),
+    "po_line_items": ("po_line_items", "purchase_orders"),
+    "suppliers": ("suppliers", "purchase_orders"),  # supplier names in active_po_list
+}
+
+
+def namespaces_for(rel: str) -> tuple:
+    return _DEPENDENTS.get(rel, (rel,))
+
+
+def invalidate_table(rel: str) -> None:
+    """Rows of `rel` changed (here or elsewhere): bump everything derived from it."""
+    bump(*namespaces_for(rel))
+
+
+def stats() -> dict:
+    out = {**_stats, "enabled": enabled(), "path": _path}
+    if enabled():
+        try:
+            out["entries"] = _conn().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        except sqlite3.Error:
+            pass
+    return out
+
+
+def init_app(app) -> None:
+    global _path
+    if os.environ.get("SHARED_CACHE_ENABLED", "1").lower() in {"0", "false", "no"}:
+        _path = None
+        logging.info("Shared cache disabled")
+        return
+    path = os.environ.get("SHARED_CACHE_PATH") or os.path.join(app.instance_path, "shared_cache.db")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _path = path
+    _conn().executescript(_SCHEMA)
+
+    from app.services import replica
+    replica.on_change(lambda rel, rows, deleted=False: invalidate_table(rel))
+
+    @app.after_request
+    def _bump_after_write(response):
+        # a data write through this app may change PO-derived aggregates
+        from flask import request
+        if (request.blueprint in _WRITE_BLUEPRINTS and request.method in ("POST", "PUT", "PATCH", "DELETE")
+                and response.status_code < 400):
+            bump("purchase_orders")
+        return response
@@ -0,0 +1,460 @@
+# app/services/supabase_http.py
+"""
+Shared path for Supabase REST reads: single-flight, stale-while-revalidate
+and a circuit breaker.
+
+    resp = supabase_http.get(url, headers=..., params=..., timeout=30)
+
+Single-flight
+    When several requests ask for the same URL + params at the same moment
+    (e.g. everyone opening /po-list after a meeting), only the first one goes
+    to Supabase; the others wait for it and get the same response.
+    SUPABASE_MICRO_TTL_MS (default 0 = off) also keeps successful responses
+    for that many milliseconds so back-to-back bursts collapse too.
+
+Stale-while-revalidate
+    The last good response for each read is kept (SUPABASE_STALE_MAX_ENTRIES,
+    default 256, no older than SUPABASE_STALE_MAX_AGE seconds, default 3600).
+    If Supabase errors (timeout, connection, 5xx), or hasn't answered within
+    SUPABASE_STALE_AFTER_SECONDS (default 3), that copy is returned instead and
+    the call carries on in the background to refresh it. The request is
+    flagged so the page can say so.
+
+Circuit breaker
+    After SUPABASE_BREAKER_FAILURES (default 5) failed reads in a row, reads
+    stop going upstream for SUPABASE_BREAKER_COOLDOWN seconds (default 30):
+    they get a stale copy or fail at once with SupabaseUnavailable instead of
+    tying up a worker for the full timeout. Then one probe is let through;
+    success closes the breaker.
+
+Deadline and hedging
+    Timeouts are clamped to the request's remaining budget
+    (app/utils/deadline.py). A timeout that only hit that budget isn't held
+    against Supabase: it doesn't count toward the breaker, and requests
+    sharing the call retry with their own budget. With SUPABASE_HEDGE=1, a read still running after
+    the p95 latency of recent reads of the same relation (at least
+    SUPABASE_HEDGE_MIN_MS, default 50) gets a second identical attempt; the
+    first good answer wins. This trims tail latency at the cost of some extra
+    upstream reads; it needs 20 samples before it kicks in.
+
+Writes go through post() / patch(): no caching, just the deadline and call
+tracing (app/utils/call_trace.py), which get() records too.
+
+Pass fresh=True for reads that must reflect the database right now (read
+before write): no micro-cache, no stale copy.
+
+State is per process (each gunicorn worker has its own); see status().
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from app.utils import call_trace as _call_trace
+from app.utils import deadline as _deadline
+
+
+class SupabaseUnavailable(requests.ConnectionError):
+    """Raised without calling Supabase while the breaker is open."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _micro_ttl_seconds() -> float:
+    return max(0.0, _env_float("SUPABASE_MICRO_TTL_MS", 0) / 1000.0)
+
+
+# ------------------------------
+# Circuit breaker
+# ------------------------------
+
+class _Breaker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = "closed"          # closed | open | half_open
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= _env_float("SUPABASE_BREAKER_COOLDOWN", 30):
+                self.state = "half_open"   # this caller is the probe
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self) -> None:
+        with self.lock:
+            if self.state != "closed":
+                logging.info("Supabase breaker closed")
+            self.state, self.failures = "closed", 0
+
+    def failure(self, error: str) -> None:
+        with self.lock:
+            self.failures += 1
+            self.last_error = error[:300]
+            if self.state == "half_open" or (
+                self.state == "closed" and self.failures >= _env_float("SUPABASE_BREAKER_FAILURES", 5)
+            ):
+                if self.state == "closed":
+                    self.trips += 1
+                    logging.warning(f"⚠️ Supabase breaker open after {self.failures} failures: {self.last_error}")
+                self.state, self.opened_at = "open", time.monotonic()
+
+    def probe_error(self, error: str) -> None:
+        """
+        An error that says nothing about Supabase's health (e.g. a broken
+        chunked body). Only a half-open probe cares: it re-opens the breaker,
+        so the next caller after the cooldown probes again instead of the
+        breaker staying half-open for good.
+        """
+        with self.lock:
+            if self.state == "half_open":
+                self.last_error = error[:300]
+                self.state, self.opened_at = "open", time.monotonic()
+
+    def release_probe(self) -> None:
+        """The probe ran out of its request's budget: no verdict, the next caller probes."""
+        with self.lock:
+            if self.state == "half_open":
+                self.state = "open"  # opened_at unchanged: the cooldown has already passed
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            out = {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
+            if self.state == "open":
+                out["retry_in_seconds"] = max(
+                    0, round(_env_float("SUPABASE_BREAKER_COOLDOWN", 30) - (time.monotonic() - self.opened_at), 1))
+            return out
+
+
+breaker = _Breaker()
+
+
+def _is_failure(resp: Optional[requests.Response], error: Optional[BaseException]) -> bool:
+    if error is not None:
+        return isinstance(error, (requests.Timeout, requests.ConnectionError))
+    return resp is not None and resp.status_code >= 500
+
+
+# ------------------------------
+# Single-flight + caches
+# ------------------------------
+
+class _Call:
+    __slots__ = ("event", "response", "error", "clamped")
+
+    def __init__(self, clamped: bool = False):
+        self.event = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+        self.clamped = clamped  # the leader's timeout was cut short by its request deadline
+
+
+_lock = threading.Lock()
+_inflight: Dict[Tuple, _Call] = {}
+_recent: Dict[Tuple, Tuple[float, requests.Response]] = {}
+_last_good: "OrderedDict[Tuple, Tuple[float, requests.Response]]" = OrderedDict()
+_stats = {"upstream": 0, "coalesced": 0, "micro_hits": 0, "stale_served": 0, "stale_revalidated": 0,
+          "hedged": 0, "hedge_wins": 0}
+
+
+def _key(url: str, params, headers: Optional[dict]) -> Tuple:
+    # the prepared URL is exactly what goes on the wire (param order included)
+    full = requests.Request("GET", url, params=params).prepare().url
+    return (full, tuple(sorted((headers or {}).items())))
+
+
+def _prune(now: float) -> None:
+    for k in [k for k, (exp, _) in _recent.items() if exp <= now]:
+        _recent.pop(k, None)
+
+
+def _stale_copy(key: Tuple) -> Optional[requests.Response]:
+    with _lock:
+        hit = _last_good.get(key)
+        if hit and time.monotonic() - hit[0] <= _env_float("SUPABASE_STALE_MAX_AGE", 3600):
+            return hit[1]
+    return None
+
+
+def _serve_stale(url: str, resp: requests.Response, why: str) -> requests.Response:
+    with _lock:
+        _stats["stale_served"] += 1
+    logging.warning(f"Supabase read served stale ({why}): {url}")
+    from flask import has_request_context, request
+    if has_request_context():
+        # on the request (not g) so fan-out threads, with their own app context, count too
+        request.environ["po.supabase_stale"] = True
+    return resp
+
+
+# ------------------------------
+# Hedged sends
+# ------------------------------
+
+_LATENCY_SAMPLES = 200
+_latencies: Dict[str, Deque[float]] = {}
+
+
+def _hedge_delay(path: str) -> Optional[float]:
+    """p95 of recent latencies for `path`, or None if hedging is off / too few samples."""
+    if os.environ.get("SUPABASE_HEDGE", "0").lower() not in {"1", "true", "yes"}:
+        return None
+    with _lock:
+        samples = sorted(_latencies.get(path, ()))
+    if len(samples) < 20:
+        return None
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return max(p95, _env_float("SUPABASE_HEDGE_MIN_MS", 50) / 1000.0)
+
+
+def _attempt(url, headers, params, timeout, out: "queue.Queue", tag: str) -> None:
+    t0 = time.monotonic()
+    try:
+        resp = requests.get(url, headers=headers, params=params, timeout=timeout)
+    except BaseException as e:
+        out.put((tag, None, e))
+        return
+    with _lock:
+        _latencies.setdefault(urlsplit(url).path, deque(maxlen=_LATENCY_SAMPLES)).append(time.monotonic() - t0)
+    out.put((tag, resp, None))
+
+
+def _send(url, headers, params, timeout) -> requests.Response:
+    """requests.get, plus a second attempt after the p95 delay when hedging is on."""
+    delay = _hedge_delay(urlsplit(url).path)
+    out: "queue.Queue" = queue.Queue()
+    if delay is None or delay >= timeout:
+        _attempt(url, headers, params, timeout, out, "first")
+        _, resp, err = out.get_nowait()
+        if err is not None:
+            raise err
+        return resp
+
+    give_up = time.monotonic() + timeout
+    threading.Thread(target=_attempt, args=(url, headers, params, timeout, out, "first"),
+                     name="supabase-read", daemon=True).start()
+    pending = 1
+    try:
+        first = out.get(timeout=delay)
+    except queue.Empty:
+        first = None
+        with _lock:
+            _stats["hedged"] += 1
+        threading.Thread(target=_attempt, args=(url, headers, params, max(0.1, give_up - time.monotonic()), out, "hedge"),
+                         name="supabase-hedge", daemon=True).start()
+        pending = 2
+
+    last = None
+    while pending:
+        try:
+            got = first or out.get(timeout=max(0.0, give_up - time.monotonic()))
+        except queue.Empty:
+            break
+        first, pending = None, pending - 1
+        tag, resp, err = got
+        if err is None and resp.status_code < 500:
+            if tag == "hedge":
+                with _lock:
+                    _stats["hedge_wins"] += 1
+            return resp
+        last = got
+    if last is None:
+        raise requests.Timeout(f"Read timed out after {timeout:.1f}s: {url}")
+    _, resp, err = last
+    if err is not None:
+        raise err
+    return resp
+
+
+def _fetch(key: Tuple, call: _Call, url: str, headers, params, timeout, ttl: float, keep_stale: bool = True) -> None:
+    """Leader: do the real call, record the outcome, release the waiters."""
+    try:
+        call.response = _send(url, headers, params, timeout)
+    except requests.Timeout as e:
+        # a timeout that only hit the leader's own request budget says nothing about Supabase
+        call.error = _deadline.DeadlineExceeded(f"Request deadline spent reading {url}") if call.clamped else e
+    except BaseException as e:
+        call.error = e
+    finally:
+        if isinstance(call.error, _deadline.DeadlineExceeded):
+            breaker.release_probe()
+        elif _is_failure(call.response, call.error):
+            breaker.failure(str(call.error) if call.error else f"HTTP {call.response.status_code}")
+        elif call.response is not None:
+            breaker.success()
+        else:
+            breaker.probe_error(repr(call.error))
+        with _lock:
+            _inflight.pop(key, None)
+            if call.response is not None and call.response.status_code < 400:
+                done = time.monotonic()
+                if ttl:
+                    _prune(done)
+                    _recent[key] = (done + ttl, call.response)
+                if keep_stale:
+                    _last_good[key] = (done, call.response)
+                    _last_good.move_to_end(key)
+                    while len(_last_good) > _env_float("SUPABASE_STALE_MAX_ENTRIES", 256):
+                        _last_good.popitem(last=False)
+        call.event.set()
+
+
+def _get(url: str, headers, params, timeout: float, micro_ttl: Optional[float],
+         fresh: bool, keep_stale: bool = True) -> Tuple[requests.Response, str]:
+    """get() itself; also says how the response was served (for call_trace)."""
+    cap, timeout = timeout, _deadline.clamp(timeout)
+    ttl = 0.0 if fresh else (_micro_ttl_seconds() if micro_ttl is None else micro_ttl)
+    key = _key(url, params, headers)
+    stale = None if fresh or not keep_stale else _stale_copy(key)
+    now = time.monotonic()
+
+    with _lock:
+        if ttl:
+            hit = _recent.get(key)
+            if hit and hit[0] > now:
+                _stats["micro_hits"] += 1
+                return hit[1], "micro"
+        call = _inflight.get(key)
+        leader = call is None
+
+    if leader:
+        if not breaker.allow():
+            if stale is not None:
+                return _serve_stale(url, stale, "breaker open"), "stale"
+            raise SupabaseUnavailable(f"Supabase circuit open; not calling {url}")
+        with _lock:
+            call = _inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _inflight[key] = _Call(clamped=timeout < cap)
+                _stats["upstream"] += 1
+        if leader:
+            if stale is None:
+                _fetch(key, call, url, headers, params, timeout, ttl, keep_stale)
+            else:
+                # revalidate off the request thread so a slow call can't hold the page
+                threading.Thread(
+                    target=_fetch, args=(key, call, url, headers, params, timeout, ttl, keep_stale),
+                    name="supabase-revalidate", daemon=True,
+                ).start()
+    if not leader:
+        with _lock:
+            _stats["coalesced"] += 1
+
+    wait = timeout if stale is None else min(timeout, _env_float("SUPABASE_STALE_AFTER_SECONDS", 3))
+    if not call.event.wait(wait):
+        if stale is not None:
+            with _lock:
+                _stats["stale_revalidated"] += 1
+            return _serve_stale(url, stale, f"no answer in {wait:g}s"), "stale"
+        raise requests.Timeout(f"Timed out waiting for shared read of {url}")
+
+    if not leader and isinstance(call.error, _deadline.DeadlineExceeded):
+        # the leader's budget ran out, not ours: try again (as leader, or behind a new one)
+        return _get(url, headers, params, cap, micro_ttl, fresh, keep_stale)
+    if stale is not None and _is_failure(call.response, call.error):
+        return _serve_stale(url, stale, str(call.error) if call.error else f"HTTP {call.response.status_code}"), "stale"
+    if call.error is not None:
+        raise call.error
+    return call.response, ("upstream" if leader else "coalesced")
+
+
+def get(url: str, headers: Optional[dict] = None, params=None, timeout: float = 30,
+        micro_ttl: Optional[float] = None, fresh: bool = False, keep_stale: bool = True) -> requests.Response:
+    """
+    requests.get() for idempotent reads (see module docstring); `timeout` is
+    the cap, clamped to the request's deadline. `micro_ttl`
+    (seconds) overrides SUPABASE_MICRO_TTL_MS for this call; `fresh=True`
+    skips every cached copy. `keep_stale=False` neither keeps nor serves a
+    stale copy: for paged reads (iter_rows), where keeping every page would
+    hold the whole result and a stale page could mix with fresh ones.
+
+    The returned Response may be shared: read it (.json(), .text), don't mutate it.
+    """
+    t0 = time.perf_counter()
+    try:
+        resp, served = _get(url, headers, params, timeout, micro_ttl, fresh, keep_stale)
+    except Exception:
+        _call_trace.record("GET", url, None, (time.perf_counter() - t0) * 1000.0)
+        raise
+    _call_trace.record_response(resp, (time.perf_counter() - t0) * 1000.0, served, "GET", url)
+    return resp
+
+
+def _send_write(method: str, url: str, timeout: float = 30, **kwargs) -> requests.Response:
+    t0 = time.perf_counter()
+    try:
+        resp = getattr(requests, method.lower())(url, timeout=_deadline.clamp(timeout), **kwargs)
+    except Exception:
+        _call_trace.record(method, url, None, (time.perf_counter() - t0) * 1000.0)
+        raise
+    _call_trace.record_response(resp, (time.perf_counter() - t0) * 1000.0, method=method, url=url)
+    return resp
+
+
+def post(url: str, timeout: float = 30, **kwargs) -> requests.Response:
+    """requests.post() with the deadline-clamped timeout and call tracing."""
+    return _send_write("POST", url, timeout, **kwargs)
+
+
+def patch(url: str, timeout: float = 30, **kwargs) -> requests.Response:
+    """requests.patch() with the deadline-clamped timeout and call tracing."""
+    return _send_write("PATCH", url, timeout, **kwargs)
+
+
+def forget() -> None:
+    """Drop micro-TTL responses (e.g. right after a write)."""
+    with _lock:
+        _recent.clear()
+
+
+def init_app(app) -> None:
+    @app.after_request
+    def _forget_after_write(response):
+        # after any write in this worker, don't serve pre-write micro-cached reads
+        from flask import request
+        if request.method not in ("GET", "HEAD", "OPTIONS") and _recent:
+            forget()
+        return response
+
+    @app.context_processor
+    def _stale_flag():
+        from flask import has_request_context, request
+        return {"supabase_stale": has_request_context() and bool(request.environ.get("po.supabase_stale"))}
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "inflight": len(_inflight), "micro_cached": len(_recent),
+                "stale_entries": len(_last_good)}
+
+
+def status() -> dict:
+    """Breaker state plus coalescing / stale-serve counters for this worker."""
+    return {"breaker": breaker.snapshot(), "reads": stats(), "pid": os.getpid()}
@@ -0,0 +1,193 @@
+# app/supabase_async.py
+"""
+Async PostgREST access (httpx), alongside the blocking supabase_client.
+
+For `async def` Flask views (Flask[async]; see app/utils/async_views.py for
+the gevent worker) and scripts:
+
+    async with session():
+        po, lines = await gather(fetch_po_detail(a), fetch_line_items_for_po(b))
+
+- One httpx.AsyncClient per event loop; HTTP/2 when the `h2` package is
+  installed (SUPABASE_HTTP2=0 turns it off). Flask (and async_views under
+  gevent) runs each async view in a new loop, so the client lives for one
+  view: its connections are shared by that view's concurrent and paged calls,
+  and session() closes it when the view is done. Nothing is pooled across
+  requests; each async view opens its own connection(s).
+- Auth/headers come from supabase_client (same key selection as sync code).
+- Replica-backed reads aren't duplicated here: callers that can be served
+  locally should keep using the sync fetchers.
+
+Per-worker concurrency for the whole app comes from the gevent worker mode
+(see gunicorn.conf.py); this module is for fanning out inside one request.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.supabase_client import _get_supabase_auth, get_headers
+from app.utils import call_trace, deadline as _deadline
+
+DEFAULT_TIMEOUT = 30.0
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http2_enabled() -> bool:
+    if os.environ.get("SUPABASE_HTTP2", "1").lower() not in {"1", "true", "yes"}:
+        return False
+    try:
+        import h2  # noqa: F401  (httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+def _max_connections() -> int:
+    try:
+        return int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "20"))
+    except ValueError:
+        return 20
+
+
+def client() -> httpx.AsyncClient:
+    """The client for the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    c = _clients.get(loop)
+    if c is None or c.is_closed:
+        base, _ = _get_supabase_auth()
+        c = httpx.AsyncClient(
+            base_url=f"{base}/rest/v1",
+            headers=get_headers(False),
+            http2=_http2_enabled(),
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(max_connections=_max_connections(), max_keepalive_connections=10),
+        )
+        _clients[loop] = c
+    return c
+
+
+async def aclose() -> None:
+    """Close the running loop's client."""
+    c = _clients.pop(asyncio.get_running_loop(), None)
+    if c is not None:
+        await c.aclose()
+
+
+@contextlib.asynccontextmanager
+async def session():
+    """Scope a client to a block (an async view): shared inside, closed after."""
+    try:
+        yield client()
+    finally:
+        await aclose()
+
+
+# ------------------------------
+# Primitives
+# ------------------------------
+
+async def get(rel: str, params=None, timeout: Optional[float] = None) -> List[dict]:
+    resp = await client().get(f"/{rel}", params=params, timeout=_deadline.clamp(timeout or DEFAULT_TIMEOUT))
+    call_trace.record_response(resp)
+    if resp.status_code >= 400:
+        logging.error(f"❌ async GET {rel} {resp.status_code}: {resp.text}")
+    resp.raise_for_status()
+    return resp.json() or []
+
+
+async def iter_rows(rel: str, params, page_size: int = 1000) -> AsyncIterator[dict]:
+    """Async twin of supabase_client.iter_rows (limit/offset paging)."""
+    base_params = list(params.items()) if isinstance(params, dict) else list(params or [])
+    base_params = [(k, v) for k, v in base_params if k not in ("limit", "offset")]
+    offset = 0
+    while True:
+        rows = await get(rel, base_params + [("limit", str(page_size)), ("offset", str(offset))])
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+
+async def rpc(fn: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    resp = await client().post(
+        f"/rpc/{fn}", json=payload, timeout=_deadline.clamp(timeout or DEFAULT_TIMEOUT),
+        headers={"Content-Type": "application/json"},
+    )
+    call_trace.record_response(resp)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def gather(*aws, timeout: Optional[float] = None) -> list:
+    """asyncio.gather with one shared deadline for the whole group."""
+    return await asyncio.wait_for(asyncio.gather(*aws), timeout=_deadline.clamp(timeout or DEFAULT_TIMEOUT))
+
+
+# ------------------------------
+# Fetchers
+# ------------------------------
+
+async def fetch_line_items_for_po(po_id: str, select: str = "*") -> List[dict]:
+    return await get("po_line_items", {
+        "select": select,
+        "po_id": f"eq.{po_id}",
+        "active": "is.true",
+        "order": "id.asc",
+    })
+
+
+async def fetch_po_detail(po_id: str) -> Optional[dict]:
+    """
+    Same shape as supabase_client.fetch_po_detail (live only), in three
+    concurrent stages: PO + line items, then project/contact, then address.
+    """
+    po_rows, line_items = await gather(
+        get("purchase_orders", {
+            "id": f"eq.{po_id}",
+            "select": "*,suppliers(*),po_metadata(*)",
+            "po_metadata.active": "is.true",
+        }),
+        fetch_line_items_for_po(po_id),
+    )
+    if not po_rows:
+        return None
+    po = po_rows[0]
+    po["projectnumber"] = po.get("project_id")
+    po["line_items"] = line_items
+
+    async def _first(rel, params, optional=False):
+        try:
+            rows = await get(rel, params)
+        except httpx.HTTPStatusError:
+            if optional:  # extras only, as in the sync version
+                return None
+            raise
+        return rows[0] if rows else None
+
+    stage2 = {}
+    if po.get("projectnumber"):
+        stage2["project_register"] = _first(
+            "project_register", {"projectnumber": f"eq.{po['projectnumber']}", "select": "*", "limit": "1"}, optional=True)
+    if po.get("delivery_contact_id"):
+        stage2["delivery_contact"] = _first(
+            "delivery_contacts", {"id": f"eq.{po['delivery_contact_id']}", "select": "*"})
+    if stage2:
+        po.update(zip(stage2.keys(), await gather(*stage2.values())))
+
+    if po.get("manual_delivery_address") is None:
+        address_id = po.get("delivery_address_id")
+        if not address_id and po.get("delivery_contact"):
+            address_id = po["delivery_contact"].get("address_id")
+        if address_id:
+            po["delivery_address"] = await _first("suppliers", {"id": f"eq.{address_id}", "select": "*"})
+
+    return po
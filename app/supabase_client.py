@@ -4,6 +4,12 @@ from flask import current_app
 import string
 import uuid
 from collections import defaultdict
+from app.services import replica as _replica
+from app.services import schema_registry as _schema
+from app.services import supabase_http as _http
+from app.services import shared_cache as _cache
+from app.utils.fanout import gather
+from app.utils.line_item_diff import EDITABLE_FIELDS, LineItemDiff, diff_line_items
 
 # ------------------------------
 # Supabase auth / headers
@@ -64,7 +70,7 @@ def insert_delivery_contact(manual: dict) -> str:
     payload["id"] = str(uuid.uuid4())
 
     url = f"{base}/rest/v1/delivery_contacts"
-    resp = requests.post(url, headers={**_headers_with_json(headers), "Prefer": "return=minimal"}, json=payload, timeout=30)
+    resp = _http.post(url, headers={**_headers_with_json(headers), "Prefer": "return=minimal"}, json=payload, timeout=30)
     if resp.status_code >= 400:
         try:
             err = resp.json()
@@ -73,6 +79,7 @@ def insert_delivery_contact(manual: dict) -> str:
         current_app.logger.error("❌ delivery_contacts insert failed %s: %s | payload=%s", resp.status_code, err, payload)
         resp.raise_for_status()
 
+    _cache.invalidate_table("delivery_contacts")
     return payload["id"]
 
 
@@ -89,7 +96,7 @@ def _resolve_projectnumber(base: str, headers: dict, proj: str | None) -> str |
         return None
     if not _is_uuid(proj):
         return proj  # already a projectnumber
-    r = requests.get(
+    r = _http.get(
         f"{base}/rest/v1/projects",
         headers=headers,
         params={"select": "projectnumber", "id": f"eq.{proj}", "limit": 1},
@@ -99,10 +106,11 @@ def _resolve_projectnumber(base: str, headers: dict, proj: str | None) -> str |
     rows = r.json() or []
     return rows[0]["projectnumber"] if rows else None
 
+@_cache.cached("project_register_items", ttl=600)
 def fetch_project_item_options():
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/vw_project_item_options"
-    r = requests.get(
+    r = _http.get(
         url,
         headers=get_headers(False),
         params={"select": "projectnumber,item_seq,line_desc,option_code,option_label",
@@ -137,7 +145,7 @@ def fetch_suppliers():
         "or": "(type.eq.supplier,type.eq.both)",
         "order": "name.asc"
     }
-    r = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    r = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     r.raise_for_status()
     return r.json()
 
@@ -173,7 +181,7 @@ def fetch_projects_map():
     rel = "project_register"
     params = {"select": "projectnumber", "order": "projectnumber.asc", "limit": 10000}
 
-    resp = requests.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
+    resp = _http.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         logging.error("fetch_projects_map: %s failed (%s): %s", rel, resp.status_code, resp.text)
         resp.raise_for_status()
@@ -202,7 +210,7 @@ def fetch_suppliers(limit: int = 10000):
     rel = "suppliers"
     params = {"select": "name", "order": "name.asc", "limit": limit}
 
-    resp = requests.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
+    resp = _http.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         logging.warning("fetch_suppliers: %s failed (%s): %s", rel, resp.status_code, resp.text)
         resp.raise_for_status()
@@ -233,7 +241,7 @@ def suppliers_as_objects():
     import requests
 
     try:
-        r = requests.get(
+        r = _http.get(
             f"{base}/rest/v1/suppliers",
             headers=hdr,
             params={"select": "id,name", "order": "name.asc", "limit": 10000},
@@ -255,6 +263,7 @@ def suppliers_as_objects():
     return out
 
 # ---- OPTIONAL: Suppliers from the active view (if you prefer only names that appear in POs) ----
+@_cache.cached("purchase_orders", ttl=300)
 def fetch_suppliers_from_view(limit: int = 10000):
     """
     Returns a sorted list[str] of supplier names that currently appear in active_po_list.
@@ -266,7 +275,7 @@ def fetch_suppliers_from_view(limit: int = 10000):
     rel = "active_po_list"
     params = {"select": "supplier_name", "order": "supplier_name.asc", "limit": limit}
 
-    resp = requests.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
+    resp = _http.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         logging.warning("fetch_suppliers_from_view: %s failed (%s): %s", rel, resp.status_code, resp.text)
         resp.raise_for_status()
@@ -292,7 +301,10 @@ def fetch_projects():
     ]
 
 
+@_cache.cached("suppliers", ttl=600, bypass=_replica.serving)
 def fetch_delivery_addresses():
+    if _replica.serving():
+        return _replica.delivery_addresses()
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/suppliers"
     params = {
@@ -300,18 +312,43 @@ def fetch_delivery_addresses():
         "or": "(type.eq.delivery,type.eq.both)",
         "order": "name.asc"
     }
-    r = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    r = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     r.raise_for_status()
     return r.json()
 
+@_cache.cached("delivery_contacts", ttl=600, bypass=_replica.serving)
 def fetch_delivery_contacts():
+    if _replica.serving():
+        return _replica.delivery_contacts()
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/delivery_contacts"
     params = {"select": "*", "order": "name.asc"}
-    r = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    r = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     r.raise_for_status()
     return r.json()
 
+@_cache.cached("project_register_items", ttl=600, bypass=_replica.serving)
+def fetch_project_register_items():
+    """
+    Rows for the Project / Item dropdown: [{projectnumber, item_seq, line_desc}, ...]
+    ordered projectnumber desc, item_seq asc.
+    """
+    if _replica.serving():
+        return _replica.project_register_items()
+    base, _ = _get_supabase_auth()
+    r = _http.get(
+        f"{base}/rest/v1/project_register_items",
+        headers=get_headers(False),
+        params={
+            "select": "projectnumber,item_seq,line_desc",
+            "order": "projectnumber.desc,item_seq.asc",
+            "limit": 100000,
+        },
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r.json() or []
+
 # --- Spend report helpers ---
 
 def fetch_last_issued_dates(po_numbers: list[str], first_month_start_iso: str, next_month_start_iso: str):
@@ -343,7 +380,7 @@ def fetch_last_issued_dates(po_numbers: list[str], first_month_start_iso: str, n
         ("limit", "100000"),
     ]
 
-    r = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    r = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     if r.status_code >= 400:
         current_app.logger.error("❌ fetch_last_issued_dates: %s", r.text)
     r.raise_for_status()
@@ -372,6 +409,7 @@ def fetch_last_issued_dates(po_numbers: list[str], first_month_start_iso: str, n
 #     rows = resp.json() or []
 #     return {r["id"]: {"projectnumber": r["projectnumber"], "projectdescription": r["projectdescription"]} for r in rows}
 
+@_cache.cached("project_register", ttl=600)
 def fetch_projects_map():
     """
     Returns { projectnumber: {"projectnumber": str, "projectdescription": ""} }
@@ -383,7 +421,7 @@ def fetch_projects_map():
     rel = "project_register"
     params = {"select": "projectnumber", "order": "projectnumber.asc", "limit": 10000}
 
-    resp = requests.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
+    resp = _http.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         logging.error("fetch_projects_map: %s failed (%s): %s", rel, resp.status_code, resp.text)
         resp.raise_for_status()
@@ -399,18 +437,22 @@ def fetch_projects_map():
     }
 
 
+@_cache.cached("suppliers", ttl=600, bypass=_replica.serving)
 def fetch_suppliers(limit: int = 10000):
     """
     Returns a sorted list[str] of supplier names for dropdown hydration.
     Source: suppliers(name) — full master list (id, name, address, type).
     """
+    if _replica.serving():
+        return _replica.supplier_names()[:limit]
+
     base, _ = _get_supabase_auth()
     headers = get_headers(False)
 
     rel = "suppliers"
     params = {"select": "name", "order": "name.asc", "limit": limit}
 
-    resp = requests.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
+    resp = _http.get(f"{base}/rest/v1/{rel}", headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         logging.warning("fetch_suppliers: %s failed (%s): %s", rel, resp.status_code, resp.text)
         resp.raise_for_status()
@@ -443,7 +485,7 @@ def fetch_purchase_orders_since(first_month_start_iso: str, next_month_start_iso
         ("limit", "100000"),
     ]
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     return resp.json() or []
 
@@ -476,7 +518,7 @@ def fetch_pos_from_po_table(project_id=None, date_from=None, date_to=None,
     if parts:
         params["and"] = f"({','.join(parts)})"
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     rows = resp.json() or []
 
@@ -494,6 +536,9 @@ def fetch_accounts_overview_latest(statuses=("approved", "issued", "complete")):
     Get latest-only PO rows from the accounts_overview view with total_value pre-aggregated.
     Returns [{id, po_number, status, projectnumber, supplier_name, total_value, acc_complete, invoice_reference}]
     """
+    if _replica.serving():
+        return _replica.accounts_overview(statuses=statuses)
+
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/accounts_overview"
     status_list = ",".join(statuses)
@@ -503,7 +548,7 @@ def fetch_accounts_overview_latest(statuses=("approved", "issued", "complete")):
         ("limit", "100000"),
         ("order", "po_number.asc"),  # stable ordering
     ]
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     if resp.status_code >= 400:
         current_app.logger.error("❌ fetch_accounts_overview_latest: %s", resp.text)
     resp.raise_for_status()
@@ -537,17 +582,41 @@ def fetch_po_updated_at_for_ids_in_window(ids: list[str], first_month_start_iso:
         ("order", "updated_at.asc"),
     ]
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     if resp.status_code >= 400:
         current_app.logger.error("❌ fetch_po_updated_at_for_ids_in_window: %s", resp.text)
     resp.raise_for_status()
     return resp.json() or []
 
-def fetch_active_pos_from_view(projectnumber=None, supplier_name=None, status=None, date_from=None, date_to=None,
-                               order_by="updated_at.desc"):
+def iter_rows(rel: str, params, page_size: int = 1000, timeout: int = 30):
+    """
+    Generator over a PostgREST relation, paged with limit/offset.
+    Yields one row dict at a time so callers (e.g. exports) never hold the full
+    result set in memory. `params` may be a dict or a list of (key, value) tuples;
+    include an "order" so pages are stable.
+    """
     base, _ = _get_supabase_auth()
-    url = f"{base}/rest/v1/active_po_list"
+    url = f"{base}/rest/v1/{rel}"
+    headers = get_headers(False)
+    base_params = list(params.items()) if isinstance(params, dict) else list(params or [])
+    base_params = [(k, v) for k, v in base_params if k not in ("limit", "offset")]
+
+    offset = 0
+    while True:
+        page_params = base_params + [("limit", str(page_size)), ("offset", str(offset))]
+        resp = _http.get(url, headers=headers, params=page_params, timeout=timeout, keep_stale=False)
+        if resp.status_code >= 400:
+            current_app.logger.error("❌ iter_rows %s: %s", rel, resp.text)
+        resp.raise_for_status()
+        rows = resp.json() or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        offset += page_size
 
+
+def _active_pos_params(projectnumber=None, supplier_name=None, status=None, date_from=None, date_to=None,
+                       order_by="updated_at.desc"):
     params = {
         "select": "*",
     }
@@ -570,8 +639,50 @@ def fetch_active_pos_from_view(projectnumber=None, supplier_name=None, status=No
 
     if order_by:
         params["order"] = order_by
+    return params
+
+
+def iter_active_pos_from_view(page_size: int = 1000, **filters):
+    """
+    Paged variant of fetch_active_pos_from_view() for streamed exports and pages.
+    Accepts the same keyword filters.
+    """
+    if _replica.serving():
+        return iter(_replica.active_pos(**filters))
+    params = _active_pos_params(**filters)
+    if "order" in params:
+        # tie-break on id so limit/offset pages never overlap
+        params["order"] = f"{params['order']},id.asc"
+    else:
+        params["order"] = "id.asc"
+    return iter_rows("active_po_list", params, page_size=page_size)
+
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+def fetch_active_pos_from_view(projectnumber=None, supplier_name=None, status=None, date_from=None, date_to=None,
+                               order_by="updated_at.desc"):
+    if _replica.serving():
+        return _replica.active_pos(
+            projectnumber=projectnumber,
+            supplier_name=supplier_name,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            order_by=order_by,
+        )
+
+    base, _ = _get_supabase_auth()
+    url = f"{base}/rest/v1/active_po_list"
+
+    params = _active_pos_params(
+        projectnumber=projectnumber,
+        supplier_name=supplier_name,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+        order_by=order_by,
+    )
+
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     return resp.json() or []
 
@@ -606,7 +717,7 @@ def fetch_pos_latest_from_po_table(project_id=None, date_from=None, date_to=None
     if parts:
         params["and"] = f"({','.join(parts)})"
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     rows = resp.json() or []
 
@@ -629,6 +740,8 @@ def fetch_last_issued_dates_any(po_numbers: list[str]) -> dict[str, str]:
     """
     if not po_numbers:
         return {}
+    if _replica.serving():
+        return _replica.last_issued_dates_any(po_numbers)
 
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/purchase_orders"
@@ -643,7 +756,7 @@ def fetch_last_issued_dates_any(po_numbers: list[str]) -> dict[str, str]:
         ("limit", "100000"),
     ]
 
-    r = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    r = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     if r.status_code >= 400:
         current_app.logger.error("❌ fetch_last_issued_dates_any: %s", r.text)
     r.raise_for_status()
@@ -684,24 +797,25 @@ def _extract_manual_delivery_contact(data: dict) -> dict | None:
 # PO insert / update
 # ------------------------------
 
-def insert_po_bundle(data):
+def _po_bundle_payloads(data):
+    """
+    (manual_contact | None, purchase_orders payload, po_metadata payload) for a
+    new PO / revision. purchase_orders gets no delivery_contact_id yet when a
+    manual contact still has to be created.
+    """
     status    = data.get("status", "draft")
     revision  = data.get("current_revision", "a")
     po_number = data.get("po_number")
 
     # Resolve delivery_contact_id: prefer existing, else build from manual_* if address present
     delivery_contact_id = data.get("delivery_contact_id") or None
+    manual = None
     if not delivery_contact_id:
         manual = _extract_manual_delivery_contact(data)
-        if manual and manual.get("address_id"):
-            try:
-                delivery_contact_id = insert_delivery_contact(manual)
-            except Exception as e:
-                current_app.logger.error("❌ Manual delivery contact create failed: %s", e)
-        else:
+        if not (manual and manual.get("address_id")):
             current_app.logger.info("ℹ️ Skipping delivery_contacts insert (no manual or missing address_id).")
+            manual = None
 
-    # ---- Step 1: purchase_orders (only request id back) ----
     po_payload = {
         "project_id":          data["project_id"],
         "item_seq":            data["item_seq"],
@@ -714,15 +828,32 @@ def insert_po_bundle(data):
     }
 
     # 🚧 IMPORTANT: do NOT let legacy keys leak into purchase_orders
-    allowed = {
-        "project_id","item_seq","supplier_id","status","current_revision",
-        "delivery_contact_id","po_number","last_release"
+    po_payload = _schema.clean_payload("purchase_orders", po_payload, drop_none=True)
+
+    meta_payload = {
+        "delivery_terms":             data.get("delivery_terms", ""),
+        "delivery_date":              data.get("delivery_date"),
+        "supplier_contact_name":      data.get("supplier_contact_name", ""),
+        "supplier_reference_number":  data.get("supplier_reference_number", ""),
+        "test_certificates_required": bool(data.get("test_certificates_required", False)),
+        "active":                     True,
     }
-    po_payload = {k: v for k, v in po_payload.items() if v is not None and k in allowed}
+    meta_payload = _schema.clean_payload("po_metadata", meta_payload)
+    return manual, po_payload, meta_payload
+
+
+def insert_po_bundle(data):
+    manual, po_payload, meta_payload = _po_bundle_payloads(data)
+    if manual:
+        try:
+            po_payload["delivery_contact_id"] = insert_delivery_contact(manual)
+        except Exception as e:
+            current_app.logger.error("❌ Manual delivery contact create failed: %s", e)
 
+    # ---- Step 1: purchase_orders (only request id back) ----
     base, _ = _get_supabase_auth()
     po_url = f"{base}/rest/v1/purchase_orders?select=id"
-    po_resp = requests.post(po_url, headers=get_headers(), json=po_payload, timeout=30)
+    po_resp = _http.post(po_url, headers=get_headers(), json=po_payload, timeout=30)
 
     if po_resp.status_code >= 400:
         try:
@@ -735,18 +866,10 @@ def insert_po_bundle(data):
     po_id = po_resp.json()[0]["id"]
 
     # ---- Step 2: po_metadata ----
-    meta_payload = {
-        "po_id":                      po_id,
-        "delivery_terms":             data.get("delivery_terms", ""),
-        "delivery_date":              data.get("delivery_date"),
-        "supplier_contact_name":      data.get("supplier_contact_name", ""),
-        "supplier_reference_number":  data.get("supplier_reference_number", ""),
-        "test_certificates_required": bool(data.get("test_certificates_required", False)),
-        "active":                     True,
-    }
+    meta_payload = {"po_id": po_id, **meta_payload}
 
     meta_url = f"{base}/rest/v1/po_metadata"
-    meta_resp = requests.post(meta_url, headers=get_headers(), json=meta_payload, timeout=30)
+    meta_resp = _http.post(meta_url, headers=get_headers(), json=meta_payload, timeout=30)
     if meta_resp.status_code >= 400:
         try:
             err = meta_resp.json()
@@ -758,15 +881,145 @@ def insert_po_bundle(data):
 
     return po_id
 
+
+def _rpc_missing(resp) -> bool:
+    """PostgREST's answer when a database function isn't installed (or the schema cache is stale)."""
+    if resp.status_code != 404:
+        return False
+    try:
+        return (resp.json() or {}).get("code") == "PGRST202"
+    except Exception:
+        return False
+
+
+def create_po_revision(old_po_id, data, line_items):
+    """
+    Snapshot a PO into a new revision: deactivate the old revision's metadata
+    and line items, then insert purchase_orders + po_metadata + line items
+    (and a manual delivery contact, if given). Returns the new PO id.
+
+    One round trip to the create_po_revision database function
+    (sql/po_revision_functions.sql), so the bump is all-or-nothing. If the
+    function isn't installed yet, falls back to the old step-by-step writes.
+    """
+    manual, po_payload, meta_payload = _po_bundle_payloads(data)
+    items = [{k: v for k, v in it.items() if k not in ("id", "po_id")} for it in (line_items or [])]
+
+    base, _ = _get_supabase_auth()
+    resp = _http.post(
+        f"{base}/rest/v1/rpc/create_po_revision",
+        headers=get_headers(),
+        json={
+            "p_old_po_id": old_po_id,
+            "p_po": po_payload,
+            "p_metadata": meta_payload,
+            "p_line_items": items,
+            "p_contact": {
+                "id": str(uuid.uuid4()),  # client-side, like insert_delivery_contact
+                "name": manual["name"],
+                "email": manual["email"] or None,
+                "phone": manual["phone"] or None,
+                "address_id": manual["address_id"],
+            } if manual else None,
+        },
+        timeout=30,
+    )
+    if _rpc_missing(resp):
+        current_app.logger.warning("⚠️ rpc/create_po_revision not installed; using step-by-step revision writes")
+        deactivate_po_data(old_po_id)
+        new_po_id = insert_po_bundle(data)
+        insert_line_items([{**it, "po_id": new_po_id} for it in items])
+        return new_po_id
+
+    if resp.status_code >= 400:
+        current_app.logger.error("❌ create_po_revision failed %s: %s | po=%s", resp.status_code, resp.text, po_payload)
+    resp.raise_for_status()
+    if manual:
+        # the function inserted the contact; insert_delivery_contact does this on the step-by-step path
+        _cache.invalidate_table("delivery_contacts")
+    return resp.json()
+
 def insert_line_items(items):
     if not items:
         return
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/po_line_items"
-    resp = requests.post(url, headers=get_headers(), json=items, timeout=30)
+    # always new rows (new PO / new revision): drop ids carried over from the form
+    payload = [_schema.clean_payload("po_line_items", it) for it in items]
+    resp = _http.post(url, headers=get_headers(), json=payload, timeout=30)
     resp.raise_for_status()
 
 
+def save_line_items(po_id, items) -> LineItemDiff:
+    """
+    Save the submitted line items onto an existing PO revision in place:
+    diff against the stored active rows (app/utils/line_item_diff.py) and send
+    at most one batched INSERT, one PATCH per changed row and one PATCH to
+    deactivate removed rows. Line-item ids (and the expediting data on them)
+    survive. Returns the diff that was applied.
+    """
+    base, _ = _get_supabase_auth()
+    url = f"{base}/rest/v1/po_line_items"
+
+    stored_resp = _http.get(
+        url,
+        headers=get_headers(False),
+        params={
+            "po_id": f"eq.{po_id}",
+            "active": "is.true",
+            "select": "id," + ",".join(EDITABLE_FIELDS),
+        },
+        timeout=30,
+        fresh=True,  # the diff must see the rows as they are now
+    )
+    stored_resp.raise_for_status()
+    diff = diff_line_items(stored_resp.json() or [], items)
+    written = []
+
+    if diff.inserts:
+        payload = [_schema.clean_payload("po_line_items", {**it, "po_id": po_id, "active": True})
+                   for it in diff.inserts]
+        resp = _http.post(url, headers=get_headers(), json=payload, timeout=30)
+        resp.raise_for_status()
+        written += resp.json() or []
+
+    if diff.updates:
+        # one PATCH per changed row, keyed on its id (sent concurrently): only
+        # the listed columns are set, and a row can never be inserted here
+        def _patch(u):
+            resp = _http.patch(
+                url,
+                headers=get_headers(),
+                params={"id": f"eq.{u['id']}", "po_id": f"eq.{po_id}"},
+                json=_schema.clean_payload("po_line_items", u),
+                timeout=30,
+            )
+            resp.raise_for_status()
+            return resp.json() or []
+
+        patched = gather({u["id"]: (lambda u=u: _patch(u)) for u in diff.updates})
+        for u in diff.updates:
+            written += patched[u["id"]]
+
+    if diff.deactivate_ids:
+        resp = _http.patch(
+            url,
+            headers=get_headers(),
+            params={"po_id": f"eq.{po_id}", "id": f"in.({','.join(diff.deactivate_ids)})"},
+            json={"active": False},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        written += resp.json() or []
+
+    current_app.logger.info(
+        "Line items for PO %s: %d inserted, %d updated, %d deactivated, %d unchanged",
+        po_id, len(diff.inserts), len(diff.updates), len(diff.deactivate_ids), len(diff.unchanged_ids),
+    )
+    _replica.absorb_rows("po_line_items", written)
+    return diff
+
+
 def fetch_all_pos(project_id=None):
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/purchase_orders"
@@ -784,7 +1037,7 @@ def fetch_all_pos(project_id=None):
         if pn:
             params["project_id"] = f"eq.{pn}"
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     rows = resp.json() or []
 
@@ -820,60 +1073,76 @@ def fetch_active_pos(project_id=None, date_from=None, date_to=None, order_by="up
     if parts:
         params["and"] = f"({','.join(parts)})"
 
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 def fetch_po_detail(po_id):
     print(f"🔍 Fetching PO {po_id}")
+    if _replica.serving():
+        po = _replica.po_detail(po_id)
+        if po is not None:
+            return po
     base, _ = _get_supabase_auth()
     headers = get_headers(False)
 
-    # Step 1: PO + metadata + supplier (no project_register embed)
-    po_url = f"{base}/rest/v1/purchase_orders"
-    po_params = {
-        "id": f"eq.{po_id}",
-        "select": "*,suppliers(*),po_metadata(*)",
-        "po_metadata.active": "is.true"
-    }
-    po_resp = requests.get(po_url, headers=headers, params=po_params, timeout=30)
-    po_resp.raise_for_status()
+    # Step 1: PO + metadata + supplier (no project_register embed), with line items alongside
+    def _po():
+        po_url = f"{base}/rest/v1/purchase_orders"
+        po_params = {
+            "id": f"eq.{po_id}",
+            "select": "*,suppliers(*),po_metadata(*)",
+            "po_metadata.active": "is.true"
+        }
+        po_resp = _http.get(po_url, headers=headers, params=po_params, timeout=30)
+        po_resp.raise_for_status()
+        return po_resp
+
+    def _line_items():
+        li_url = f"{base}/rest/v1/po_line_items"
+        li_params = {"po_id": f"eq.{po_id}", "active": "is.true", "select": "*"}
+        li_resp = _http.get(li_url, headers=headers, params=li_params, timeout=30)
+        li_resp.raise_for_status()
+        return li_resp.json()
+
+    first = gather({"po": _po, "line_items": _line_items})
 
     try:
-        po = po_resp.json()[0]
+        po = first["po"].json()[0]
     except Exception as e:
         print(f"❌ JSON error: {e}")
         return None
 
     # Derive 'projectnumber' from project_id
     po["projectnumber"] = po.get("project_id")
+    po["line_items"] = first["line_items"]
 
-    # Step 1b: (Optional) fetch project_register row if you need extra fields (e.g., client_id)
-    if po.get("projectnumber"):
+    # Step 2: project_register row (optional extras, e.g. client_id) and delivery contact
+    def _project_register():
         pr_url = f"{base}/rest/v1/project_register"
         pr_params = {"projectnumber": f"eq.{po['projectnumber']}", "select": "*", "limit": "1"}
-        pr_resp = requests.get(pr_url, headers=headers, params=pr_params, timeout=15)
+        pr_resp = _http.get(pr_url, headers=headers, params=pr_params, timeout=15)
         if pr_resp.ok:
             pr_rows = pr_resp.json() or []
-            po["project_register"] = pr_rows[0] if pr_rows else None
-
-    # Step 2: line items
-    li_url = f"{base}/rest/v1/po_line_items"
-    li_params = {"po_id": f"eq.{po_id}", "active": "is.true", "select": "*"}
-    li_resp = requests.get(li_url, headers=headers, params=li_params, timeout=30)
-    li_resp.raise_for_status()
-    po["line_items"] = li_resp.json()
+            return pr_rows[0] if pr_rows else None
+        return None
 
-    # Step 3: delivery contact
-    if po.get("delivery_contact_id"):
+    def _delivery_contact():
         dc_url = f"{base}/rest/v1/delivery_contacts"
         dc_params = {"id": f"eq.{po['delivery_contact_id']}", "select": "*"}
-        dc_resp = requests.get(dc_url, headers=headers, params=dc_params, timeout=30)
+        dc_resp = _http.get(dc_url, headers=headers, params=dc_params, timeout=30)
         dc_resp.raise_for_status()
         dc_results = dc_resp.json()
-        po["delivery_contact"] = dc_results[0] if dc_results else None
+        return dc_results[0] if dc_results else None
 
-    # Step 4: delivery address (if not manual)
+    second = {}
+    if po.get("projectnumber"):
+        second["project_register"] = _project_register
+    if po.get("delivery_contact_id"):
+        second["delivery_contact"] = _delivery_contact
+    po.update(gather(second))
+
+    # Step 3: delivery address (if not manual)
     if po.get("manual_delivery_address") is None:
         address_id = po.get("delivery_address_id")
         if not address_id and po.get("delivery_contact"):
@@ -882,7 +1151,7 @@ def fetch_po_detail(po_id):
         if address_id:
             da_url = f"{base}/rest/v1/suppliers"
             da_params = {"id": f"eq.{address_id}", "select": "*"}
-            da_resp = requests.get(da_url, headers=headers, params=da_params, timeout=30)
+            da_resp = _http.get(da_url, headers=headers, params=da_params, timeout=30)
             da_resp.raise_for_status()
             da_results = da_resp.json()
             po["delivery_address"] = da_results[0] if da_results else None
@@ -893,15 +1162,15 @@ def deactivate_po_data(po_id):
     base, _ = _get_supabase_auth()
     meta_url = f"{base}/rest/v1/po_metadata"
     item_url = f"{base}/rest/v1/po_line_items"
-    requests.patch(meta_url, headers=get_headers(), params={"po_id": f"eq.{po_id}"}, json={"active": False}, timeout=30)
-    requests.patch(item_url, headers=get_headers(), params={"po_id": f"eq.{po_id}"}, json={"active": False}, timeout=30)
+    _http.patch(meta_url, headers=get_headers(), params={"po_id": f"eq.{po_id}"}, json={"active": False}, timeout=30)
+    _http.patch(item_url, headers=get_headers(), params={"po_id": f"eq.{po_id}"}, json={"active": False}, timeout=30)
 
 
 def insert_po_metadata(meta):
     meta["active"] = True
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/po_metadata"
-    resp = requests.post(url, headers=get_headers(), json=meta, timeout=30)
+    resp = _http.post(url, headers=get_headers(), json=meta, timeout=30)
     resp.raise_for_status()
 
 
@@ -913,7 +1182,7 @@ def get_next_revision(po_id, status):
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/purchase_orders"
     params = {"id": f"eq.{po_id}", "select": "current_revision,status"}
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30, fresh=True)
     resp.raise_for_status()
     po = resp.json()[0]
     current = po.get("current_revision")
@@ -953,7 +1222,7 @@ def get_next_revision(po_id, status):
         patch_params = {"id": f"eq.{po_id}"}
         now = datetime.utcnow().isoformat()
         patch_data = {"last_release": now}
-        requests.patch(
+        _http.patch(
             patch_url, headers=get_headers(), params=patch_params, json=patch_data, timeout=30
         )
 
@@ -971,21 +1240,25 @@ def fetch_all_po_revisions(po_number: int):
         "po_number": f"eq.{po_number}",
         "select": "id,current_revision"
     }
-    response = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    response = _http.get(url, headers=get_headers(False), params=params, timeout=30)
     response.raise_for_status()
     return response.json()
 
 
+@_cache.cached("purchase_orders", ttl=60, bypass=_replica.serving)
 def fetch_project_po_summary():
     """
     Build dashboard counts from active_po_list (already filtered to current/active rows).
     Treat anything not 'draft' as active (approved/released/issued/etc.).
     Returns: [{project: "P123", projectnumber: "P123", draft: 1, active: 2}, ...]
     """
+    if _replica.serving():
+        return _replica.project_po_summary()
+
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/active_po_list"
     params = {"select": "project_id,status"}
-    resp = requests.get(url, headers=get_headers(False), params=params, timeout=30)
+    resp = _http.get(url, headers=get_headers(False), params=params, timeout=30)
 
     if resp.status_code >= 400:
         try:
@@ -1021,6 +1294,9 @@ def fetch_accounts_overview():
     """
     Read from the accounts_overview view (pre-aggregated totals).
     """
+    if _replica.serving():
+        return _replica.accounts_overview()
+
     base, _ = _get_supabase_auth()
     url = f"{base}/rest/v1/accounts_overview"
     headers = get_headers(False)
@@ -1028,13 +1304,26 @@ def fetch_accounts_overview():
         "select": "id,po_number,status,total_value,acc_complete,invoice_reference,projectnumber,supplier_name",
         "order": "po_number.asc",
     }
-    resp = requests.get(url, headers=headers, params=params, timeout=30)
+    resp = _http.get(url, headers=headers, params=params, timeout=30)
     if not resp.ok:
         current_app.logger.error("fetch_accounts_overview failed: %s", resp.text)
         return []
     return resp.json()
 
 
+def iter_accounts_overview(page_size: int = 1000):
+    """
+    Paged variant of fetch_accounts_overview() for streamed exports and pages.
+    """
+    if _replica.serving():
+        return iter(_replica.accounts_overview())
+    params = {
+        "select": "id,po_number,status,total_value,acc_complete,invoice_reference,projectnumber,supplier_name",
+        "order": "po_number.asc,id.asc",
+    }
+    return iter_rows("accounts_overview", params, page_size=page_size)
+
+
 
 def update_po_accounts_fields(po_id: str, acc_complete=None, invoice_reference=None):
     """
@@ -1054,7 +1343,7 @@ def update_po_accounts_fields(po_id: str, acc_complete=None, invoice_reference=N
     headers = get_headers()
     params = {"id": f"eq.{po_id}"}
 
-    resp = requests.patch(url, headers=headers, params=params, json=payload, timeout=30)
+    resp = _http.patch(url, headers=headers, params=params, json=payload, timeout=30)
     ok = resp.ok
     if not ok:
         current_app.logger.error("update_po_accounts_fields failed: %s", resp.text)
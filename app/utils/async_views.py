@@ -0,0 +1,41 @@
+# app/utils/async_views.py
+"""
+Running `async def` views under every gunicorn worker mode.
+
+Flask runs async views through asgiref's AsyncToSync, which refuses to start
+a loop when another greenlet in the same OS thread already has one running,
+i.e. under the gevent worker. There, each async view instead runs on its own
+event loop in gevent's native thread pool, and the calling greenlet yields
+until it finishes. The sync and gthread workers keep Flask's default.
+"""
+import asyncio
+import contextvars
+import functools
+
+
+def _gevent_patched() -> bool:
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("threading")
+
+
+def init_app(app) -> None:
+    default = app.async_to_sync
+
+    def async_to_sync(func):
+        if not _gevent_patched():
+            return default(func)
+
+        from gevent import get_hub
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            # carry the request/app context into the worker thread
+            ctx = contextvars.copy_context()
+            return get_hub().threadpool.apply(ctx.run, (asyncio.run, func(*args, **kwargs)))
+
+        return run
+
+    app.async_to_sync = async_to_sync
@@ -0,0 +1,181 @@
+# app/utils/call_trace.py
+"""
+Per-request record of every outbound data call (Supabase REST/RPC, Graph).
+
+Each call adds {table, method, status, ms, bytes, rows, served} to a list on
+the current request; fan-out threads share the request, so their calls land
+in the same list. After the request:
+
+- a Server-Timing header breaks the time down per table, e.g.
+      Server-Timing: sb;dur=412.0;desc="9 calls", sb-po_line_items;dur=220.5;desc="6 calls"
+  (browser devtools -> Network -> Timing shows it);
+- one JSON log line on the "po.calls" logger summarises the calls and flags
+  a table hit more than CALL_TRACE_REPEAT_THRESHOLD times (default 4), the
+  usual N+1 shape.
+
+For a streamed response (list pages, exports) the header only covers calls
+made before the body started; the log line waits until the body is sent.
+
+`served` is "upstream", or how supabase_http answered without a call of its
+own ("coalesced", "micro", "stale"). CALL_TRACE_ENABLED=0 turns it all off.
+Outside a request (sync threads, scripts) nothing is recorded here, but
+every call still feeds the /metrics histograms (app/utils/metrics.py).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from flask import has_request_context, request
+
+from app.utils import metrics
+
+_ENV_KEY = "po.calls"
+_MAX_TIMING_ENTRIES = 8
+
+log = logging.getLogger("po.calls")
+
+
+def enabled() -> bool:
+    return os.environ.get("CALL_TRACE_ENABLED", "1").lower() in {"1", "true", "yes"}
+
+
+def _repeat_threshold() -> int:
+    try:
+        return int(os.environ.get("CALL_TRACE_REPEAT_THRESHOLD", "4"))
+    except ValueError:
+        return 4
+
+
+def table_of(url: str) -> str:
+    """purchase_orders / rpc/create_po_revision / graph / <host> from a call URL."""
+    parts = urlsplit(str(url))
+    path = parts.path
+    if "/rest/v1/" in path:
+        rest = path.split("/rest/v1/", 1)[1].strip("/")
+        segs = rest.split("/")
+        return "/".join(segs[:2]) if segs[0] == "rpc" else (segs[0] or "openapi")
+    if parts.hostname and "graph.microsoft.com" in parts.hostname:
+        return "graph"
+    return parts.hostname or "?"
+
+
+def _rows_from_content_range(value: Optional[str]) -> Optional[int]:
+    # PostgREST: "0-24/*", "*/0", "0-0/1"
+    if not value:
+        return None
+    span = value.split("/", 1)[0]
+    if span == "*":
+        return 0
+    try:
+        a, b = span.split("-", 1)
+        return int(b) - int(a) + 1
+    except ValueError:
+        return None
+
+
+def record(method: str, url: str, status: Optional[int], ms: float, nbytes: Optional[int] = None,
+           rows: Optional[int] = None, served: str = "upstream") -> None:
+    table = table_of(url)
+    metrics.observe_call(table, method.upper(), status, ms / 1000.0, served)
+    if not enabled() or not has_request_context():
+        return
+    request.environ.setdefault(_ENV_KEY, []).append({
+        "table": table,
+        "method": method.upper(),
+        "status": status,
+        "ms": round(ms, 1),
+        "bytes": nbytes,
+        "rows": rows,
+        "served": served,
+    })
+
+
+def record_response(resp, ms: Optional[float] = None, served: str = "upstream",
+                    method: Optional[str] = None, url: Optional[str] = None) -> None:
+    """Record a requests/httpx response (latency from resp.elapsed unless given)."""
+    try:
+        if ms is None:
+            ms = resp.elapsed.total_seconds() * 1000.0
+        if method is None or url is None:
+            method, url = resp.request.method, str(resp.request.url)
+        record(method, url, resp.status_code, ms,
+               nbytes=len(resp.content) if served == "upstream" else 0,
+               rows=_rows_from_content_range(resp.headers.get("Content-Range")), served=served)
+    except Exception as e:  # tracing must never fail the call it describes
+        log.debug(f"call_trace: could not record {url}: {e}")
+
+
+def hook(resp, *args, **kwargs):
+    """requests response hook: requests.post(..., hooks={"response": call_trace.hook})."""
+    record_response(resp)
+    return resp
+
+
+def calls() -> List[dict]:
+    if not has_request_context():
+        return []
+    return request.environ.get(_ENV_KEY, [])
+
+
+def by_table(entries: List[dict]) -> Dict[str, dict]:
+    out: Dict[str, dict] = defaultdict(lambda: {"calls": 0, "ms": 0.0, "bytes": 0, "rows": 0})
+    for c in entries:
+        t = out[c["table"]]
+        t["calls"] += 1
+        t["ms"] = round(t["ms"] + c["ms"], 1)
+        t["bytes"] += c["bytes"] or 0
+        t["rows"] += c["rows"] or 0
+    return dict(out)
+
+
+def _n_calls(n: int) -> str:
+    return f"{n} call" if n == 1 else f"{n} calls"
+
+
+def server_timing(entries: List[dict]) -> str:
+    tables = sorted(by_table(entries).items(), key=lambda kv: -kv[1]["ms"])
+    total = sum(c["ms"] for c in entries)
+    parts = [f'sb;dur={total:.1f};desc="{_n_calls(len(entries))}"']
+    for name, t in tables[:_MAX_TIMING_ENTRIES]:
+        token = "sb-" + "".join(ch if ch.isalnum() or ch in "-_" else "-" for ch in name)
+        parts.append(f'{token};dur={t["ms"]:.1f};desc="{_n_calls(t["calls"])}"')
+    return ", ".join(parts)
+
+
+def _log_calls(entries: List[dict], path: str, method: str, status: int) -> None:
+    if not entries:
+        return
+    tables = by_table(entries)
+    limit = _repeat_threshold()
+    repeated = {name: t["calls"] for name, t in tables.items() if t["calls"] > limit}
+    log.info(json.dumps({
+        "path": path,
+        "method": method,
+        "status": status,
+        "calls": len(entries),
+        "call_ms": round(sum(c["ms"] for c in entries), 1),
+        "tables": tables,
+        "repeated": repeated,
+        "slowest": max(entries, key=lambda c: c["ms"]),
+    }, default=str))
+
+
+def init_app(app) -> None:
+    @app.after_request
+    def _emit_call_trace(response):
+        entries = calls()
+        if entries:
+            response.headers.add("Server-Timing", server_timing(entries))
+        if response.is_streamed and enabled():
+            # a streamed body (pages, exports) makes more calls after this
+            # hook; the log line waits until it has been sent
+            environ, path, method, status = request.environ, request.path, request.method, response.status_code
+            response.call_on_close(lambda: _log_calls(environ.get(_ENV_KEY, []), path, method, status))
+        else:
+            _log_calls(entries, request.path, request.method, response.status_code)
+        return response
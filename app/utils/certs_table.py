@@ -3,10 +3,33 @@ import os
 from functools import lru_cache
 from flask import current_app
 
-@lru_cache(maxsize=1)
-def load_certs_table():
+from app.utils.jinja_cache import render_fragment
+
+
+def _certs_table_path():
     # Resolve path relative to app root
     base = os.path.dirname(current_app.root_path) if current_app else os.getcwd()
-    path = os.path.join(base, "app", "data", "certs_table.json")
+    return os.path.join(base, "app", "data", "certs_table.json")
+
+
+def certs_table_version():
+    """mtime of certs_table.json: editing the file refreshes the table without a restart."""
+    try:
+        return os.stat(_certs_table_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _load(path, version):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+def load_certs_table():
+    return _load(_certs_table_path(), certs_table_version())
+
+
+def certs_table_html():
+    """partials/certs_table.html, rendered once per certs_table.json version."""
+    return render_fragment("partials/certs_table.html", certs_table_version(), certs_table=load_certs_table())
@@ -0,0 +1,71 @@
+# app/utils/deadline.py
+"""
+One time budget per request, shared by every outbound call it makes.
+
+Each request gets REQUEST_DEADLINE_SECONDS (default 90, kept below
+gunicorn's 120 s worker timeout). Outbound calls pass their usual cap through
+clamp():
+
+    requests.post(url, ..., timeout=deadline.clamp(30))
+
+clamp() returns the smaller of the cap and what is left of the budget, and
+raises DeadlineExceeded (a requests.Timeout) once it is spent. Unhandled
+timeouts become a 504, so a page that makes many calls fails cleanly instead
+of having its worker killed.
+Outside a request (sync thread, scripts) the cap is returned unchanged.
+
+The deadline lives on the request object, so fan-out threads
+(copy_current_request_context) share it.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+import requests
+from flask import has_request_context, render_template, request
+
+_ENV_KEY = "po.deadline"
+MIN_CALL_SECONDS = 0.5  # less than this left isn't worth starting a call
+
+
+class DeadlineExceeded(requests.Timeout):
+    pass
+
+
+def _budget_seconds() -> float:
+    try:
+        return float(os.environ.get("REQUEST_DEADLINE_SECONDS", "90"))
+    except ValueError:
+        return 90.0
+
+
+def remaining() -> Optional[float]:
+    """Seconds left for this request, or None outside a request."""
+    if not has_request_context():
+        return None
+    at = request.environ.get(_ENV_KEY)
+    if at is None:
+        at = request.environ[_ENV_KEY] = time.monotonic() + _budget_seconds()
+    return at - time.monotonic()
+
+
+def clamp(timeout: float) -> float:
+    left = remaining()
+    if left is None:
+        return timeout
+    if left < MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"Request deadline ({_budget_seconds():.0f}s) spent")
+    return min(timeout, left)
+
+
+def init_app(app) -> None:
+    @app.before_request
+    def _start_clock():
+        request.environ[_ENV_KEY] = time.monotonic() + _budget_seconds()
+
+    # DeadlineExceeded, and a call cut short by its clamped timeout, that no view handled
+    @app.errorhandler(requests.Timeout)
+    def _deadline_exceeded(e):
+        return render_template("504.html"), 504
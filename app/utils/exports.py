@@ -0,0 +1,247 @@
+# app/utils/exports.py
+"""
+Streaming CSV / XLSX writers for table exports.
+
+Columns are (header, key, kind) tuples:
+  - header: column title
+  - key:    dict key, or a callable(row) -> value
+  - kind:   "text" | "money" | "date"
+
+Rows are consumed lazily (any iterable, typically supabase_client.iter_rows),
+so an export never holds more than one flush batch in memory.
+"""
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+
+from flask import Response, stream_with_context
+
+from app.utils.filters import accounting_number, format_date
+
+EXPORT_FORMATS = {"csv", "xlsx"}
+
+CSV_MIMETYPE = "text/csv; charset=utf-8"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_DATE_FMT = "%d/%m/%Y"
+FLUSH_EVERY = 200  # rows per yielded chunk
+
+
+def _cell_value(row: dict, key):
+    return key(row) if callable(key) else row.get(key)
+
+
+def _format_text(value, kind: str) -> str:
+    if kind == "money":
+        return accounting_number(value)
+    if kind == "date":
+        return format_date(value, EXPORT_DATE_FMT)
+    return "" if value is None else str(value)
+
+
+def _to_number(value):
+    """Money cells go into XLSX as real numbers; returns None if not numeric."""
+    if value is None or value == "":
+        return 0.0
+    try:
+        return float(str(value).strip().replace(",", "").replace("£", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+# ------------------------------
+# CSV
+# ------------------------------
+
+def stream_csv(columns, rows, flush_every: int = FLUSH_EVERY):
+    """Yield UTF-8 CSV bytes (with BOM so Excel picks up '£'), a batch of rows at a time."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    writer.writerow([header for header, _, _ in columns])
+    yield ("\ufeff" + buf.getvalue()).encode("utf-8")
+    buf.seek(0)
+    buf.truncate(0)
+
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_format_text(_cell_value(row, key), kind) for _, key, kind in columns])
+        if i % flush_every == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+# ------------------------------
+# XLSX (minimal SpreadsheetML, streamed through zipfile)
+# ------------------------------
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Style 0 = default, 1 = accounting number (matches the `accounting_number` filter), 2 = bold header
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="#,##0.00;(#,##0.00)"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _xlsx_workbook(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{xml_escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+# characters XML 1.0 can't hold (e.g. a \x0b pasted from Word): one would make the whole sheet unreadable
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def _xlsx_inline(text: str, style: int = 0) -> str:
+    s = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{s}><is><t xml:space="preserve">{xml_escape(_XML_INVALID.sub("", text))}</t></is></c>'
+
+
+def _xlsx_row(columns, row: dict) -> str:
+    cells = []
+    for _, key, kind in columns:
+        value = _cell_value(row, key)
+        if kind == "money":
+            n = _to_number(value)
+            if n is not None:
+                cells.append(f'<c s="1"><v>{n!r}</v></c>')
+                continue
+        cells.append(_xlsx_inline(_format_text(value, kind)))
+    return "<row>" + "".join(cells) + "</row>"
+
+
+class _ChunkSink:
+    """Write-only file object that zipfile writes into; drained by the generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def stream_xlsx(columns, rows, sheet_name: str = "Export", flush_every: int = FLUSH_EVERY):
+    """
+    Yield an .xlsx file as bytes chunks. Cells use inline strings (no shared
+    string table) and the zip is written with data descriptors, so memory stays
+    flat no matter how many rows are exported.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _xlsx_workbook(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _XLSX_STYLES)
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as ws:
+            header = "".join(_xlsx_inline(h, style=2) for h, _, _ in columns)
+            ws.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f'<sheetData><row>{header}</row>'
+            ).encode("utf-8"))
+            yield sink.drain()
+
+            for i, row in enumerate(rows, start=1):
+                ws.write(_xlsx_row(columns, row).encode("utf-8"))
+                if i % flush_every == 0:
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+
+            ws.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+
+# ------------------------------
+# Flask response
+# ------------------------------
+
+def export_response(fmt: str, filename_stem: str, columns, rows, sheet_name: str = "Export") -> Response:
+    """
+    Build a streamed download response. `rows` is consumed inside the request
+    context (stream_with_context), so lazy Supabase paging keeps working.
+    Raises ValueError for unsupported formats.
+    """
+    fmt = (fmt or "").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: '{fmt}'")
+
+    if fmt == "csv":
+        body, mimetype = stream_csv(columns, rows), CSV_MIMETYPE
+    else:
+        body, mimetype = stream_xlsx(columns, rows, sheet_name=sheet_name), XLSX_MIMETYPE
+
+    resp = Response(stream_with_context(body), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename_stem}.{fmt}"'
+    resp.headers["X-Accel-Buffering"] = "no"  # don't let a proxy hold the stream back
+    return resp
@@ -0,0 +1,92 @@
+# app/utils/fanout.py
+"""
+Run independent Supabase fetches concurrently from inside a request.
+
+    data = gather({
+        "po":        lambda: fetch_po_detail(po_id),
+        "suppliers": suppliers_as_objects,
+    }, defaults={"suppliers": []})
+
+Each task runs in its own thread inside a copy of the current request
+context (so current_app, request and a per-thread db.session all work).
+All tasks share one deadline (FANOUT_DEADLINE_SECONDS, default 20): a task
+still running at the deadline, or one that raised, takes its value from
+`defaults` if given, otherwise the error is raised to the caller. The page
+then costs roughly the slowest single call instead of the sum.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from flask import copy_current_request_context, has_request_context
+
+from app.utils import deadline as _deadline
+
+
+class FanoutTimeout(_deadline.DeadlineExceeded):
+    """A task without a default missed the deadline (a 504, like any spent budget)."""
+
+
+def _deadline_seconds() -> float:
+    try:
+        return float(os.environ.get("FANOUT_DEADLINE_SECONDS", "20"))
+    except ValueError:
+        return 20.0
+
+
+def gather(tasks: Dict[str, Callable[[], Any]], timeout: Optional[float] = None,
+           defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run zero-arg callables concurrently; returns {name: result}."""
+    defaults = defaults or {}
+    timeout = _deadline_seconds() if timeout is None else timeout
+    left = _deadline.remaining()  # never outlive the request's own budget
+    if left is not None:
+        timeout = max(0.0, min(timeout, left))
+
+    if len(tasks) <= 1 or not has_request_context():
+        return {name: _run_inline(name, fn, defaults) for name, fn in tasks.items()}
+
+    t0 = time.perf_counter()
+    # a pool per call: nested gathers (e.g. fetch_po_detail inside a form
+    # load) can't starve each other, and threads are cheap next to a round trip
+    pool = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="fanout")
+    try:
+        futures = {name: pool.submit(copy_current_request_context(fn)) for name, fn in tasks.items()}
+        wait(futures.values(), timeout=timeout)
+    finally:
+        # don't block on stragglers past the deadline; they finish and are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    results: Dict[str, Any] = {}
+    for name, fut in futures.items():
+        if not fut.done():
+            if name in defaults:
+                logging.warning(f"fanout: '{name}' missed the {timeout:.0f}s deadline; using default")
+                results[name] = defaults[name]
+                continue
+            raise FanoutTimeout(f"'{name}' did not finish within {timeout:.0f}s")
+        exc = fut.exception()
+        if exc is not None:
+            if name in defaults:
+                logging.warning(f"fanout: '{name}' failed ({exc}); using default")
+                results[name] = defaults[name]
+                continue
+            raise exc
+        results[name] = fut.result()
+
+    logging.debug(f"fanout: {', '.join(tasks)} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return results
+
+
+def _run_inline(name: str, fn: Callable[[], Any], defaults: Dict[str, Any]) -> Any:
+    try:
+        return fn()
+    except Exception as e:
+        if name in defaults:
+            logging.warning(f"fanout: '{name}' failed ({e}); using default")
+            return defaults[name]
+        raise
@@ -1,8 +1,68 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from markupsafe import Markup, escape
 from decimal import Decimal, InvalidOperation
 import zoneinfo
 
+# Filters run once per cell on big tables (accounts, spend report, exports):
+# timezones are built once, and results for repeated values come from a
+# bounded memo (dates, months and amounts repeat a lot across rows).
+_MEMO_SIZE = 4096
+_UTC = timezone.utc
+_LONDON = zoneinfo.ZoneInfo("Europe/London")
+
+
+@lru_cache(maxsize=32)
+def _zone(tz):
+    return _LONDON if tz == "Europe/London" else zoneinfo.ZoneInfo(tz)
+
+
+# strftime costs more than the rest of a conversion together; the formats the
+# templates and exports use are built directly (%b/%B as in the C locale,
+# which is what strftime gives: the app never calls setlocale)
+_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September",
+           "October", "November", "December")
+_FAST_FORMATS = {
+    "%d %b %Y": lambda d: f"{d.day:02d} {_ABBR[d.month - 1]} {d.year}",
+    "%b %Y": lambda d: f"{_ABBR[d.month - 1]} {d.year}",
+    "%B %Y": lambda d: f"{_MONTHS[d.month - 1]} {d.year}",
+    "%d/%m/%Y": lambda d: f"{d.day:02d}/{d.month:02d}/{d.year}",
+}
+
+
+def _in_zone(dt, tzinfo, fmt):
+    # naive values are taken as UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_UTC)
+    dt = dt.astimezone(tzinfo)
+    fast = _FAST_FORMATS.get(fmt)
+    return fast(dt) if fast else dt.strftime(fmt)
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def _format_datetime(dt, fmt, tz):
+    # equal datetimes are the same instant (naive ones count as UTC), so share a result
+    return _in_zone(dt, _zone(tz), fmt)
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def _format_date_text(s, fmt, tz):
+    tzinfo = _zone(tz)
+
+    # Try full ISO first (handles 'Z' or '+00:00')
+    try:
+        return _in_zone(datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s), tzinfo, fmt)
+    except Exception:
+        pass
+
+    # Try plain YYYY-MM-DD (tolerate extra time part); plain dates are midnight UTC
+    try:
+        return _in_zone(datetime.strptime(s[:10], "%Y-%m-%d"), tzinfo, fmt)
+    except Exception:
+        return s  # last-resort: show original
+
+
 def format_date(value, fmt="%d %b %Y", tz="Europe/London"):
     """
     Accepts:
@@ -14,42 +74,38 @@ def format_date(value, fmt="%d %b %Y", tz="Europe/London"):
     if not value:
         return ""
 
-    tzinfo = zoneinfo.ZoneInfo(tz)
-
     # Already a datetime?
     if isinstance(value, datetime):
-        dt = value
-        # If naive, assume UTC
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=zoneinfo.ZoneInfo("UTC"))
-        return dt.astimezone(tzinfo).strftime(fmt)
+        return _format_datetime(value, fmt, tz)
 
-    s = str(value)
+    return _format_date_text(str(value), fmt, tz)
 
-    # Try full ISO first (handles 'Z' or '+00:00')
-    try:
-        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=zoneinfo.ZoneInfo("UTC"))
-        return dt.astimezone(tzinfo).strftime(fmt)
-    except Exception:
-        pass
 
-    # Try plain YYYY-MM-DD
+def _to_decimal(value):
+    """Decimal for an amount (None/'' -> 0), or None if it isn't one."""
+    if value is None or value == "":
+        return Decimal("0")
     try:
-        dt = datetime.strptime(s[:10], "%Y-%m-%d")  # tolerate extra time part
-        # Treat plain dates as midnight UTC
-        dt = dt.replace(tzinfo=zoneinfo.ZoneInfo("UTC"))
-        return dt.astimezone(tzinfo).strftime(fmt)
-    except Exception:
-        return s  # last-resort: show original
-
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return Decimal(str(value))
+        s = str(value).strip().replace(",", "").replace("£", "")
+        return Decimal(s)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=_MEMO_SIZE, typed=True)
+def _accounting_text(value, symbol, dash_for_zero):
+    n = _to_decimal(value)
+    if n is None:
+        return ""
 
+    if dash_for_zero and n == 0:
+        return "—"
 
-def nl2br(value):
-    if value is None:
-        return ""
-    return Markup("<br>").join(escape(value).splitlines())
+    abs_str = f"{abs(n):,.2f}"
+    out = f"{symbol}{abs_str}" if symbol else abs_str
+    return f"({out})" if n < 0 else out
 
 
 def accounting(value, symbol="£", dash_for_zero=False):
@@ -60,21 +116,10 @@ def accounting(value, symbol="£", dash_for_zero=False):
     - optional em dash for zero (dash_for_zero=True)
     Robust to None/strings like '1,234.5' or '£123'.
     """
-    if value is None or value == "":
-        n = Decimal("0")
-    else:
-        try:
-            s = str(value).strip().replace(",", "").replace("£", "")
-            n = Decimal(s)
-        except (InvalidOperation, ValueError, TypeError):
-            return ""
-
-    if dash_for_zero and n == 0:
-        return "—"
-
-    abs_str = f"{abs(n):,.2f}"
-    out = f"{symbol}{abs_str}" if symbol else abs_str
-    return f"({out})" if n < 0 else out
+    try:
+        return _accounting_text(value, symbol, dash_for_zero)
+    except TypeError:  # unhashable value: skip the memo
+        return _accounting_text.__wrapped__(value, symbol, dash_for_zero)
 
 
 def accounting_number(value, dash_for_zero=False):
@@ -82,18 +127,10 @@ def accounting_number(value, dash_for_zero=False):
     Returns a number string only (no currency symbol):
       1,234.56   or   (1,234.56)   or   — (if dash_for_zero=True and value==0)
     """
-    if value is None or value == "":
-        n = Decimal("0")
-    else:
-        try:
-            s = str(value).strip().replace(",", "").replace("£", "")
-            n = Decimal(s)
-        except (InvalidOperation, ValueError, TypeError):
-            return ""
-
-    if dash_for_zero and n == 0:
-        return "—"
+    return accounting(value, symbol="", dash_for_zero=dash_for_zero)
 
-    abs_str = f"{abs(n):,.2f}"
-    return f"({abs_str})" if n < 0 else abs_str
 
+def nl2br(value):
+    if value is None:
+        return ""
+    return Markup("<br>").join(escape(value).splitlines())
@@ -34,6 +34,8 @@ def parse_po_form(form):
     quantities = form.getlist("quantity[]")
     units = form.getlist("unit[]")
     unit_prices = form.getlist("unit_price[]")
+    # existing rows carry their po_line_items id (edit form); new rows send ""
+    line_item_ids = form.getlist("line_item_id[]")
 
     line_items = []
     for i in range(len(descriptions)):
@@ -48,14 +50,18 @@ def parse_po_form(form):
             # If required, we'll handle below so skip here too
             continue
 
-        line_items.append({
+        item = {
             "description": desc,
             "quantity": _to_float(quantities[i]),
             "unit": units[i],
             "unit_price": _to_float(unit_prices[i]),
             "currency": "GBP",
             "active": True
-        })
+        }
+        item_id = (line_item_ids[i] if i < len(line_item_ids) else "").strip()
+        if item_id:
+            item["id"] = item_id
+        line_items.append(item)
 
     # Inject test cert line item if needed
     if test_cert_required:
@@ -0,0 +1,79 @@
+# app/utils/jinja_cache.py
+"""
+Template compile caching and pre-rendered fragments.
+
+- Bytecode cache: compiled templates are written to JINJA_CACHE_DIR (default
+  <instance>/jinja_cache) by Jinja's FileSystemBytecodeCache, so a new or
+  recycled worker loads them instead of parsing and compiling the sources
+  again. Entries are keyed by template source checksum; an edited template
+  is recompiled. JINJA_BYTECODE_CACHE=0 turns it off.
+- Precompile: every template is loaded once in create_app (JINJA_PRECOMPILE,
+  default on), so the first request for each page doesn't pay for it.
+- Fragments: render_fragment() keeps the last rendering of a mostly-static
+  partial (e.g. partials/certs_table.html) per data version, and renders it
+  again only when the version or the template changes.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Hashable, Tuple
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, Template
+from markupsafe import Markup
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_fragments: Dict[str, Tuple[Template, Hashable, Markup]] = {}
+
+
+def _enabled(name: str) -> bool:
+    return os.environ.get(name, "1").lower() not in ("0", "false", "no", "off")
+
+
+def precompile(app) -> int:
+    """Load (compile or read from the bytecode cache) every template; returns how many."""
+    env = app.jinja_env
+    t0 = time.perf_counter()
+    loaded = 0
+    for name in env.list_templates(filter_func=lambda n: n.endswith(".html")):
+        try:
+            env.get_template(name)
+            loaded += 1
+        except Exception as e:  # a broken template fails on its own page, not at start-up
+            log.warning("Template %s failed to precompile: %s", name, e)
+    log.info("Precompiled %d templates in %.0f ms", loaded, (time.perf_counter() - t0) * 1000.0)
+    return loaded
+
+
+def render_fragment(name: str, version: Hashable, **context) -> Markup:
+    """
+    `name` rendered with `context`, reused while `version` is unchanged.
+    The context must be determined by the version (e.g. a data file's mtime):
+    it isn't part of the key.
+    """
+    template = current_app.jinja_env.get_template(name)  # a reloaded template is a new object
+    cached = _fragments.get(name)
+    if cached is not None and cached[0] is template and cached[1] == version:
+        return cached[2]
+    html = Markup(template.render(**context))
+    with _lock:
+        _fragments[name] = (template, version, html)
+    return html
+
+
+def init_app(app) -> None:
+    """Call after the template filters are registered (precompile resolves them)."""
+    if _enabled("JINJA_BYTECODE_CACHE"):
+        path = os.environ.get("JINJA_CACHE_DIR") or os.path.join(app.instance_path, "jinja_cache")
+        try:
+            os.makedirs(path, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(path)
+        except OSError as e:
+            log.warning("Jinja bytecode cache disabled (%s): %s", path, e)
+    if _enabled("JINJA_PRECOMPILE"):
+        precompile(app)
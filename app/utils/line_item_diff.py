@@ -0,0 +1,93 @@
+# app/utils/line_item_diff.py
+"""
+Diff submitted PO line items against the stored active rows.
+
+Only the columns the PO form edits take part in the comparison, so
+expediting fields (qty_received, exped_* dates) on unchanged or edited lines
+are never touched.
+
+Matching, in order:
+  1. by id (the hidden line_item_id[] field), if the id is one of the stored rows;
+  2. leftover submitted lines by content fingerprint against leftover stored rows
+     (e.g. the auto-injected "Test Certificates" line, or a row re-added by hand).
+Whatever is still unmatched becomes an insert (submitted) or a deactivation (stored).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+EDITABLE_FIELDS = ("description", "quantity", "unit", "unit_price", "currency")
+
+
+def _num(v) -> float:
+    try:
+        return round(float(str(v).replace(",", "")), 4)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def line_fingerprint(item: dict) -> Tuple:
+    """Content identity of a line over EDITABLE_FIELDS (normalised)."""
+    return (
+        (item.get("description") or "").strip(),
+        _num(item.get("quantity")),
+        (item.get("unit") or "").strip(),
+        _num(item.get("unit_price")),
+        (item.get("currency") or "GBP").strip().upper(),
+    )
+
+
+@dataclass
+class LineItemDiff:
+    inserts: List[dict] = field(default_factory=list)         # new rows, no id
+    updates: List[dict] = field(default_factory=list)         # {"id", **EDITABLE_FIELDS}
+    deactivate_ids: List[str] = field(default_factory=list)
+    unchanged_ids: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deactivate_ids)
+
+
+def diff_line_items(stored: List[dict], submitted: List[dict]) -> LineItemDiff:
+    diff = LineItemDiff()
+    by_id: Dict[str, dict] = {str(s["id"]): s for s in stored if s.get("id") is not None}
+    matched: set = set()
+    leftovers: List[dict] = []
+
+    # 1) by id
+    for item in submitted:
+        sid = str(item.get("id") or "")
+        if sid in by_id and sid not in matched:
+            matched.add(sid)
+            _compare(diff, by_id[sid], item)
+        else:
+            leftovers.append(item)
+
+    # 2) by fingerprint among stored rows nobody claimed
+    unclaimed: Dict[Tuple, List[str]] = {}
+    for sid, row in by_id.items():
+        if sid not in matched:
+            unclaimed.setdefault(line_fingerprint(row), []).append(sid)
+
+    for item in leftovers:
+        ids = unclaimed.get(line_fingerprint(item))
+        if ids:
+            sid = ids.pop(0)
+            matched.add(sid)
+            diff.unchanged_ids.append(sid)
+        else:
+            new = {k: v for k, v in item.items() if k != "id"}
+            diff.inserts.append(new)
+
+    diff.deactivate_ids = [sid for sid in by_id if sid not in matched]
+    return diff
+
+
+def _compare(diff: LineItemDiff, stored: dict, item: dict) -> None:
+    if line_fingerprint(stored) == line_fingerprint(item):
+        diff.unchanged_ids.append(str(stored["id"]))
+        return
+    update = {"id": stored["id"]}
+    update.update({k: item.get(k) for k in EDITABLE_FIELDS})
+    update["currency"] = update["currency"] or "GBP"
+    diff.updates.append(update)
@@ -0,0 +1,244 @@
+# app/utils/memwatch.py
+"""
+Memory instrumentation and an RSS watchdog for small boxes (the Pi).
+
+tracemalloc (off by default; it slows Python allocations noticeably):
+- MEMWATCH_TRACEMALLOC=<frames> turns it on at start-up, or
+  POST /admin/memory/tracemalloc?frames=<n> turns it on for every worker at
+  runtime (flag file, picked up within a few seconds).
+- While on, each request's peak traced allocation is kept per endpoint
+  (count, last, max) and fed to /metrics; a peak above MEMWATCH_LOG_PEAK_MB
+  (default 50) is logged.
+- GET /admin/memory shows this worker's RSS, the per-endpoint peaks and the
+  top allocation sites. The peak is process-wide, so under gthread/gevent a
+  request's figure includes whatever ran beside it.
+
+Watchdog (independent of tracemalloc):
+- After each request the worker's RSS is read from /proc. Above
+  MEMWATCH_MAX_RSS_MB the worker writes a report (RSS, endpoint peaks, top
+  sites if traced) to MEMWATCH_DIR (default <instance>/memwatch) and, under
+  gunicorn, sends itself SIGTERM: it finishes the current request, exits,
+  and the arbiter starts a fresh worker. Reports stay listed at /admin/memory.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import request
+
+from app.utils import metrics
+
+_FLAG_CHECK_SECONDS = 5.0
+_MB = 1024 * 1024
+
+_dir: Optional[Path] = None
+_lock = threading.Lock()
+_peaks: Dict[str, dict] = {}
+_flag_cache = (0.0, 0)   # (checked_at, frames)
+_recycling = False
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ------------------------------
+# tracemalloc on / off
+# ------------------------------
+
+def _flag_path() -> Path:
+    return _dir / "TRACEMALLOC"
+
+
+def wanted_frames() -> int:
+    """Frames tracemalloc should keep; 0 means tracing is off."""
+    global _flag_cache
+    env = _env_int("MEMWATCH_TRACEMALLOC", 0)
+    if env > 0 or _dir is None:
+        return env
+    checked_at, value = _flag_cache
+    now = time.time()
+    if now - checked_at < _FLAG_CHECK_SECONDS:
+        return value
+    try:
+        value = int(_flag_path().read_text().strip() or 0)
+    except (OSError, ValueError):
+        value = 0
+    _flag_cache = (now, value)
+    return value
+
+
+def _sync_tracing() -> bool:
+    frames = wanted_frames()
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logging.info(f"memwatch: tracemalloc started ({frames} frames) in pid {os.getpid()}")
+    elif frames <= 0 and tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logging.info(f"memwatch: tracemalloc stopped in pid {os.getpid()}")
+    return frames > 0
+
+
+def start_tracing(frames: int = 1) -> None:
+    global _flag_cache
+    _dir.mkdir(parents=True, exist_ok=True)
+    _flag_path().write_text(str(int(frames)))
+    _flag_cache = (0.0, 0)
+    _sync_tracing()
+
+
+def stop_tracing() -> None:
+    global _flag_cache
+    try:
+        _flag_path().unlink()
+    except OSError:
+        pass
+    _flag_cache = (0.0, 0)
+    _sync_tracing()
+
+
+# ------------------------------
+# Reports
+# ------------------------------
+
+def top_sites(limit: int = 20, group_by: str = "lineno") -> List[dict]:
+    """Largest live allocations by source line (or file / traceback)."""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    out = []
+    for stat in snapshot.statistics(group_by)[:limit]:
+        frames = [f"{fr.filename}:{fr.lineno}" for fr in stat.traceback]
+        out.append({"site": frames[-1] if frames else "?", "traceback": frames if len(frames) > 1 else None,
+                    "kb": round(stat.size / 1024, 1), "count": stat.count})
+    return out
+
+
+def peaks() -> Dict[str, dict]:
+    with _lock:
+        return {ep: dict(p) for ep, p in sorted(_peaks.items(), key=lambda kv: -kv[1]["max_mb"])}
+
+
+def snapshot(limit: int = 20) -> dict:
+    rss = rss_bytes()
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(rss / _MB, 1) if rss else None,
+        "max_rss_mb": _env_int("MEMWATCH_MAX_RSS_MB", 0) or None,
+        "tracing": tracemalloc.is_tracing(),
+        "traced_mb": round(current / _MB, 1),
+        "peaks": peaks(),
+        "top": top_sites(limit),
+    }
+
+
+def _write_report(reason: str) -> Optional[str]:
+    report = {**snapshot(), "reason": reason, "at": time.time()}
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    try:
+        _dir.mkdir(parents=True, exist_ok=True)
+        (_dir / f"{name}.json").write_text(json.dumps(report, indent=1))
+    except OSError as e:
+        logging.warning(f"memwatch: could not save report {name}: {e}")
+        return None
+    return name
+
+
+def reports() -> List[dict]:
+    """Watchdog reports from this and earlier workers, newest first."""
+    if _dir is None or not _dir.exists():
+        return []
+    out = []
+    for path in sorted(_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            out.append({"name": path.stem, **json.loads(path.read_text())})
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+# ------------------------------
+# Per-request hooks
+# ------------------------------
+
+def _record_peak(endpoint: str, peak: int, where: str) -> None:
+    mb = round(peak / _MB, 2)
+    with _lock:
+        p = _peaks.setdefault(endpoint, {"count": 0, "last_mb": 0.0, "max_mb": 0.0})
+        p["count"] += 1
+        p["last_mb"] = mb
+        p["max_mb"] = max(p["max_mb"], mb)
+    metrics.observe_alloc_peak(endpoint, peak)
+    if mb >= _env_int("MEMWATCH_LOG_PEAK_MB", 50):
+        logging.warning(f"memwatch: {where} peaked at {mb} MB traced")
+
+
+def _check_rss(response) -> None:
+    global _recycling
+    rss = rss_bytes()
+    if rss is None:
+        return
+    metrics.observe_rss(rss)
+    limit = _env_int("MEMWATCH_MAX_RSS_MB", 0)
+    if not limit or _recycling or rss < limit * _MB:
+        return
+    _recycling = True
+    name = _write_report(f"rss {rss // _MB} MB >= {limit} MB after {request.endpoint}")
+    if str(request.environ.get("SERVER_SOFTWARE", "")).startswith("gunicorn"):
+        logging.warning(f"⚠️ memwatch: RSS {rss // _MB} MB over {limit} MB; recycling worker {os.getpid()} "
+                        f"(report {name})")
+        # gunicorn's graceful exit: finish this request, then a fresh worker replaces us
+        os.kill(os.getpid(), signal.SIGTERM)
+    else:
+        logging.warning(f"⚠️ memwatch: RSS {rss // _MB} MB over {limit} MB (report {name}); "
+                        f"not under gunicorn, so not recycling")
+
+
+def init_app(app) -> None:
+    global _dir
+    _dir = Path(os.environ.get("MEMWATCH_DIR") or os.path.join(app.instance_path, "memwatch"))
+
+    @app.before_request
+    def _memwatch_start():
+        if _sync_tracing():
+            tracemalloc.reset_peak()
+
+    @app.after_request
+    def _memwatch_finish(response):
+        if tracemalloc.is_tracing() and request.endpoint not in (None, "static"):
+            endpoint, where = request.endpoint, f"{request.method} {request.path}"
+            if response.is_streamed:  # streamed pages allocate while the body is sent
+                response.call_on_close(lambda: _record_peak(endpoint, tracemalloc.get_traced_memory()[1], where))
+            else:
+                _record_peak(endpoint, tracemalloc.get_traced_memory()[1], where)
+        _check_rss(response)
+        return response
@@ -0,0 +1,139 @@
+# app/utils/metrics.py
+"""
+Prometheus metrics, served at /metrics (app/blueprints/metrics.py).
+
+    po_http_request_duration_seconds{endpoint,method,status}   per Flask endpoint
+    po_outbound_call_duration_seconds{table,method,served}     Supabase tables, rpc/*, graph
+    po_outbound_calls_total{table,method,outcome}              outcome: 2xx/3xx/4xx/5xx/error
+    po_pdf_render_duration_seconds / po_pdf_pages              WeasyPrint renders
+    po_pdf_archive_write_duration_seconds{outcome}             copy to NETWORK_ARCHIVE_DIR
+    po_cache_requests_total{cache,result}                      shared cache + read path
+    po_request_peak_alloc_bytes{endpoint}                      while tracemalloc is on (memwatch)
+    po_worker_rss_bytes{pid}                                   after each request (memwatch)
+
+Both gunicorn workers write to PROMETHEUS_MULTIPROC_DIR (set up in
+gunicorn.conf.py) and /metrics adds them up, whichever worker answers.
+Without that variable (flask run) the in-process registry is used.
+
+prometheus_client is optional: without it every helper is a no-op and
+/metrics returns 503.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+from flask import g, request
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+    )
+except ImportError:  # metrics are optional
+    Counter = Gauge = Histogram = None
+
+_CALL_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80)
+_MB_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 5, 10, 25, 50, 100, 200, 400))
+
+if Histogram is not None:
+    REQUEST_SECONDS = Histogram(
+        "po_http_request_duration_seconds", "Request latency per Flask endpoint",
+        ["endpoint", "method", "status"], buckets=_SLOW_BUCKETS)
+    CALL_SECONDS = Histogram(
+        "po_outbound_call_duration_seconds", "Outbound data call latency",
+        ["table", "method", "served"], buckets=_CALL_BUCKETS)
+    CALLS = Counter(
+        "po_outbound_calls_total", "Outbound data calls by outcome",
+        ["table", "method", "outcome"])
+    PDF_SECONDS = Histogram(
+        "po_pdf_render_duration_seconds", "WeasyPrint render time (HTML to PDF bytes)",
+        buckets=_SLOW_BUCKETS)
+    PDF_PAGES = Histogram(
+        "po_pdf_pages", "Pages per rendered PDF", buckets=(1, 2, 3, 5, 8, 13, 21, 34))
+    ARCHIVE_SECONDS = Histogram(
+        "po_pdf_archive_write_duration_seconds", "Writing a PDF copy to the archive share",
+        ["outcome"], buckets=_CALL_BUCKETS)
+    CACHE = Counter(
+        "po_cache_requests_total", "Cache lookups by result",
+        ["cache", "result"])
+    ALLOC_PEAK = Histogram(
+        "po_request_peak_alloc_bytes", "Peak traced Python allocation during a request",
+        ["endpoint"], buckets=_MB_BUCKETS)
+    RSS = Gauge(
+        "po_worker_rss_bytes", "Worker resident set size after its latest request",
+        multiprocess_mode="liveall")
+
+
+def enabled() -> bool:
+    return Histogram is not None
+
+
+def _outcome(status) -> str:
+    return f"{int(status) // 100}xx" if status else "error"
+
+
+def observe_call(table: str, method: str, status, seconds: float, served: str = "upstream") -> None:
+    if not enabled():
+        return
+    CALL_SECONDS.labels(table, method, served).observe(seconds)
+    if served == "upstream":
+        CALLS.labels(table, method, _outcome(status)).inc()
+    else:
+        CACHE.labels("supabase_read", served).inc()
+
+
+def observe_pdf(seconds: float, pages: int) -> None:
+    if enabled():
+        PDF_SECONDS.observe(seconds)
+        PDF_PAGES.observe(pages)
+
+
+def observe_archive(seconds: float, ok: bool) -> None:
+    if enabled():
+        ARCHIVE_SECONDS.labels("ok" if ok else "failed").observe(seconds)
+
+
+def cache_event(cache: str, result: str) -> None:
+    if enabled():
+        CACHE.labels(cache, result).inc()
+
+
+def observe_alloc_peak(endpoint: str, nbytes: int) -> None:
+    if enabled():
+        ALLOC_PEAK.labels(endpoint).observe(nbytes)
+
+
+def observe_rss(nbytes: int) -> None:
+    if enabled():
+        RSS.set(nbytes)
+
+
+def render_latest():
+    """(body, content_type) for /metrics, aggregated over workers when multiprocess."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_app(app) -> None:
+    if not enabled():
+        return
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(response):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None and request.endpoint not in (None, "static", "metrics.metrics"):
+            child = REQUEST_SECONDS.labels(request.endpoint, request.method, str(response.status_code))
+            if response.is_streamed:  # streamed pages: time to the last byte, not to the headers
+                response.call_on_close(lambda: child.observe(time.perf_counter() - t0))
+            else:
+                child.observe(time.perf_counter() - t0)
+        return response
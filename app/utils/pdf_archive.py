@@ -1,8 +1,11 @@
 # app/utils/pdf_archive.py
 import os
 import logging
+import time
 from pathlib import Path
 
+from app.utils import metrics
+
 def _atomic_write_bytes(target: Path, data: bytes) -> None:
     target.parent.mkdir(parents=True, exist_ok=True)
     tmp = target.with_suffix(target.suffix + ".tmp")
@@ -25,10 +28,13 @@ def save_pdf_archive(pdf_bytes: bytes, relative_dir: str, filename: str):
 
     root = os.environ.get("NETWORK_ARCHIVE_DIR", "/app/output/archive")
     dest = Path(root) / relative_dir / filename
+    t0 = time.perf_counter()
     try:
         _atomic_write_bytes(dest, pdf_bytes)
+        metrics.observe_archive(time.perf_counter() - t0, ok=True)
         logging.info(f"Archived PDF to {dest}")
         return dest
     except Exception as e:
+        metrics.observe_archive(time.perf_counter() - t0, ok=False)
         logging.exception(f"Failed to archive PDF to {dest}: {e}")
         return None
@@ -0,0 +1,23 @@
+# app/utils/pdf_render.py
+"""HTML -> PDF bytes with WeasyPrint, timed and page-counted for /metrics."""
+import time
+from typing import Tuple
+
+from weasyprint import CSS, HTML
+
+from app.utils import metrics
+
+PDF_STYLESHEET = "app/static/css/pdf_style.css"
+
+
+def render_pdf_pages(html: str, base_url: str) -> Tuple[bytes, int]:
+    """(PDF bytes, page count)."""
+    t0 = time.perf_counter()
+    document = HTML(string=html, base_url=base_url).render(stylesheets=[CSS(filename=PDF_STYLESHEET)])
+    pdf_bytes = document.write_pdf()
+    metrics.observe_pdf(time.perf_counter() - t0, len(document.pages))
+    return pdf_bytes, len(document.pages)
+
+
+def render_pdf(html: str, base_url: str) -> bytes:
+    return render_pdf_pages(html, base_url)[0]
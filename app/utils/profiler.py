@@ -0,0 +1,247 @@
+# app/utils/profiler.py
+"""
+Opt-in sampling profiler that keeps only slow requests.
+
+While enabled, a background thread samples the Python stack of every thread
+that is handling a request, every PROFILE_INTERVAL_MS (default 10). When a
+request finishes after more than the threshold, its samples are saved as a
+folded-stack file (one "frame;frame;frame count" line per distinct stack;
+flamegraph.pl, speedscope and inferno read it) next to a JSON file with the
+request, its timing and its Supabase call trace. Faster requests are dropped.
+
+Turn it on with PROFILE_SLOW_MS=<ms>, or at runtime for every worker with
+POST /admin/profiles/enable (writes a flag file, optionally with an expiry).
+When off, the per-request cost is one cached flag check and no thread runs.
+
+Captures go to PROFILE_DIR (default <instance>/profiles); the newest
+PROFILE_KEEP (default 50) are kept. Under the gevent worker only the greenlet
+running at sample time is visible; profile with the sync or gthread worker.
+Fan-out threads are not sampled; their time shows up as the request thread
+waiting in fanout.gather, and in the call trace.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import request
+
+_MAX_DEPTH = 80
+_FLAG_CHECK_SECONDS = 5.0
+
+_dir: Optional[Path] = None
+_lock = threading.Lock()
+_active: Dict[int, "_Capture"] = {}
+_sampler: Optional[threading.Thread] = None
+_flag_cache = (0.0, 0)   # (checked_at, threshold_ms)
+
+
+class _Capture:
+    __slots__ = ("started", "samples")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.samples: Counter = Counter()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# ------------------------------
+# On / off
+# ------------------------------
+
+def _flag_path() -> Path:
+    return _dir / "ENABLED"
+
+
+def threshold_ms() -> int:
+    """Current slow-request threshold in ms; 0 means profiling is off."""
+    global _flag_cache
+    env = _env_int("PROFILE_SLOW_MS", 0)
+    if env > 0 or _dir is None:
+        return env
+    checked_at, value = _flag_cache
+    now = time.time()
+    if now - checked_at < _FLAG_CHECK_SECONDS:
+        return value
+    value = 0
+    try:
+        flag = json.loads(_flag_path().read_text())
+        if not flag.get("until") or flag["until"] > now:
+            value = int(flag.get("ms") or 0)
+    except (OSError, ValueError):
+        pass
+    _flag_cache = (now, value)
+    return value
+
+
+def enable(ms: int, minutes: Optional[float] = None) -> dict:
+    global _flag_cache
+    flag = {"ms": int(ms), "until": time.time() + minutes * 60 if minutes else None}
+    _dir.mkdir(parents=True, exist_ok=True)
+    _flag_path().write_text(json.dumps(flag))
+    _flag_cache = (0.0, 0)
+    return flag
+
+
+def disable() -> None:
+    global _flag_cache
+    try:
+        _flag_path().unlink()
+    except OSError:
+        pass
+    _flag_cache = (0.0, 0)
+
+
+# ------------------------------
+# Sampling
+# ------------------------------
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    marker = f"{os.sep}app{os.sep}"
+    short = "app/" + path.split(marker, 1)[1] if marker in path else os.path.basename(path)
+    return f"{code.co_name} ({short})"
+
+
+def _fold(frame) -> str:
+    stack: List[str] = []
+    while frame is not None and len(stack) < _MAX_DEPTH:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def _sample_loop() -> None:
+    interval = max(1, _env_int("PROFILE_INTERVAL_MS", 10)) / 1000.0
+    me = threading.get_ident()
+    while True:
+        time.sleep(interval)
+        with _lock:
+            watched = list(_active.items())
+        if not watched:
+            if threshold_ms() <= 0:
+                return  # switched off; started again on demand
+            continue
+        frames = sys._current_frames()
+        for tid, cap in watched:
+            frame = frames.get(tid)
+            if frame is not None and tid != me:
+                cap.samples[_fold(frame)] += 1
+
+
+def _ensure_sampler() -> None:
+    global _sampler
+    if _sampler is None or not _sampler.is_alive():
+        _sampler = threading.Thread(target=_sample_loop, name="profiler", daemon=True)
+        _sampler.start()
+
+
+# ------------------------------
+# Captures on disk
+# ------------------------------
+
+def _save(cap: _Capture, elapsed_ms: float, status: int, threshold: int) -> Optional[str]:
+    from app.utils import call_trace
+    endpoint = re.sub(r"[^A-Za-z0-9_.-]", "_", request.endpoint or "unknown")
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{endpoint}-{int(elapsed_ms)}ms"
+    meta = {
+        "name": name,
+        "path": request.full_path.rstrip("?"),
+        "method": request.method,
+        "endpoint": request.endpoint,
+        "status": status,
+        "duration_ms": round(elapsed_ms, 1),
+        "threshold_ms": threshold,
+        "samples": sum(cap.samples.values()),
+        "interval_ms": _env_int("PROFILE_INTERVAL_MS", 10),
+        "captured_at": time.time(),
+        "pid": os.getpid(),
+        "calls": call_trace.calls(),
+    }
+    try:
+        _dir.mkdir(parents=True, exist_ok=True)
+        folded = "\n".join(f"{stack} {n}" for stack, n in cap.samples.most_common())
+        (_dir / f"{name}.folded").write_text(folded + "\n")
+        (_dir / f"{name}.json").write_text(json.dumps(meta, default=str, indent=1))
+        _prune()
+    except OSError as e:
+        logging.warning(f"profiler: could not save {name}: {e}")
+        return None
+    logging.info(f"profiler: captured {request.path} ({elapsed_ms:.0f} ms) as {name}")
+    return name
+
+
+def _prune() -> None:
+    keep = _env_int("PROFILE_KEEP", 50)
+    metas = sorted(_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in metas[keep:]:
+        for path in (old, old.with_suffix(".folded")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def captures() -> List[dict]:
+    """Newest first; metadata without the call list."""
+    if _dir is None or not _dir.exists():
+        return []
+    out = []
+    for path in sorted(_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        meta["calls"] = len(meta.get("calls") or [])
+        out.append(meta)
+    return out
+
+
+def capture_path(name: str, suffix: str) -> Optional[Path]:
+    if _dir is None or not re.fullmatch(r"[A-Za-z0-9_.-]+", name) or suffix not in (".folded", ".json"):
+        return None
+    path = _dir / f"{name}{suffix}"
+    return path if path.is_file() else None
+
+
+def init_app(app) -> None:
+    global _dir
+    _dir = Path(os.environ.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles"))
+
+    @app.before_request
+    def _profile_start():
+        if threshold_ms() <= 0:
+            return
+        _ensure_sampler()
+        with _lock:
+            _active[threading.get_ident()] = _Capture()
+
+    @app.after_request
+    def _profile_finish(response):
+        with _lock:
+            cap = _active.pop(threading.get_ident(), None)
+        if cap is not None:
+            elapsed_ms = (time.perf_counter() - cap.started) * 1000.0
+            threshold = threshold_ms()
+            if threshold and elapsed_ms >= threshold and cap.samples:
+                _save(cap, elapsed_ms, response.status_code, threshold)
+        return response
+
+    @app.teardown_request
+    def _profile_cleanup(exc):
+        with _lock:
+            _active.pop(threading.get_ident(), None)
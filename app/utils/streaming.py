@@ -0,0 +1,83 @@
+# app/utils/streaming.py
+"""
+Streamed HTML for the long list pages (PO list, expediting, accounts).
+
+stream_page() sends a template while Jinja renders it. The browser gets the
+header and filters before the table is finished, and rows go from the data
+layer to the socket one page at a time instead of being held as a list.
+Wrap the row iterator (iter_active_pos_from_view, iter_accounts_overview) in
+a RowStream and pass that to the template.
+
+Output is sent in pieces of STREAM_CHUNK_BYTES (default 4096), so a large
+table isn't written to the socket a cell at a time. Once the first piece is
+sent, the status and headers can't change:
+- flashed messages are taken off the session before streaming starts
+  (base.html reads them from the request), so the session cookie is right;
+- a data error part-way through can't become a flash or an error page.
+  RowStream stops there, logs it and keeps it on `.error` for the template
+  to show under the rows.
+
+STREAM_PAGES=0 renders these pages in one piece, as before.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Generator, Iterable, Iterator, Optional
+
+from flask import Response, get_flashed_messages, render_template, stream_template
+
+log = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return os.environ.get("STREAM_PAGES", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _chunk_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get("STREAM_CHUNK_BYTES", "4096")))
+    except ValueError:
+        return 4096
+
+
+class RowStream:
+    """Single-pass row iterator that counts rows and records, rather than raises, a data error."""
+
+    def __init__(self, rows: Iterable[dict], what: str = "rows"):
+        self._rows = rows
+        self.what = what
+        self.count = 0
+        self.error: Optional[str] = None
+
+    def __iter__(self) -> Iterator[dict]:
+        try:
+            for row in self._rows:
+                self.count += 1
+                yield row
+        except Exception as e:
+            log.error("Failed while streaming %s after %d rows: %s", self.what, self.count, e)
+            self.error = str(e)
+
+
+def _chunked(parts: Generator[str, None, None], size: int) -> Iterator[str]:
+    buf, n = [], 0
+    try:
+        for part in parts:
+            buf.append(part)
+            n += len(part)
+            if n >= size:
+                yield "".join(buf)
+                buf, n = [], 0
+        if buf:
+            yield "".join(buf)
+    finally:
+        parts.close()  # a client that goes away mid-page still releases the request context
+
+
+def stream_page(template_name: str, **context) -> Response:
+    """`template_name` rendered into a streamed response (or in one piece with STREAM_PAGES=0)."""
+    if not enabled():
+        return Response(render_template(template_name, **context))
+    get_flashed_messages(with_categories=True)  # pop them now; base.html gets the request's copy
+    return Response(_chunked(stream_template(template_name, **context), _chunk_bytes()))
@@ -0,0 +1,469 @@
+# bench/fake_postgrest.py
+"""
+Local stand-in for Supabase's PostgREST, seeded with synthetic data, so
+pages can be benchmarked without touching production.
+
+    python -m bench.fake_postgrest --scale 10k --port 54321 [--latency-ms 40]
+
+then point the app at it (SUPABASE_URL=http://127.0.0.1:54321, any
+SUPABASE_KEY). bench/routes.py starts one of these per scale by itself.
+
+Scale is the number of PO numbers. The other tables grow with it:
+  purchase_orders         scale + ~20% older revisions
+  po_metadata             one per purchase_orders row (active on the latest)
+  po_line_items           1-40 per PO, generated on request (po_id=eq. only)
+  suppliers               max(50, scale / 20), a tenth of them delivery addresses
+  project_register        max(10, scale / 50) projects
+  project_register_items  50 per project (~ scale rows)
+  delivery_contacts       200
+  active_po_list, accounts_overview, vw_project_item_options  as the views
+
+Only the PostgREST surface the app's GETs use is implemented: column
+filters (eq, neq, gt, gte, lt, lte, in, is, like, ilike, not.), and=/or=
+trees, order (nullsfirst/nullslast), limit/offset, select with column lists
+and the purchase_orders embeds (suppliers, po_metadata). Writes get 405.
+
+GET /__bench/stats returns upstream call counts per table since the last
+POST /__bench/reset.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+STATUSES = ("draft", "approved", "issued", "complete", "cancelled")
+STATUS_WEIGHTS = (10, 10, 45, 30, 5)
+UNITS = ("ea", "m", "kg", "set", "lot", "hr")
+WORDS = ("flange", "gasket", "bolt", "plate", "beam", "valve", "pipe", "elbow", "bracket",
+         "cable", "tray", "weld", "primer", "coating", "sensor", "bearing", "shaft", "seal")
+_RESERVED = {"select", "order", "limit", "offset", "and", "or", "on_conflict", "columns"}
+_RESPONSE_CACHE_SIZE = 256
+
+
+def parse_scale(text: str) -> int:
+    """"1k" / "10k" / "100k" / "2500" -> int."""
+    text = str(text).strip().lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    if text.endswith("m"):
+        return int(float(text[:-1]) * 1_000_000)
+    return int(text)
+
+
+# ------------------------------
+# Synthetic data
+# ------------------------------
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="seconds")
+
+
+class Dataset:
+    """Deterministic synthetic tables for a given scale (same seed, same rows)."""
+
+    def __init__(self, scale: int, seed: int = 1):
+        self.scale = scale
+        self.seed = seed
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+
+        n_projects = max(10, scale // 50)
+        projects = [f"{10000 + i}" for i in range(n_projects)]
+        self.tables: Dict[str, List[dict]] = {}
+        self.tables["project_register"] = [{"projectnumber": p, "client_id": f"C{i % 97:03d}"}
+                                           for i, p in enumerate(projects)]
+        self.tables["project_register_items"] = [
+            {"projectnumber": p, "item_seq": seq, "line_desc": f"{rng.choice(WORDS).title()} package {seq}",
+             "updated_at": _iso(now - timedelta(days=rng.randint(0, 900)))}
+            for p in projects for seq in range(1, 51)
+        ]
+
+        suppliers = []
+        for i in range(max(50, scale // 20)):
+            kind = "delivery" if i % 10 == 0 else ("both" if i % 25 == 1 else "supplier")
+            suppliers.append({
+                "id": _uuid(rng), "name": f"{rng.choice(WORDS).title()} Supplies {i:05d} Ltd",
+                "address": f"{i} Industrial Estate\nUnit {i % 40}\nAB{i % 90} {i % 9}CD", "type": kind,
+                "updated_at": _iso(now - timedelta(days=rng.randint(0, 900))),
+            })
+        self.tables["suppliers"] = suppliers
+        addresses = [s for s in suppliers if s["type"] in ("delivery", "both")]
+
+        self.tables["delivery_contacts"] = [
+            {"id": _uuid(rng), "name": f"Contact {i:03d}", "phone": f"01234 {i:06d}",
+             "email": f"contact{i}@example.com", "address_id": rng.choice(addresses)["id"],
+             "updated_at": _iso(now - timedelta(days=rng.randint(0, 900)))}
+            for i in range(200)
+        ]
+        contacts = self.tables["delivery_contacts"]
+
+        pos, metas = [], []
+        self._line_seed: Dict[str, int] = {}
+        for i in range(scale):
+            po_number = 1000 + i
+            project = rng.choice(projects)
+            supplier = rng.choice(suppliers)
+            latest_at = now - timedelta(minutes=rng.randint(0, 540 * 24 * 60))
+            revisions = ["a", "1"] if rng.random() < 0.2 else [rng.choice(("a", "1", "2"))]
+            for r_i, rev in enumerate(revisions):
+                latest = r_i == len(revisions) - 1
+                updated = latest_at if latest else latest_at - timedelta(days=rng.randint(1, 60))
+                status = rng.choices(STATUSES, STATUS_WEIGHTS)[0] if latest else "issued"
+                po_id = _uuid(rng)
+                contact = rng.choice(contacts) if rng.random() < 0.7 else None
+                pos.append({
+                    "id": po_id, "po_number": po_number, "project_id": project,
+                    "item_seq": rng.randint(1, 50), "supplier_id": supplier["id"], "status": status,
+                    "current_revision": rev, "created_at": _iso(updated - timedelta(days=2)),
+                    "updated_at": _iso(updated), "last_release": _iso(updated) if rev.isdigit() else None,
+                    "delivery_contact_id": contact["id"] if contact else None,
+                    "delivery_address_id": None if contact else rng.choice(addresses)["id"],
+                    "manual_delivery_address": None, "acc_complete": status == "complete" and rng.random() < 0.6,
+                    "invoice_reference": f"INV-{po_number}" if status == "complete" else None,
+                    "reference": f"REF{po_number}-{rev}",
+                })
+                metas.append({
+                    "id": _uuid(rng), "po_id": po_id, "active": latest,
+                    "delivery_terms": "DAP", "delivery_date": (updated + timedelta(days=21)).date().isoformat(),
+                    "shipping_method": "Road", "test_certificates_required": rng.random() < 0.3,
+                    "supplier_reference_number": f"Q{rng.randint(10000, 99999)}",
+                    "manual_contact_name": None, "manual_contact_phone": None, "manual_contact_email": None,
+                    "updated_at": _iso(updated),
+                })
+                self._line_seed[po_id] = rng.getrandbits(32)
+        self.tables["purchase_orders"] = pos
+        self.tables["po_metadata"] = metas
+
+        by_supplier = {s["id"]: s for s in suppliers}
+        active_ids = {m["po_id"] for m in metas if m["active"]}
+        active = []
+        for po in pos:
+            if po["id"] in active_ids:
+                active.append({**po, "projectnumber": po["project_id"],
+                               "supplier_name": by_supplier[po["supplier_id"]]["name"]})
+        self.tables["active_po_list"] = active
+        self.tables["accounts_overview"] = [
+            {"id": r["id"], "po_number": r["po_number"], "status": r["status"],
+             "total_value": round(sum(li["quantity"] * li["unit_price"] for li in self.line_items(r["id"])), 2),
+             "acc_complete": r["acc_complete"], "invoice_reference": r["invoice_reference"],
+             "projectnumber": r["projectnumber"], "supplier_name": r["supplier_name"]}
+            for r in active
+        ]
+        self.tables["vw_project_item_options"] = [
+            {"projectnumber": it["projectnumber"], "item_seq": it["item_seq"], "line_desc": it["line_desc"],
+             "option_code": f"{it['projectnumber']}-{it['item_seq']}",
+             "option_label": f"{it['projectnumber']}-{it['item_seq']} - {it['line_desc']}"}
+            for it in self.tables["project_register_items"]
+        ]
+        self.po_ids = [r["id"] for r in active]
+
+    def line_items(self, po_id: str) -> List[dict]:
+        """Active line items of one PO, rebuilt from its seed on every call."""
+        seed = self._line_seed.get(str(po_id))
+        if seed is None:
+            return []
+        rng = random.Random(seed)
+        n = rng.choice((1, 2, 3, 4, 5, 5, 8, 10, 15, 40))
+        return [{
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)), "po_id": po_id, "active": True,
+            "line_no": f"{k + 1}", "description": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} DN{rng.randint(15, 300)}",
+            "quantity": rng.randint(1, 50), "unit": rng.choice(UNITS),
+            "unit_price": round(rng.uniform(0.5, 2500), 2), "currency": "GBP",
+            "qty_recevied": 0, "exped_expected_date": None, "exped_ccompleted_date": None,
+        } for k in range(n)]
+
+    def sample_po_ids(self, n: int, seed: int = 7) -> List[str]:
+        return random.Random(seed).sample(self.po_ids, min(n, len(self.po_ids)))
+
+
+# ------------------------------
+# PostgREST query subset
+# ------------------------------
+
+def _unquote(v: str) -> str:
+    return v[1:-1] if len(v) >= 2 and v[0] == v[-1] == '"' else v
+
+
+def _split_top(s: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes."""
+    out, depth, quoted, cur = [], 0, False, []
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            out.append("".join(cur))
+            cur = []
+            continue
+        cur.append(ch)
+    if cur:
+        out.append("".join(cur))
+    return out
+
+
+def _cmp_value(row_value, operand: str):
+    if isinstance(row_value, bool):
+        return row_value, operand.lower() in ("true", "t", "1")
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(operand)
+        except ValueError:
+            return str(row_value), operand
+    return str(row_value), operand
+
+
+def _like(pattern: str, ci: bool) -> Callable[[str], bool]:
+    rx = "^" + ".*".join(re.escape(p) for p in re.split(r"[%*]", pattern)) + "$"
+    compiled = re.compile(rx, re.IGNORECASE if ci else 0)
+    return lambda v: compiled.match(v) is not None
+
+
+def _op_predicate(col: str, op_value: str) -> Callable[[dict], bool]:
+    negate = op_value.startswith("not.")
+    if negate:
+        op_value = op_value[4:]
+    op, _, value = op_value.partition(".")
+    value = _unquote(value)
+
+    if op == "is":
+        want = {"null": None, "true": True, "false": False}[value.lower()]
+        test = (lambda r: r.get(col) is None) if want is None else (lambda r: r.get(col) is want)
+    elif op == "in":
+        options = {_unquote(v) for v in _split_top(value.strip("()"))}
+        test = lambda r: r.get(col) is not None and str(r.get(col)) in options
+    elif op in ("like", "ilike"):
+        match = _like(value, op == "ilike")
+        test = lambda r: r.get(col) is not None and match(str(r.get(col)))
+    elif op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        def test(r, op=op):
+            v = r.get(col)
+            if v is None:
+                return False
+            a, b = _cmp_value(v, value)
+            return {"eq": a == b, "neq": a != b, "gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b}[op]
+    else:
+        raise ValueError(f"unsupported operator {op!r}")
+    return (lambda r: not test(r)) if negate else test
+
+
+def _tree_predicate(kind: str, body: str) -> Callable[[dict], bool]:
+    """and=(...) / or=(...) with nested and()/or()."""
+    parts = []
+    for term in _split_top(body.strip()[1:-1]):
+        m = re.match(r"^(not\.)?(and|or)(\(.*\))$", term)
+        if m:
+            inner = _tree_predicate(m.group(2), m.group(3))
+            parts.append((lambda r, f=inner: not f(r)) if m.group(1) else inner)
+        else:
+            col, _, op_value = term.partition(".")
+            parts.append(_op_predicate(col, op_value))
+    combine = all if kind == "and" else any
+    return lambda r: combine(p(r) for p in parts)
+
+
+def _sort(rows: List[dict], order: str) -> List[dict]:
+    out = list(rows)
+    for part in reversed([p for p in order.split(",") if p]):
+        col, *mods = part.split(".")
+        desc = "desc" in mods
+        nulls_first = "nullsfirst" in mods or (desc and "nullslast" not in mods)
+        present = [r for r in out if r.get(col) is not None]
+        missing = [r for r in out if r.get(col) is None]
+        present.sort(key=lambda r: r[col], reverse=desc)
+        out = missing + present if nulls_first else present + missing
+    return out
+
+
+# embeds from purchase_orders: name -> (local column, foreign column)
+_EMBEDS = {
+    "suppliers": ("supplier_id", "id"),
+    "po_metadata": ("id", "po_id"),
+    "delivery_contacts": ("delivery_contact_id", "id"),
+}
+
+
+def _parse_select(select: str):
+    columns, embeds = [], {}
+    for item in _split_top(select or "*"):
+        m = re.match(r"^(\w+)\((.*)\)$", item.strip())
+        if m:
+            embeds[m.group(1)] = [c for c in m.group(2).split(",") if c]
+        elif item.strip():
+            columns.append(item.strip())
+    return columns, embeds
+
+
+def _project(row: dict, columns: List[str]) -> dict:
+    return dict(row) if not columns or "*" in columns else {c: row.get(c) for c in columns}
+
+
+class FakePostgrest:
+    """WSGI app answering /rest/v1/<rel> GETs from a Dataset."""
+
+    def __init__(self, dataset: Dataset, latency_ms: float = 0.0):
+        self.dataset = dataset
+        self.latency = latency_ms / 1000.0
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._responses: "OrderedDict[str, tuple]" = OrderedDict()
+        self._index: Dict[tuple, Dict[str, List[dict]]] = {}
+
+    def _by(self, rel: str, col: str) -> Dict[str, List[dict]]:
+        key = (rel, col)
+        if key not in self._index:
+            idx: Dict[str, List[dict]] = {}
+            for r in self.dataset.tables.get(rel, []):
+                idx.setdefault(str(r.get(col)), []).append(r)
+            self._index[key] = idx
+        return self._index[key]
+
+    def _source(self, rel: str, args) -> Iterable[dict]:
+        if rel == "po_line_items":
+            po = next((v for k, v in args if k == "po_id" and v.startswith("eq.")), None)
+            if po is None:
+                raise ValueError("the benchmark stand-in only serves po_line_items by po_id=eq.")
+            return self.dataset.line_items(_unquote(po[3:]))
+        if rel not in self.dataset.tables:
+            raise LookupError(rel)
+        for k, v in args:  # use an index for a plain equality on id-like columns
+            if k in ("id", "po_id", "projectnumber") and v.startswith("eq."):
+                return self._by(rel, k).get(_unquote(v[3:]), [])
+        return self.dataset.tables[rel]
+
+    def query(self, rel: str, args: List[tuple]) -> List[dict]:
+        select = dict(args).get("select", "*")
+        columns, embeds = _parse_select(select)
+        filters, embed_filters = [], {}
+        for k, v in args:
+            if k in _RESERVED:
+                if k in ("and", "or"):
+                    filters.append(_tree_predicate(k, v))
+                continue
+            if "." in k:
+                name, col = k.split(".", 1)
+                embed_filters.setdefault(name, []).append(_op_predicate(col, v))
+            else:
+                filters.append(_op_predicate(k, v))
+
+        rows = [r for r in self._source(rel, args) if all(f(r) for f in filters)]
+        params = dict(args)
+        if params.get("order"):
+            rows = _sort(rows, params["order"])
+        offset = int(params.get("offset", 0) or 0)
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+
+        out = []
+        for r in rows:
+            row = _project(r, columns)
+            for name, cols in embeds.items():
+                local, foreign = _EMBEDS[name]
+                related = [e for e in self._by(name, foreign).get(str(r.get(local)), [])
+                           if all(f(e) for f in embed_filters.get(name, []))]
+                row[name] = _project(related[0], cols) if related else None
+            out.append(row)
+        return out
+
+    def __call__(self, environ, start_response):
+        req = Request(environ)
+        path = req.path.rstrip("/")
+        if path == "/__bench/stats":
+            with self._lock:
+                body = {"scale": self.dataset.scale, "calls": dict(self.calls), "total": sum(self.calls.values())}
+            return Response(json.dumps(body), mimetype="application/json")(environ, start_response)
+        if path == "/__bench/reset":
+            with self._lock:
+                self.calls.clear()
+            return Response("{}", mimetype="application/json")(environ, start_response)
+        if path == "/__bench/po-ids":
+            n = req.args.get("n", default=20, type=int)
+            return Response(json.dumps(self.dataset.sample_po_ids(n)),
+                            mimetype="application/json")(environ, start_response)
+        if not path.startswith("/rest/v1/"):
+            return Response("not found", status=404)(environ, start_response)
+
+        rel = path[len("/rest/v1/"):]
+        with self._lock:
+            self.calls[rel] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if req.method != "GET":
+            return Response(json.dumps({"message": "read-only benchmark stand-in"}), status=405,
+                            mimetype="application/json")(environ, start_response)
+
+        key = f"{rel}?{req.query_string.decode()}"
+        with self._lock:
+            hit = self._responses.get(key)
+            if hit:
+                self._responses.move_to_end(key)
+        if hit is None:
+            try:
+                rows = self.query(rel, list(req.args.items(multi=True)))
+            except LookupError:
+                return Response(json.dumps({"message": f"relation {rel} does not exist"}), status=404,
+                                mimetype="application/json")(environ, start_response)
+            except (ValueError, KeyError) as e:
+                return Response(json.dumps({"message": str(e)}), status=400,
+                                mimetype="application/json")(environ, start_response)
+            offset = req.args.get("offset", default=0, type=int)
+            content_range = f"{offset}-{offset + len(rows) - 1}/*" if rows else "*/0"
+            hit = (json.dumps(rows, default=str).encode(), content_range)
+            with self._lock:
+                self._responses[key] = hit
+                while len(self._responses) > _RESPONSE_CACHE_SIZE:
+                    self._responses.popitem(last=False)
+        body, content_range = hit
+        resp = Response(body, mimetype="application/json")
+        resp.headers["Content-Range"] = content_range
+        return resp(environ, start_response)
+
+
+def serve(scale: int, port: int = 0, latency_ms: float = 0.0, seed: int = 1, host: str = "127.0.0.1"):
+    """Build the dataset and start a threaded server; returns (server, app). server.port is the bound port."""
+    app = FakePostgrest(Dataset(scale, seed=seed), latency_ms=latency_ms)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no line per request
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="fake-postgrest", daemon=True).start()
+    return server, app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--scale", default="1k", help="PO numbers: 1k, 10k, 100k or a number")
+    ap.add_argument("--port", type=int, default=54321)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="added to every call (network round trip)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    server, app = serve(parse_scale(args.scale), args.port, args.latency_ms, args.seed)
+    sizes = {rel: len(rows) for rel, rows in app.dataset.tables.items()}
+    print(json.dumps({"ready": f"http://127.0.0.1:{server.port}", "seeded_s": round(time.perf_counter() - t0, 1),
+                      "rows": sizes}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# bench/micro.py
+"""
+Micro-benchmarks for the pure-Python helpers that run per row or per request.
+
+    python -m bench.micro
+    python -m bench.micro --filter format_date,accounting --json bench/results/micro.jsonl
+    python -m bench.micro --compare bench/results/micro.jsonl
+
+Each case calls a helper over a list of generated, realistic inputs (ISO
+timestamps as Supabase returns them, amounts as floats/strings, form posts
+with 20-200 lines, ...). Reported per call: ns/op (best of --rounds, each
+round auto-sized to ~0.2 s) and peak B/op, the most extra memory one call
+held at once (tracemalloc, measured separately from the timing).
+
+The template/page cases render a list-page-like loop of the same filters,
+accounts.html (2000 rows) and spend_report.html (300 projects) through
+Jinja, so filter cost can be set against the whole render.
+
+--json appends the results as one JSON line; --compare prints the change
+against the last line of such a file, to track a helper over time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+WORDS = ("flange", "gasket", "bolt", "plate", "beam", "valve", "pipe", "elbow", "bracket",
+         "cable", "tray", "weld", "primer", "coating", "sensor", "bearing", "shaft", "seal")
+
+# (name, fn, [args tuple per call])
+Case = Tuple[str, Callable, List[tuple]]
+
+
+# ------------------------------
+# Inputs
+# ------------------------------
+
+def _timestamps(rng: random.Random, n: int) -> List[str]:
+    now = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    out = []
+    for _ in range(n):
+        dt = now - timedelta(seconds=rng.randint(0, 540 * 86400), microseconds=rng.randint(0, 999999))
+        kind = rng.random()
+        if kind < 0.6:
+            out.append(dt.isoformat())                                  # 2025-03-04T10:11:12.123456+00:00
+        elif kind < 0.8:
+            out.append(dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"))            # ...Z
+        else:
+            out.append(dt.date().isoformat())                           # delivery_date
+    return out
+
+
+def _amounts(rng: random.Random, n: int) -> list:
+    out = []
+    for _ in range(n):
+        v = round(rng.uniform(-500, 250000), 2)
+        kind = rng.random()
+        out.append(v if kind < 0.7 else (f"{v:,.2f}" if kind < 0.85 else (0 if kind < 0.95 else None)))
+    return out
+
+
+def _descriptions(rng: random.Random, n: int) -> List[str]:
+    return [f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))).capitalize()} "
+            f"M{rng.randint(2, 30)} x {rng.randint(10, 300)}" for _ in range(n)]
+
+
+def _form(rng: random.Random, lines: int):
+    from werkzeug.datastructures import MultiDict
+    data = [("project_id", "10042"), ("supplier_id", "5f0c6f1e-1111-4222-8333-944445555666"),
+            ("delivery_terms", "DAP"), ("delivery_date", "2025-06-30"), ("test_cert_required", "on"),
+            ("supplier_reference_number", " Q48213 ")]
+    for i, desc in enumerate(_descriptions(rng, lines)):
+        data += [("description[]", desc), ("quantity[]", str(rng.randint(1, 50))), ("unit[]", "ea"),
+                 ("unit_price[]", f"£{rng.uniform(1, 5000):,.2f}"), ("line_item_id[]", f"li-{i}" if i % 3 else "")]
+    return MultiDict(data)
+
+
+def _line_items(rng: random.Random, n: int) -> List[dict]:
+    items = [{"description": d, "quantity": rng.randint(0, 50), "unit_price": round(rng.uniform(0, 900), 2)}
+             for d in _descriptions(rng, n)]
+    items[0]["description"] = "Test Certificates"
+    return items
+
+
+# ------------------------------
+# Cases
+# ------------------------------
+
+def cases() -> List[Case]:
+    from app.routes import _natural_key, sort_po_line_items
+    from app.utils.filters import accounting, accounting_number, format_date
+    from app.utils.forms import parse_po_form
+    from app.utils.revision import compute_updated_revision
+    from app.utils.status_utils import allowed_next_statuses
+
+    rng = random.Random(42)
+    stamps = _timestamps(rng, 1000)
+    amounts = _amounts(rng, 1000)
+    descriptions = _descriptions(rng, 1000)
+    # more distinct values than the filters' memo holds: every call is a miss
+    distinct_stamps = _timestamps(rng, 10000)
+    distinct_amounts = [round(rng.uniform(-500, 250000), 2) for _ in range(10000)]
+    statuses = [rng.choice(("draft", "approved", "issued", "complete", "cancelled", " Issued ")) for _ in range(200)]
+    revisions = [(rng.choice(("a", "b", "c", "1", "2", "10", "")), rng.choice(("draft", "approved", "issued")),
+                  rng.choice(("draft", "approved", "issued", "complete"))) for _ in range(200)]
+    forms20 = [(_form(rng, 20),) for _ in range(5)]
+    forms200 = [(_form(rng, 200),) for _ in range(2)]
+    items50 = [_line_items(rng, 50) for _ in range(5)]
+    items500 = [_line_items(rng, 500) for _ in range(2)]
+
+    return [
+        ("format_date[iso]", format_date, [(s,) for s in stamps]),
+        ("format_date[datetime]", format_date,
+         [(datetime.fromisoformat(s.replace("Z", "+00:00")),) for s in stamps[:200]]),
+        ("format_date[garbage]", format_date, [("n/a",), ("31/12/2024",), ("TBC",)]),
+        ("format_date[iso, 10k distinct]", format_date, [(s,) for s in distinct_stamps]),
+        ("accounting", accounting, [(a,) for a in amounts]),
+        ("accounting[10k distinct]", accounting, [(a,) for a in distinct_amounts]),
+        ("accounting_number", accounting_number, [(a,) for a in amounts]),
+        ("_natural_key", _natural_key, [(d,) for d in descriptions]),
+        ("sort_po_line_items[50]", lambda items: sort_po_line_items({"line_items": items}), [(i,) for i in items50]),
+        ("sort_po_line_items[500]", lambda items: sort_po_line_items({"line_items": items}), [(i,) for i in items500]),
+        ("parse_po_form[20]", parse_po_form, forms20),
+        ("parse_po_form[200]", parse_po_form, forms200),
+        ("allowed_next_statuses", allowed_next_statuses, [(s,) for s in statuses]),
+        ("compute_updated_revision", compute_updated_revision, revisions),
+    ]
+
+
+def template_cases(app) -> List[Case]:
+    """A 500-row table with and without the filters, and two filter-heavy pages."""
+    rng = random.Random(7)
+    rows = [{"po_number": 1000 + i, "updated_at": s, "total_value": a, "status": "issued"}
+            for i, (s, a) in enumerate(zip(_timestamps(rng, 500), _amounts(rng, 500)))]
+    plain = app.jinja_env.from_string(
+        "{% for r in rows %}<tr><td>{{ '%06d'|format(r.po_number) }}</td><td>{{ r.updated_at }}</td>"
+        "<td>{{ r.total_value }}</td><td>{{ r.status }}</td></tr>{% endfor %}")
+    filtered = app.jinja_env.from_string(
+        "{% for r in rows %}<tr><td>{{ '%06d'|format(r.po_number) }}</td><td>{{ r.updated_at|format_date }}</td>"
+        "<td>{{ r.total_value|accounting }}</td><td>{{ r.status }}</td></tr>{% endfor %}")
+    accounts = [{"id": f"po-{i}", "po_number": 1000 + i, "status": "issued", "total_value": a or 0,
+                 "acc_complete": i % 3 == 0, "invoice_reference": f"INV-{i}" if i % 3 == 0 else None,
+                 "projectnumber": f"{10000 + i % 40}", "supplier_name": f"Supplier {i % 90:03d}"}
+                for i, a in enumerate(_amounts(rng, 2000))]
+    months = [f"2025-{m:02d}-01" for m in range(1, 13)]
+    data = {f"{10000 + p}": {m: round(rng.uniform(0, 90000), 2) for m in months if rng.random() < 0.6}
+            for p in range(300)}
+    spend = {
+        "months": months, "data": data, "project_order": sorted(data),
+        "row_totals": {p: sum(v.values()) for p, v in data.items()},
+        "col_totals": {m: sum(v.get(m, 0.0) for v in data.values()) for m in months},
+        "grand_total": sum(sum(v.values()) for v in data.values()),
+        "month_from": {m: m for m in months}, "month_to": {m: m for m in months},
+    }
+
+    def page(path, template, **context):
+        from flask import render_template
+        with app.test_request_context(path):
+            return render_template(template, **context)
+
+    return [
+        ("template[500 rows, no filters]", lambda: plain.render(rows=rows), [()]),
+        ("template[500 rows, filters]", lambda: filtered.render(rows=rows), [()]),
+        ("page[accounts.html, 2000 rows]", lambda: page(
+            "/accounts/", "accounts.html", po_list=accounts, completed="all", selected_project="",
+            selected_supplier="", project_options=[], supplier_options=[]), [()]),
+        ("page[spend_report.html, 300 projects]", lambda: page("/spend-report", "spend_report.html", **spend), [()]),
+    ]
+
+
+# ------------------------------
+# Measuring
+# ------------------------------
+
+def _ns_per_op(fn: Callable, inputs: Sequence[tuple], rounds: int) -> float:
+    def run():
+        for args in inputs:
+            fn(*args)
+    timer = timeit.Timer(run)
+    loops, took = timer.autorange()
+    loops = max(1, int(loops * 0.2 / took)) if took else loops
+    best = min(timer.repeat(repeat=rounds, number=loops))
+    return best / (loops * len(inputs)) * 1e9
+
+
+def _peak_bytes_per_op(fn: Callable, inputs: Sequence[tuple]) -> float:
+    tracemalloc.start()
+    total = 0
+    for args in inputs:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(*args)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / len(inputs)
+
+
+def measure(case: Case, rounds: int) -> dict:
+    name, fn, inputs = case
+    return {
+        "name": name,
+        "inputs": len(inputs),
+        "ns_op": round(_ns_per_op(fn, inputs, rounds), 1),
+        "peak_b_op": round(_peak_bytes_per_op(fn, inputs)),
+    }
+
+
+def _fmt_ns(ns: float) -> str:
+    return f"{ns / 1e6:.2f} ms" if ns >= 1e6 else (f"{ns / 1e3:.1f} µs" if ns >= 1e3 else f"{ns:.0f} ns")
+
+
+def _last_record(path: str) -> Dict[str, dict]:
+    try:
+        lines = Path(path).read_text().strip().splitlines()
+    except OSError:
+        return {}
+    return {r["name"]: r for r in json.loads(lines[-1])["results"]} if lines else {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--filter", help="comma-separated substrings of case names")
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--json", help="append results to this JSON-lines file")
+    ap.add_argument("--compare", help="JSON-lines file whose last run to compare against")
+    args = ap.parse_args(argv)
+
+    import logging
+    import os
+    os.environ.update({"REPLICA_ENABLED": "0", "CHANGE_FEED_ENABLED": "0", "SHARED_CACHE_ENABLED": "0"})
+    from app import create_app
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    selected = cases() + template_cases(app)
+    if args.filter:
+        wanted = [w for w in args.filter.split(",") if w]
+        selected = [c for c in selected if any(w in c[0] for w in wanted)]
+    previous = _last_record(args.compare) if args.compare else {}
+
+    header = f"{'case':<34}{'inputs':>7}{'per op':>12}{'change':>9}{'peak B/op':>11}"
+    print(header)
+    print("-" * len(header))
+    results = []
+    with app.app_context():
+        for case in selected:
+            r = measure(case, args.rounds)
+            results.append(r)
+            before = previous.get(r["name"])
+            change = f"{(r['ns_op'] / before['ns_op'] - 1) * 100:+.0f}%" if before else "-"
+            print(f"{r['name']:<34}{r['inputs']:>7}{_fmt_ns(r['ns_op']):>12}{change:>9}{r['peak_b_op']:>11}")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "a") as f:
+            f.write(json.dumps({"bench": "micro", "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                "python": sys.version.split()[0], "results": results}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# bench/pdf.py
+"""
+PDF render benchmark and regression gate for po_pdf.html + pdf_style.css.
+
+    python -m bench.pdf                      # run, compare with the baseline
+    python -m bench.pdf --save-baseline      # run, store as the new baseline
+    python -m bench.pdf --lines 1,20,200 --repeat 5 --tolerance 0.2
+
+Synthetic POs with 1, 20, 200 and 2000 line items are rendered with and
+without the certs table through the same code as /po/<id>/pdf
+(routes.po_pdf_html, then pdf_render.render_pdf_pages). Per case:
+template time, WeasyPrint time (median of --repeat), pages, PDF size, and
+peak traced Python allocation (one extra run under tracemalloc, so timing
+isn't skewed by it).
+
+The baseline (default bench/baselines/pdf.json) belongs to the machine that
+wrote it; record it on the Pi and compare there. A case regresses when its
+render time or peak memory grows past --tolerance (default 0.25) and by more
+than --min-ms / --min-mb, or when its page count or size changes that much.
+Any regression exits with status 1, so this can gate a template/CSS change.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "bench" / "baselines" / "pdf.json"
+WORDS = ("flange", "gasket", "bolt", "plate", "beam", "valve", "pipe", "elbow", "bracket",
+         "cable", "tray", "weld", "primer", "coating", "sensor", "bearing", "shaft", "seal")
+
+
+def synthetic_po(lines: int, seed: int = 1) -> dict:
+    """A PO shaped like fetch_po_detail()'s result, with `lines` line items."""
+    rng = random.Random(seed * 100003 + lines)
+    items = []
+    for i in range(lines):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 12)))
+        desc = f"{words.capitalize()} DN{rng.randint(15, 300)}"
+        if rng.random() < 0.15:
+            desc += "\nMaterial: S355J2 to EN 10025-2\nFinish: hot-dip galvanised"
+        items.append({
+            "id": f"li-{i}", "description": desc, "quantity": rng.randint(1, 50), "unit": rng.choice(("ea", "m", "kg")),
+            "unit_price": round(rng.uniform(0.5, 2500), 2), "currency": "GBP", "active": True,
+        })
+    if lines > 1:
+        items[0] = {**items[0], "description": "Test certificates to EN 10204 3.1", "unit_price": 0}
+    return {
+        "id": "bench-po", "po_number": 4242, "project_id": "10042", "projectnumber": "10042", "item_seq": 3,
+        "current_revision": "2", "status": "issued", "updated_at": "2025-06-02T10:15:00+00:00",
+        "manual_delivery_address": None,
+        "suppliers": {"name": "Flange Supplies 00042 Ltd", "address_line1": "42 Industrial Estate",
+                      "address_line2": "Unit 7", "postcode": "AB1 2CD"},
+        "po_metadata": {"supplier_reference_number": "Q48213", "delivery_date": "2025-06-30",
+                        "delivery_terms": "DAP", "active": True},
+        "delivery_address": {"name": "Site Stores", "address_line1": "Gate 3", "postcode": "EF3 4GH"},
+        "delivery_contact": {"name": "Contact 007", "phone": "01234 000007", "email": "contact7@example.com"},
+        "line_items": items,
+    }
+
+
+def _case_key(lines: int, certs: bool) -> str:
+    return f"lines={lines},certs={'on' if certs else 'off'}"
+
+
+def _run_case(app, lines: int, certs: bool, repeat: int) -> dict:
+    from app.routes import po_pdf_html, sort_po_line_items
+    from app.utils.pdf_render import render_pdf_pages
+
+    html_s, pdf_s = [], []
+    pages = size = 0
+    with app.test_request_context("/po/bench-po/pdf", base_url="http://localhost/"):
+        from flask import request
+        for _ in range(repeat):
+            po = synthetic_po(lines)
+            sort_po_line_items(po)
+            t0 = time.perf_counter()
+            html = po_pdf_html(po, include_certs_table=certs)
+            t1 = time.perf_counter()
+            pdf_bytes, pages = render_pdf_pages(html, base_url=request.root_url)
+            t2 = time.perf_counter()
+            html_s.append(t1 - t0)
+            pdf_s.append(t2 - t1)
+            size = len(pdf_bytes)
+
+        po = synthetic_po(lines)
+        sort_po_line_items(po)
+        tracemalloc.start()
+        render_pdf_pages(po_pdf_html(po, include_certs_table=certs), base_url=request.root_url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "case": _case_key(lines, certs),
+        "lines": lines,
+        "certs": certs,
+        "html_ms": round(statistics.median(html_s) * 1000, 1),
+        "pdf_ms": round(statistics.median(pdf_s) * 1000, 1),
+        "pdf_ms_min": round(min(pdf_s) * 1000, 1),
+        "pages": pages,
+        "kb": round(size / 1024, 1),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def _machine() -> dict:
+    try:
+        import weasyprint
+        wp_version = weasyprint.__version__
+    except Exception:
+        wp_version = None
+    return {"host": platform.node(), "machine": platform.machine(), "python": platform.python_version(),
+            "weasyprint": wp_version}
+
+
+# ------------------------------
+# Baseline comparison
+# ------------------------------
+
+def compare(current: List[dict], baseline: Dict[str, dict], tolerance: float, min_ms: float,
+            min_mb: float) -> List[str]:
+    """Human-readable regressions of `current` against baseline cases."""
+    problems = []
+    for r in current:
+        base = baseline.get(r["case"])
+        if not base:
+            continue
+        total, base_total = r["html_ms"] + r["pdf_ms"], base["html_ms"] + base["pdf_ms"]
+        if total > base_total * (1 + tolerance) and total - base_total > min_ms:
+            problems.append(f"{r['case']}: render {base_total:.0f} -> {total:.0f} ms")
+        if r["peak_mb"] > base["peak_mb"] * (1 + tolerance) and r["peak_mb"] - base["peak_mb"] > min_mb:
+            problems.append(f"{r['case']}: peak {base['peak_mb']} -> {r['peak_mb']} MB")
+        if abs(r["pages"] - base["pages"]) > max(1, base["pages"] * tolerance):
+            problems.append(f"{r['case']}: pages {base['pages']} -> {r['pages']}")
+        if r["kb"] > base["kb"] * (1 + tolerance) and r["kb"] - base["kb"] > 16:
+            problems.append(f"{r['case']}: size {base['kb']} -> {r['kb']} KB")
+    return problems
+
+
+def _print_table(rows: List[dict], baseline: Dict[str, dict]) -> None:
+    header = f"{'case':<24}{'html ms':>9}{'pdf ms':>9}{'base':>9}{'pages':>7}{'KB':>9}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        base = baseline.get(r["case"])
+        base_ms = f"{base['html_ms'] + base['pdf_ms']:.0f}" if base else "-"
+        print(f"{r['case']:<24}{r['html_ms']:>9}{r['pdf_ms']:>9}{base_ms:>9}{r['pages']:>7}{r['kb']:>9}{r['peak_mb']:>9}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--lines", default="1,20,200,2000", help="comma-separated line-item counts")
+    ap.add_argument("--certs", default="on,off", help="on, off or on,off")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth")
+    ap.add_argument("--min-ms", type=float, default=25.0, help="ignore time growth below this")
+    ap.add_argument("--min-mb", type=float, default=2.0, help="ignore memory growth below this")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="po-bench-pdf-")
+    os.environ.update({
+        "REPLICA_ENABLED": "0", "CHANGE_FEED_ENABLED": "0", "SHARED_CACHE_ENABLED": "0",
+        "PROFILE_DIR": os.path.join(tmp, "profiles"), "MEMWATCH_DIR": os.path.join(tmp, "memwatch"),
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    os.chdir(ROOT)  # PDF_STYLESHEET and the logo are relative to the repo root
+    sys.path.insert(0, str(ROOT))
+
+    import logging
+    from app import create_app
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    baseline_path = Path(args.baseline)
+    stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    baseline = {c["case"]: c for c in stored.get("cases", [])}
+    if stored and stored.get("machine", {}).get("host") != _machine()["host"]:
+        print(f"note: baseline was recorded on {stored['machine'].get('host')!r}; timings may not compare")
+
+    rows = []
+    for lines in [int(x) for x in args.lines.split(",") if x]:
+        for certs in [c == "on" for c in args.certs.split(",") if c]:
+            rows.append(_run_case(app, lines, certs, args.repeat))
+    _print_table(rows, baseline)
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": _machine(),
+                                             "cases": rows}, indent=1) + "\n")
+        print(f"baseline saved to {baseline_path}")
+        return 0
+    if not baseline:
+        print(f"no baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+
+    problems = compare(rows, baseline, args.tolerance, args.min_ms, args.min_mb)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if not problems:
+        print(f"ok: within {args.tolerance:.0%} of the baseline")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
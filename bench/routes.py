@@ -0,0 +1,221 @@
+# bench/routes.py
+"""
+Page benchmark against a local PostgREST stand-in (bench/fake_postgrest.py).
+
+    python -m bench.routes --scale 1k,10k,100k
+    python -m bench.routes --scale 10k --routes po-list,accounts --requests 50 --concurrency 4
+    python -m bench.routes --scale 10k --latency-ms 40 --caches --json bench/results/routes.json
+
+For each scale a fake PostgREST is seeded and started in its own process, and
+a fresh process runs the app against it through Flask's test client. Each
+route is requested --warmup times, then --requests times. Reported per route:
+throughput, p50/p95/p99/max latency, upstream calls per request (counted by
+the stand-in), response size and errors.
+
+The replica, change feed and PDF archive copy are off. Shared/micro caches
+are off too unless --caches is given, so every request pays its full cost.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROUTES: Dict[str, str] = {
+    "po-list":      "/po-list",
+    "expediting":   "/expediting",
+    "accounts":     "/accounts/",
+    "spend-report": "/spend-report",
+    "edit-po":      "/edit-po/{po_id}",
+    "po-pdf":       "/po/{po_id}/pdf",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarise(route: str, latencies: List[float], wall: float, calls: dict, nbytes: int, errors: Dict[str, int]) -> dict:
+    ms = sorted(x * 1000.0 for x in latencies)
+    n = len(ms)
+    return {
+        "route": route,
+        "requests": n,
+        "rps": round(n / wall, 2) if wall else None,
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "max_ms": round(ms[-1], 1) if ms else None,
+        "calls_per_req": round(calls.get("total", 0) / n, 2) if n else None,
+        "calls": calls.get("calls", {}),
+        "kb_per_req": round(nbytes / n / 1024, 1) if n else None,
+        "errors": errors,
+    }
+
+
+# ------------------------------
+# Child: one scale, one app process
+# ------------------------------
+
+def _run_scale(args, fake_url: str) -> dict:
+    os.environ.update({
+        "SUPABASE_URL": fake_url,
+        "SUPABASE_KEY": "bench",
+        "REPLICA_ENABLED": "0",
+        "CHANGE_FEED_ENABLED": "0",
+        "SAVE_PDF_ON_DOWNLOAD": "0",
+        "CALL_TRACE_ENABLED": "1",
+    })
+    if not args.caches:
+        os.environ["SHARED_CACHE_ENABLED"] = "0"
+        os.environ["SUPABASE_MICRO_TTL_MS"] = "0"
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+    import logging
+    sys.path.insert(0, str(ROOT))
+    from app import create_app
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+
+    po_ids = requests.get(f"{fake_url}/__bench/po-ids", params={"n": 50}, timeout=30).json()
+    results = []
+    for name in args.routes:
+        pattern = ROUTES[name]
+        paths = [pattern.format(po_id=po_ids[i % len(po_ids)]) for i in range(args.warmup + args.requests)]
+
+        def hit(path):
+            with app.test_client() as client:
+                t0 = time.perf_counter()
+                resp = client.get(path, buffered=True)  # closes streamed pages, so their hooks run
+                body = resp.get_data()
+                return time.perf_counter() - t0, resp.status_code, len(body)
+
+        for path in paths[:args.warmup]:
+            hit(path)
+        requests.post(f"{fake_url}/__bench/reset", timeout=10)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            done = list(pool.map(hit, paths[args.warmup:]))
+        wall = time.perf_counter() - t0
+
+        calls = requests.get(f"{fake_url}/__bench/stats", timeout=10).json()
+        errors: Dict[str, int] = {}
+        for _, status, _ in done:
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        results.append(summarise(name, [d[0] for d in done], wall, calls, sum(d[2] for d in done), errors))
+    return {"results": results}
+
+
+# ------------------------------
+# Parent: fake per scale, child per scale, report
+# ------------------------------
+
+def _start_fake(scale: str, latency_ms: float):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_postgrest", "--scale", scale, "--port", "0",
+         "--latency-ms", str(latency_ms)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line:
+        proc.kill()
+        raise RuntimeError("fake PostgREST failed to start")
+    info = json.loads(line)
+    return proc, info
+
+
+def _print_table(scale: str, info: dict, rows: List[dict]) -> None:
+    print(f"\n== scale {scale}: {info['rows']['purchase_orders']} purchase_orders, "
+          f"{info['rows']['project_register_items']} register items, seeded in {info['seeded_s']}s")
+    header = f"{'route':<14}{'req':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'calls':>7}{'KB':>9}  errors"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        errors = ", ".join(f"{k}x{v}" for k, v in r["errors"].items()) or "-"
+        print(f"{r['route']:<14}{r['requests']:>5}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+              f"{r['p99_ms']:>9}{r['max_ms']:>9}{r['calls_per_req']:>7}{r['kb_per_req']:>9}  {errors}")
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--scale", default="1k,10k", help="comma-separated: 1k,10k,100k")
+    ap.add_argument("--routes", default=",".join(ROUTES), help=f"comma-separated subset of {','.join(ROUTES)}")
+    ap.add_argument("--requests", type=int, default=20)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="added to every upstream call")
+    ap.add_argument("--caches", action="store_true", help="keep the shared and micro caches on")
+    ap.add_argument("--json", help="append results to this JSON-lines file")
+    ap.add_argument("--child", help=argparse.SUPPRESS)       # internal: fake URL
+    ap.add_argument("--child-out", help=argparse.SUPPRESS)   # internal: result file
+    args = ap.parse_args(argv)
+    args.routes = [r for r in args.routes.split(",") if r]
+    unknown = [r for r in args.routes if r not in ROUTES]
+    if unknown:
+        ap.error(f"unknown route(s): {', '.join(unknown)}")
+
+    if args.child:
+        Path(args.child_out).write_text(json.dumps(_run_scale(args, args.child)))
+        return 0
+
+    failed = False
+    for scale in [s for s in args.scale.split(",") if s]:
+        fake, info = _start_fake(scale, args.latency_ms)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                out = Path(tmp) / "result.json"
+                env = {**os.environ, "SHARED_CACHE_PATH": str(Path(tmp) / "shared_cache.db"),
+                       "PROFILE_DIR": str(Path(tmp) / "profiles"), "MEMWATCH_DIR": str(Path(tmp) / "memwatch")}
+                cmd = [sys.executable, "-m", "bench.routes", "--child", info["ready"], "--child-out", str(out),
+                       "--routes", ",".join(args.routes), "--requests", str(args.requests),
+                       "--warmup", str(args.warmup), "--concurrency", str(args.concurrency)]
+                if args.caches:
+                    cmd.append("--caches")
+                child = subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+                if child.returncode != 0 or not out.exists():
+                    print(f"\n== scale {scale}: benchmark process failed (exit {child.returncode})", file=sys.stderr)
+                    failed = True
+                    continue
+                rows = json.loads(out.read_text())["results"]
+        finally:
+            fake.terminate()
+            fake.wait()
+
+        _print_table(scale, info, rows)
+        if args.json:
+            record = {"bench": "routes", "at": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": _git_rev(),
+                      "scale": scale, "rows": info["rows"], "latency_ms": args.latency_ms,
+                      "concurrency": args.concurrency, "caches": args.caches, "results": rows}
+            with open(args.json, "a") as f:
+                f.write(json.dumps(record) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# gunicorn.conf.py
+# Worker mode is picked from env so the Pi can switch without a rebuild:
+#   GUNICORN_WORKER_CLASS = sync (default) | gthread | gevent
+#     - sync:    one request at a time per worker (previous behaviour)
+#     - gthread: GUNICORN_THREADS requests per worker
+#     - gevent:  GUNICORN_WORKER_CONNECTIONS requests per worker; blocking
+#                `requests`/sockets yield while waiting on Supabase, so one
+#                worker serves many I/O-bound page loads at once
+#   GUNICORN_WORKERS (default 2), GUNICORN_TIMEOUT (default 120), PORT (default 8000)
+# PDF rendering (WeasyPrint) is CPU-bound and still holds its worker while it runs.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+if worker_class == "gthread":
+    threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+elif worker_class == "gevent":
+    worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "100"))
+
+# Memory: app/utils/memwatch.py recycles a worker whose RSS passes
+# MEMWATCH_MAX_RSS_MB. GUNICORN_MAX_REQUESTS (default 0 = off) also restarts
+# each worker after that many requests, with jitter so both don't go at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# /metrics: workers share counters through files in PROMETHEUS_MULTIPROC_DIR
+# (app/utils/metrics.py); it is emptied at start-up and a dead worker's
+# files are retired so restarts don't double-count.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/po_prometheus")
+
+
+def on_starting(server):
+    import shutil
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
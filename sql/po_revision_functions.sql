@@ -0,0 +1,107 @@
+-- sql/po_revision_functions.sql
+-- Database functions called by the app through PostgREST (/rest/v1/rpc/...).
+-- Apply in the Supabase SQL editor (or psql); safe to re-run.
+-- PostgREST picks up new functions after: NOTIFY pgrst, 'reload schema';
+
+-- ---------------------------------------------------------------------------
+-- create_po_revision: snapshot a PO into a new revision in one transaction.
+--   Deactivates the old revision's po_metadata + po_line_items, optionally
+--   creates a delivery contact, inserts purchase_orders + po_metadata +
+--   po_line_items for the new revision, and returns the new purchase_orders.id.
+--   Payloads are the same JSON the app used to POST table by table; fields are
+--   cast through each table's own row type, so column types live in one place.
+--   Any failure rolls the whole revision back.
+-- Called by supabase_client.create_po_revision().
+-- ---------------------------------------------------------------------------
+create or replace function public.create_po_revision(
+    p_old_po_id  uuid,
+    p_po         jsonb,
+    p_metadata   jsonb,
+    p_line_items jsonb default '[]'::jsonb,
+    p_contact    jsonb default null
+) returns uuid
+language plpgsql
+as $$
+declare
+    v_contact_id uuid;
+    v_po_id      uuid;
+begin
+    if p_old_po_id is not null then
+        update public.po_metadata   set active = false where po_id = p_old_po_id;
+        update public.po_line_items set active = false where po_id = p_old_po_id;
+    end if;
+
+    v_contact_id := nullif(p_po->>'delivery_contact_id', '')::uuid;
+    if v_contact_id is null and p_contact is not null and p_contact->>'address_id' is not null then
+        -- id from the app (as insert_delivery_contact does); don't rely on a column default
+        insert into public.delivery_contacts (id, name, email, phone, address_id, organisation)
+        select coalesce((p_contact->>'id')::uuid, gen_random_uuid()),
+               c.name, c.email, c.phone, c.address_id, c.organisation
+        from jsonb_populate_record(null::public.delivery_contacts, p_contact) c
+        returning id into v_contact_id;
+    end if;
+
+    insert into public.purchase_orders (
+        project_id, item_seq, supplier_id, status, current_revision,
+        delivery_contact_id, po_number, last_release
+    )
+    select r.project_id, r.item_seq, r.supplier_id, r.status, r.current_revision,
+           v_contact_id, r.po_number, r.last_release
+    from jsonb_populate_record(null::public.purchase_orders, p_po) r
+    returning id into v_po_id;
+
+    insert into public.po_metadata (
+        po_id, delivery_terms, delivery_date, supplier_contact_name,
+        supplier_reference_number, test_certificates_required, active
+    )
+    select v_po_id, m.delivery_terms, m.delivery_date, m.supplier_contact_name,
+           m.supplier_reference_number, coalesce(m.test_certificates_required, false), true
+    from jsonb_populate_record(null::public.po_metadata, p_metadata) m;
+
+    insert into public.po_line_items (
+        po_id, description, quantity, unit, unit_price, currency,
+        exped_expected_date, active
+    )
+    select v_po_id, li.description, li.quantity, li.unit, li.unit_price,
+           coalesce(li.currency, 'GBP'), li.exped_expected_date, true
+    from jsonb_populate_recordset(null::public.po_line_items, coalesce(p_line_items, '[]'::jsonb)) li;
+
+    return v_po_id;
+end;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- clone_po_line_items: copy every po_line_items row of one PO onto another
+--   inside the database (insert ... select) and return how many were copied.
+--   All columns are copied except the identity/audit ones below, so new
+--   columns are picked up without touching this function.
+-- Called by routes._clone_line_items() (advance_revision).
+-- ---------------------------------------------------------------------------
+create or replace function public.clone_po_line_items(
+    p_from_po_id uuid,
+    p_to_po_id   uuid
+) returns integer
+language plpgsql
+as $$
+declare
+    v_cols  text;
+    v_count integer;
+begin
+    select string_agg(quote_ident(column_name), ', ' order by ordinal_position)
+      into v_cols
+      from information_schema.columns
+     where table_schema = 'public'
+       and table_name   = 'po_line_items'
+       and column_name not in ('id', 'po_id', 'created', 'modified', 'created_at', 'updated_at')
+       and is_generated = 'NEVER';
+
+    execute format(
+        'insert into public.po_line_items (po_id, %1$s) '
+        'select $2, %1$s from public.po_line_items where po_id = $1',
+        v_cols
+    ) using p_from_po_id, p_to_po_id;
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;